@@ -0,0 +1,341 @@
+import csv
+import math
+import os
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet support is optional; CSV always works
+    pq = None
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+SECONDS_PER_YEAR = 365.25 * 24 * 3600
+
+
+class PriceSeries:
+    """OHLCV bars held as parallel float64 NumPy arrays"""
+
+    def __init__(self, timestamps: np.ndarray, open_: np.ndarray, high: np.ndarray,
+                 low: np.ndarray, close: np.ndarray, volume: np.ndarray, symbol: str = ""):
+        self.symbol = symbol
+        self.timestamps = timestamps
+        self.open = np.asarray(open_, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.close)
+
+    def head(self, bars: int) -> 'PriceSeries':
+        """The first bars of the series as zero-copy views"""
+        return PriceSeries(self.timestamps[:bars], self.open[:bars], self.high[:bars], self.low[:bars],
+                           self.close[:bars], self.volume[:bars], symbol=self.symbol)
+
+    @classmethod
+    def load(cls, path: str, symbol: str = None) -> 'PriceSeries':
+        """Load a CSV or Parquet file with timestamp, open, high, low, close, volume columns"""
+        symbol = symbol or os.path.splitext(os.path.basename(path))[0]
+        if path.endswith(".parquet"):
+            return cls.from_parquet(path, symbol)
+        return cls.from_csv(path, symbol)
+
+    @classmethod
+    def from_csv(cls, path: str, symbol: str = "") -> 'PriceSeries':
+        with open(path, newline="", encoding="utf-8") as f:
+            header = [name.strip().lower() for name in next(csv.reader(f))]
+
+        missing = [name for name in ["timestamp"] + OHLCV_COLUMNS if name not in header]
+        if missing:
+            raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+
+        numeric = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2,
+                             usecols=[header.index(name) for name in OHLCV_COLUMNS])
+        raw_timestamps = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=1, dtype=str,
+                                    usecols=[header.index("timestamp")])
+        return cls(_parse_timestamps(raw_timestamps), *numeric.T, symbol=symbol)
+
+    @classmethod
+    def from_parquet(cls, path: str, symbol: str = "") -> 'PriceSeries':
+        if pq is None:
+            raise ImportError("Reading Parquet price files requires the pyarrow package")
+
+        table = pq.read_table(path, columns=["timestamp"] + OHLCV_COLUMNS)
+        columns = {name: table.column(name).to_numpy() for name in table.column_names}
+        return cls(
+            _parse_timestamps(columns["timestamp"]),
+            *(columns[name] for name in OHLCV_COLUMNS),
+            symbol=symbol
+        )
+
+    def periods_per_year(self) -> float:
+        """Bars per year, inferred from the median bar spacing (daily bars if unknown)"""
+        if len(self.timestamps) < 2:
+            return 252.0
+        spacing = np.median(np.diff(self.timestamps).astype("timedelta64[s]").astype(np.float64))
+        if spacing <= 0:
+            return 252.0
+        # Daily bars only trade on weekdays
+        if spacing >= 20 * 3600:
+            return 252.0
+        return SECONDS_PER_YEAR / spacing
+
+
+def _parse_timestamps(values: np.ndarray) -> np.ndarray:
+    if np.issubdtype(np.asarray(values).dtype, np.number):
+        return np.asarray(values, dtype="datetime64[s]")
+    return np.asarray(values).astype("datetime64[s]")
+
+
+# ----------------------------------------------------------------------
+# Vectorized building blocks
+# ----------------------------------------------------------------------
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Simple moving average; the first window-1 entries are NaN"""
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        cumsum = np.cumsum(np.insert(values, 0, 0.0))
+        out[window - 1:] = (cumsum[window:] - cumsum[:-window]) / window
+    return out
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        mean = rolling_mean(values, window)
+        mean_sq = rolling_mean(values * values, window)
+        out[window - 1:] = np.sqrt(np.maximum(mean_sq[window - 1:] - mean[window - 1:] ** 2, 0.0))
+    return out
+
+
+def rolling_max(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        out[window - 1:] = sliding_window_view(values, window).max(axis=-1)
+    return out
+
+
+def rolling_min(values: np.ndarray, window: int) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    if window <= len(values):
+        out[window - 1:] = sliding_window_view(values, window).min(axis=-1)
+    return out
+
+
+def lag(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    out = np.full(len(values), np.nan)
+    out[periods:] = values[:-periods]
+    return out
+
+
+def hold_until_exit(signal: np.ndarray) -> np.ndarray:
+    """Forward-fill entry/exit events into a position array.
+
+    signal holds NaN for "no event", +1/-1 for entries and 0 for exits;
+    the result carries the last event forward (flat before the first one).
+    """
+    has_event = ~np.isnan(signal)
+    last_event = np.where(has_event, np.arange(len(signal)), 0)
+    np.maximum.accumulate(last_event, out=last_event)
+    positions = signal[last_event]
+    positions[~has_event[last_event]] = 0.0
+    return positions
+
+
+# ----------------------------------------------------------------------
+# Strategies: each returns the desired position (+1 long, -1 short, 0 flat)
+# decided at the close of every bar
+# ----------------------------------------------------------------------
+def trend_following(prices: PriceSeries, fast: int = 20, slow: int = 50, allow_short: bool = False,
+                    **_) -> np.ndarray:
+    fast_ma = rolling_mean(prices.close, fast)
+    slow_ma = rolling_mean(prices.close, slow)
+    positions = np.where(fast_ma > slow_ma, 1.0, -1.0 if allow_short else 0.0)
+    positions[np.isnan(slow_ma) | np.isnan(fast_ma)] = 0.0
+    return positions
+
+
+def mean_reversion(prices: PriceSeries, lookback: int = 20, entry_z: float = 2.0, exit_z: float = 0.5,
+                   **_) -> np.ndarray:
+    mean = rolling_mean(prices.close, lookback)
+    std = rolling_std(prices.close, lookback)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        zscore = (prices.close - mean) / std
+
+    signal = np.full(len(prices), np.nan)
+    signal[np.abs(zscore) <= exit_z] = 0.0
+    signal[zscore < -entry_z] = 1.0
+    signal[zscore > entry_z] = -1.0
+    return hold_until_exit(signal)
+
+
+def momentum_breakout(prices: PriceSeries, lookback: int = 20, exit_lookback: int = 10, **_) -> np.ndarray:
+    # Compare with the channel of the *previous* bars so a bar cannot break its own high
+    upper = lag(rolling_max(prices.high, lookback))
+    lower = lag(rolling_min(prices.low, exit_lookback))
+
+    signal = np.full(len(prices), np.nan)
+    signal[prices.close < lower] = 0.0
+    signal[prices.close > upper] = 1.0
+    return hold_until_exit(signal)
+
+
+def support_resistance(prices: PriceSeries, lookback: int = 50, band: float = 0.01, **_) -> np.ndarray:
+    support = lag(rolling_min(prices.low, lookback))
+    resistance = lag(rolling_max(prices.high, lookback))
+
+    signal = np.full(len(prices), np.nan)
+    signal[prices.close >= resistance * (1 - band)] = 0.0
+    signal[prices.close <= support * (1 + band)] = 1.0
+    return hold_until_exit(signal)
+
+
+STRATEGIES: Dict[str, Callable[..., np.ndarray]] = {
+    "Trend Following": trend_following,
+    "Mean Reversion": mean_reversion,
+    "Momentum Breakout": momentum_breakout,
+    "Support/Resistance": support_resistance
+}
+
+
+def resolve_strategy(name: str) -> Optional[str]:
+    """Map an optimizer strategy name such as 'Trend Following Basic' to a STRATEGIES key"""
+    for key in STRATEGIES:
+        if name.startswith(key):
+            return key
+    return None
+
+
+# ----------------------------------------------------------------------
+# Engine
+# ----------------------------------------------------------------------
+class BacktestResult:
+    def __init__(self, strategy: str, params: Dict, trades: int, win_rate: float, sharpe_ratio: float,
+                 max_drawdown: float, total_return: float, exposure: float, bars: int):
+        self.strategy = strategy
+        self.params = params
+        self.trades = trades
+        self.win_rate = win_rate
+        self.sharpe_ratio = sharpe_ratio
+        self.max_drawdown = max_drawdown
+        self.total_return = total_return
+        self.exposure = exposure
+        self.bars = bars
+
+    def to_dict(self) -> Dict:
+        return {
+            "strategy": self.strategy,
+            "params": self.params,
+            "trades": self.trades,
+            "win_rate": round(self.win_rate * 100, 2),
+            "sharpe_ratio": round(self.sharpe_ratio, 2),
+            "max_drawdown": round(self.max_drawdown * 100, 2),
+            "total_return": round(self.total_return * 100, 2),
+            "exposure": round(self.exposure * 100, 2),
+            "bars": self.bars
+        }
+
+
+class BacktestEngine:
+    """Evaluates strategies over a PriceSeries with NumPy array operations.
+
+    Positions decided at bar t earn the close-to-close return of bar t+1, so
+    there is no look-ahead. position_size scales exposure (percent of equity),
+    stop_loss (percent) flattens a trade once its loss since entry exceeds the
+    limit, and cost_bps is charged on every change in position.
+    """
+
+    def __init__(self, prices: PriceSeries, cost_bps: float = 1.0, returns: np.ndarray = None,
+                 periods_per_year: float = None):
+        self.prices = prices
+        self.cost_bps = cost_bps
+        # Precomputed returns / periods can be passed in to avoid re-deriving them per engine
+        if returns is None:
+            returns = np.zeros(len(prices))
+            returns[1:] = np.diff(prices.close) / prices.close[:-1]
+        self.returns = returns
+        self.periods_per_year = periods_per_year or prices.periods_per_year()
+
+    def run(self, strategy: str, position_size: float = 100.0, stop_loss: float = None,
+            **params) -> BacktestResult:
+        positions = STRATEGIES[strategy](self.prices, **params)
+        return self.evaluate(strategy, positions, position_size, stop_loss, params)
+
+    def evaluate(self, strategy: str, positions: np.ndarray, position_size: float = 100.0,
+                 stop_loss: float = None, params: Dict = None) -> BacktestResult:
+        # Position held during bar t is the one decided at the close of bar t-1
+        held = np.zeros(len(positions))
+        held[1:] = positions[:-1]
+        if stop_loss:
+            held = self._apply_stop_loss(held, stop_loss / 100.0)
+
+        weight = position_size / 100.0
+        turnover = np.abs(np.diff(held, prepend=0.0))
+        strategy_returns = held * weight * self.returns - turnover * weight * self.cost_bps / 10000.0
+
+        trade_returns = self._trade_returns(held, strategy_returns)
+        wins = int(np.count_nonzero(trade_returns > 0))
+
+        equity = np.cumprod(1.0 + strategy_returns)
+        peak = np.maximum.accumulate(equity)
+        max_drawdown = float(np.max(1.0 - equity / peak)) if len(equity) else 0.0
+
+        std = strategy_returns.std()
+        sharpe = float(strategy_returns.mean() / std * math.sqrt(self.periods_per_year)) if std > 0 else 0.0
+
+        return BacktestResult(
+            strategy=strategy,
+            params={**(params or {}), "position_size": position_size, "stop_loss": stop_loss},
+            trades=len(trade_returns),
+            win_rate=wins / len(trade_returns) if len(trade_returns) else 0.0,
+            sharpe_ratio=sharpe,
+            max_drawdown=max_drawdown,
+            total_return=float(equity[-1] - 1.0) if len(equity) else 0.0,
+            exposure=float(np.count_nonzero(held) / len(held)) if len(held) else 0.0,
+            bars=len(held)
+        )
+
+    @staticmethod
+    def _trade_ids(held: np.ndarray) -> np.ndarray:
+        """Number trades 1, 2, ... (0 while flat); a new trade starts on any position change"""
+        starts = (held != 0) & (np.diff(held, prepend=0.0) != 0)
+        ids = np.cumsum(starts)
+        ids[held == 0] = 0
+        return ids
+
+    def _apply_stop_loss(self, held: np.ndarray, stop: float) -> np.ndarray:
+        trade_ids = self._trade_ids(held)
+        log_returns = np.where(held != 0, np.log1p(held * self.returns), 0.0)
+
+        # Cumulative log return since each trade's entry
+        cumulative = np.cumsum(log_returns)
+        entry_index = np.where(np.diff(trade_ids, prepend=0) != 0, np.arange(len(held)), 0)
+        np.maximum.accumulate(entry_index, out=entry_index)
+        before_entry = np.where(entry_index > 0, cumulative[entry_index - 1], 0.0)
+        since_entry = cumulative - before_entry
+
+        # Once a trade's stop is hit, stay flat for the rest of that trade
+        hit = np.where((trade_ids > 0) & (since_entry <= math.log1p(-stop)), trade_ids, 0)
+        stopped_trade = np.maximum.accumulate(hit)
+        stopped = np.zeros(len(held), dtype=bool)
+        stopped[1:] = (stopped_trade[:-1] == trade_ids[1:]) & (trade_ids[1:] > 0)
+
+        return np.where(stopped, 0.0, held)
+
+    def _trade_returns(self, held: np.ndarray, strategy_returns: np.ndarray) -> np.ndarray:
+        trade_ids = self._trade_ids(held)
+        if trade_ids.max(initial=0) == 0:
+            return np.zeros(0)
+        in_trade = trade_ids > 0
+        log_returns = np.log1p(strategy_returns[in_trade])
+        per_trade = np.bincount(trade_ids[in_trade], weights=log_returns)[1:]
+        counts = np.bincount(trade_ids[in_trade])[1:]
+        return np.expm1(per_trade[counts > 0])
+
+    def run_all(self, names: List[str] = None, **risk) -> Dict[str, BacktestResult]:
+        """Backtest several strategies (all of them by default) with the same risk settings"""
+        return {name: self.run(name, **risk) for name in (names or STRATEGIES)}
@@ -1,13 +1,48 @@
+import functools
 import json
 import uuid
 from datetime import datetime, timedelta
 import random
 
+from models.course import bump_version
+from models.feature_set import FeatureSet, feature_limits
+from services.tracing import traced
+from .market_analyzer import MARKET_FEATURE_PREFIXES, MarketAnalyzer, MarketSnapshotCache
+from .market_data import MarketDataStore
+from .strategy_optimizer import StrategyOptimizer
+from .update_engine import CourseUpdateEngine
+
+def build_worker_update_steps(settings):
+    """Rebuild ContentUpdater's update steps in a worker from get_worker_step_factory() settings"""
+    market_analyzer = None
+    if settings["market_snapshot"] is not None:
+        snapshot = settings["market_snapshot"]
+        # Never expires, so every course in the run gets the caller's snapshot
+        snapshot_cache = MarketSnapshotCache(float("inf"))
+        snapshot_cache.get(lambda: snapshot)
+        market_analyzer = MarketAnalyzer(snapshot_cache=snapshot_cache, feature_config=settings["feature_config"])
+    
+    strategy_optimizer = None
+    if settings["strategy_optimizer"] is not None:
+        optimizer_settings = dict(settings["strategy_optimizer"])
+        root = optimizer_settings.pop("market_data_root")
+        strategy_optimizer = StrategyOptimizer(
+            market_data=MarketDataStore(root) if root is not None else None,
+            **optimizer_settings
+        )
+    
+    return ContentUpdater(
+        market_analyzer=market_analyzer,
+        strategy_optimizer=strategy_optimizer,
+        feature_config=settings["feature_config"]
+    ).get_update_steps()
+
 class CourseGenerator:
     def __init__(self):
         self.version = "2.1.4"
         self.last_updated = datetime.now().isoformat()
         
+    @traced("course_generator")
     def generate_course(self, level="Intermediate"):
         """Generate a new course using AI algorithms"""
         
@@ -124,36 +159,72 @@ class CourseGenerator:
         return []
 
 class ContentUpdater:
-    def __init__(self):
+    def __init__(self, market_analyzer=None, strategy_optimizer=None, engine_config=None, feature_config=None):
         self.version = "1.8.7"
         self.last_updated = datetime.now().isoformat()
+        self.market_analyzer = market_analyzer
+        self.strategy_optimizer = strategy_optimizer
+        self.engine_config = engine_config or {}
+        self.feature_config = feature_config or {}
+    
+    def get_update_steps(self):
+        """Agent steps every course goes through, in order"""
+        steps = [("content_updater", self.update_course_content)]
+        if self.market_analyzer is not None:
+            steps.append(("market_analyzer", self.market_analyzer.update_course_with_market_analysis))
+        if self.strategy_optimizer is not None:
+            steps.append(("strategy_optimizer", self.strategy_optimizer.optimize_trading_strategies))
+        return steps
+    
+    def get_worker_step_factory(self):
+        """Picklable factory rebuilding the update steps inside a process-mode worker.
+
+        Workers get the current market snapshot (so every course references
+        the one the run recorded) and the optimizer's settings, not the
+        agents themselves; strategy results they record stay in the worker.
+        """
+        return functools.partial(build_worker_update_steps, {
+            "feature_config": self.feature_config,
+            "market_snapshot": (self.market_analyzer.get_market_snapshot()
+                                if self.market_analyzer is not None else None),
+            "strategy_optimizer": (self.strategy_optimizer.worker_settings()
+                                   if self.strategy_optimizer is not None else None)
+        })
+    
+    @traced("content_updater")
+    def update_courses_batch(self, courses, timeout=None):
+        """Update courses in parallel; returns an UpdateBatchResult with partial results"""
+        executor = self.engine_config.get("executor", "thread")
+        engine = CourseUpdateEngine(
+            self.get_update_steps() if executor == "thread" else (),
+            executor=executor,
+            max_workers=self.engine_config.get("max_workers", 4),
+            chunk_size=self.engine_config.get("chunk_size", 100),
+            agent_concurrency=self.engine_config.get("agent_concurrency"),
+            step_factory=self.get_worker_step_factory() if executor == "process" else None
+        )
+        return engine.run(courses, timeout=timeout)
     
     def update_all_courses(self, courses):
         """Update all courses with latest content and strategies"""
-        updated_courses = []
-        
-        for course in courses:
-            updated_course = self.update_course_content(course)
-            updated_courses.append(updated_course)
-        
-        return updated_courses
+        # Courses whose update failed are left out rather than aborting the batch
+        return self.update_courses_batch(courses).updated
     
+    @traced("content_updater", target_type="course")
     def update_course_content(self, course):
-        """Update individual course content"""
-        # Simulate AI-powered content updates
-        course["last_updated"] = datetime.now().strftime("%Y-%m-%d")
-        course["next_update"] = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
-        
-        # Increment version
-        version_parts = course.get("content_version", "1.0.0").split(".")
-        version_parts[1] = str(int(version_parts[1]) + 1)  # Increment minor version
-        course["content_version"] = ".".join(version_parts)
-        
-        # Add new features based on market analysis
-        new_features = self.generate_new_features(course["level"])
-        course["features"].extend(new_features[:2])  # Add 2 new features
-        
-        return course
+        """Return an updated copy of a course; the input is left untouched"""
+        updated = dict(course)
+        updated["last_updated"] = datetime.now().strftime("%Y-%m-%d")
+        updated["next_update"] = (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+        updated["content_version"] = bump_version(course.get("content_version", "1.0.0"), "minor")
+        
+        # Add new features based on market analysis; duplicates are ignored and the list is capped
+        features = FeatureSet.from_course(course, *feature_limits(self.feature_config, course["level"]),
+                                          market_prefixes=MARKET_FEATURE_PREFIXES)
+        for feature in self.generate_new_features(course["level"])[:2]:
+            features.add(feature)
+        
+        return features.apply_to(updated)
     
     def generate_new_features(self, level):
         """Generate new features based on latest market trends"""
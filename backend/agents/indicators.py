@@ -0,0 +1,311 @@
+import math
+import threading
+from collections import deque
+from typing import Dict, Optional
+
+import numpy as np
+
+from .backtesting import PriceSeries, rolling_mean, rolling_std
+
+# Largest d^-k used by ema() within one block, in powers of ten
+EMA_BLOCK_DECADES = 16
+
+# ----------------------------------------------------------------------
+# Batch forms: whole-array NumPy versions, NaN until the window is full
+# ----------------------------------------------------------------------
+def sma(values: np.ndarray, window: int) -> np.ndarray:
+    return rolling_mean(np.asarray(values, dtype=np.float64), window)
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Exponential moving average seeded with the first value (alpha = 2 / (span + 1)).
+
+    Uses the closed form y[i] = d^(i+1) * (y[-1] + alpha * sum(x[j] / d^(j+1))),
+    d = 1 - alpha, evaluated with cumsum over blocks short enough that the
+    powers of d stay within float range; each block starts from the last
+    value of the one before.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if not len(values):
+        return values.copy()
+    alpha = 2.0 / (span + 1)
+    decay = 1.0 - alpha
+    if decay <= 0.0:
+        return values.copy()
+
+    block = max(1, int(EMA_BLOCK_DECADES / -math.log10(decay)))
+    powers = decay ** np.arange(1, min(block, len(values)) + 1)
+    out = np.empty_like(values)
+    previous = values[0]
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        scale = powers[:len(chunk)]
+        out[start:start + len(chunk)] = scale * (previous + alpha * np.cumsum(chunk / scale))
+        previous = out[start + len(chunk) - 1]
+    return out
+
+
+def log_returns(close: np.ndarray) -> np.ndarray:
+    out = np.full(len(close), np.nan)
+    out[1:] = np.diff(np.log(close))
+    return out
+
+
+def realized_volatility(close: np.ndarray, window: int, periods_per_year: float = 252.0) -> np.ndarray:
+    """Annualized rolling standard deviation of log returns, in percent"""
+    returns = log_returns(np.asarray(close, dtype=np.float64))
+    out = np.full(len(returns), np.nan)
+    out[1:] = rolling_std(returns[1:], window) * math.sqrt(periods_per_year) * 100
+    return out
+
+
+def trend_slope(close: np.ndarray, fast_span: int, slow_span: int) -> np.ndarray:
+    """Relative gap between a fast and a slow EMA; positive in an uptrend"""
+    slow = ema(close, slow_span)
+    return (ema(close, fast_span) - slow) / slow
+
+
+def volume_ratio(volume: np.ndarray, short_window: int, long_window: int) -> np.ndarray:
+    """Recent average volume relative to the longer-run average"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return sma(volume, short_window) / sma(volume, long_window)
+
+
+def period_return(close: np.ndarray, window: int) -> np.ndarray:
+    """Percent change over the last window bars"""
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(len(close), np.nan)
+    out[window:] = (close[window:] / close[:-window] - 1) * 100
+    return out
+
+
+# ----------------------------------------------------------------------
+# Incremental forms: O(1) per update, same values as the batch forms
+# ----------------------------------------------------------------------
+class RollingMean:
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque()
+        self._sum = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self._values.append(value)
+        self._sum += value
+        if len(self._values) > self.window:
+            self._sum -= self._values.popleft()
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        return self._sum / self.window if len(self._values) == self.window else None
+
+
+class RollingStd:
+    """Population standard deviation over a window, via running sum and sum of squares"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self._values = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    def update(self, value: float) -> Optional[float]:
+        self._values.append(value)
+        self._sum += value
+        self._sum_sq += value * value
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._values) < self.window:
+            return None
+        mean = self._sum / self.window
+        return math.sqrt(max(self._sum_sq / self.window - mean * mean, 0.0))
+
+
+class EMA:
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1)
+        self.value: Optional[float] = None
+
+    def update(self, value: float) -> float:
+        self.value = value if self.value is None else self.value + self.alpha * (value - self.value)
+        return self.value
+
+
+class RealizedVolatility:
+    def __init__(self, window: int, periods_per_year: float = 252.0):
+        self.scale = math.sqrt(periods_per_year) * 100
+        self._std = RollingStd(window)
+        self._previous: Optional[float] = None
+
+    def update(self, close: float) -> Optional[float]:
+        if self._previous is not None:
+            self._std.update(math.log(close / self._previous))
+        self._previous = close
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        std = self._std.value
+        return None if std is None else std * self.scale
+
+
+class TrendSlope:
+    def __init__(self, fast_span: int, slow_span: int):
+        self._fast = EMA(fast_span)
+        self._slow = EMA(slow_span)
+
+    def update(self, close: float) -> float:
+        self._fast.update(close)
+        self._slow.update(close)
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if self._slow.value is None:
+            return None
+        return (self._fast.value - self._slow.value) / self._slow.value
+
+
+class VolumeRatio:
+    def __init__(self, short_window: int, long_window: int):
+        self._short = RollingMean(short_window)
+        self._long = RollingMean(long_window)
+
+    def update(self, volume: float) -> Optional[float]:
+        self._short.update(volume)
+        self._long.update(volume)
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        short, long = self._short.value, self._long.value
+        if short is None or not long:
+            return None
+        return short / long
+
+
+class PeriodReturn:
+    def __init__(self, window: int):
+        self.window = window
+        self._closes = deque(maxlen=window + 1)
+
+    def update(self, close: float) -> Optional[float]:
+        self._closes.append(close)
+        return self.value
+
+    @property
+    def value(self) -> Optional[float]:
+        if len(self._closes) <= self.window:
+            return None
+        return (self._closes[-1] / self._closes[0] - 1) * 100
+
+
+# ----------------------------------------------------------------------
+# Live market state
+# ----------------------------------------------------------------------
+DEFAULT_INDICATOR_CONFIG = {
+    "volatility_window": 20,
+    "fast_span": 12,
+    "slow_span": 26,
+    "volume_short_window": 5,
+    "volume_long_window": 20,
+    "return_window": 20,
+    "trend_threshold": 0.002,
+    "periods_per_year": 252.0
+}
+
+
+class SymbolIndicators:
+    """Every indicator for one symbol, advanced one bar at a time"""
+
+    def __init__(self, config: Dict):
+        self.volatility = RealizedVolatility(config["volatility_window"], config["periods_per_year"])
+        self.trend = TrendSlope(config["fast_span"], config["slow_span"])
+        self.volume = VolumeRatio(config["volume_short_window"], config["volume_long_window"])
+        self.returns = PeriodReturn(config["return_window"])
+        self.bars = 0
+        self.last_close: Optional[float] = None
+
+    def update(self, close: float, volume: float):
+        self.volatility.update(close)
+        self.trend.update(close)
+        self.volume.update(volume)
+        self.returns.update(close)
+        self.bars += 1
+        self.last_close = close
+
+
+class MarketState:
+    """Incrementally maintained indicators for the market and each sector.
+
+    on_bar() costs O(1) per bar, and snapshot() only reads the current
+    indicator values, so producing an analysis never rescans history.
+    """
+
+    MARKET = "market"
+
+    def __init__(self, config: Dict = None):
+        self.config = {**DEFAULT_INDICATOR_CONFIG, **(config or {})}
+        self._symbols: Dict[str, SymbolIndicators] = {}
+        self._lock = threading.Lock()
+
+    def on_bar(self, symbol: str, close: float, volume: float = 0.0):
+        with self._lock:
+            indicators = self._symbols.get(symbol)
+            if indicators is None:
+                indicators = self._symbols[symbol] = SymbolIndicators(self.config)
+            indicators.update(float(close), float(volume))
+
+    def history_needed(self) -> int:
+        """Bars the longest window needs; older bars no longer change any indicator"""
+        c = self.config
+        return max(c["volatility_window"] + 1, c["volume_long_window"], c["return_window"] + 1, c["slow_span"] * 4)
+
+    def warm_up(self, symbol: str, prices: PriceSeries):
+        """Seed a symbol from history; only the bars the longest window needs are replayed"""
+        needed = self.history_needed()
+        for close, volume in zip(prices.close[-needed:], prices.volume[-needed:]):
+            self.on_bar(symbol, close, volume)
+
+    def reset(self, symbol: str):
+        """Forget a symbol's indicators, e.g. before re-seeding it from replaced history"""
+        with self._lock:
+            self._symbols.pop(symbol, None)
+
+    def snapshot(self) -> Dict:
+        """Current indicator readings; None where a window is not yet full"""
+        with self._lock:
+            market = self._symbols.get(self.MARKET)
+            sectors = {
+                name: _rounded(indicators.returns.value)
+                for name, indicators in self._symbols.items() if name != self.MARKET
+            }
+            if market is None:
+                return {"volatility_index": None, "trend_direction": "sideways", "trend_slope": None,
+                        "trading_volume": None, "sector_performance": sectors, "bars": 0}
+
+            slope = market.trend.value
+            threshold = self.config["trend_threshold"]
+            if slope is None or abs(slope) < threshold:
+                direction = "sideways"
+            else:
+                direction = "bullish" if slope > 0 else "bearish"
+
+            return {
+                "volatility_index": _rounded(market.volatility.value),
+                "trend_direction": direction,
+                "trend_slope": _rounded(slope, 5),
+                "trading_volume": _rounded(market.volume.value),
+                "sector_performance": sectors,
+                "bars": market.bars
+            }
+
+
+def _rounded(value: Optional[float], digits: int = 2) -> Optional[float]:
+    return None if value is None else round(value, digits)
@@ -1,14 +1,20 @@
 # AI Agents Package
-from .course_generator import CourseGenerator
-from .content_updater import ContentUpdater
+from .course_generator import CourseGenerator, ContentUpdater
 from .payment_processor import PaymentProcessor
 from .market_analyzer import MarketAnalyzer
 from .strategy_optimizer import StrategyOptimizer
+from .backtesting import BacktestEngine, PriceSeries
+from .indicators import MarketState
+from .market_data import MarketDataStore
 
 __all__ = [
     'CourseGenerator',
     'ContentUpdater', 
     'PaymentProcessor',
     'MarketAnalyzer',
-    'StrategyOptimizer'
+    'StrategyOptimizer',
+    'BacktestEngine',
+    'PriceSeries',
+    'MarketState',
+    'MarketDataStore'
 ]
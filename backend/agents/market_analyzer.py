@@ -1,38 +1,204 @@
 import json
 import random
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
-from typing import Dict, List
+from typing import Callable, Dict, List, Optional
+
+from models.feature_set import FeatureSet, feature_limits
+from services.tracing import traced
+from .backtesting import PriceSeries
+from .indicators import MarketState
+
+# Feature templates this agent writes; used to recognise market features on older courses
+MARKET_FEATURE_PREFIXES = ("Live analysis of ", "Strategies for ", "Real-time market examples")
+
+class MarketSnapshotCache:
+    """Market analysis snapshot shared by every course and request, refreshed after a TTL.
+
+    Recomputation is single-flight: when the snapshot expires, the first
+    caller computes a new one while concurrent callers wait for its result
+    instead of all running the analysis at once.
+    """
+    
+    def __init__(self, ttl_seconds: float, clock: Callable[[], float] = time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._snapshot = None
+        self._expires_at = 0.0
+        self._inflight: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+        self.computations = 0
+    
+    def get(self, compute: Callable[[], Dict]) -> Dict:
+        """Return the cached snapshot, computing it once if missing or expired"""
+        while True:
+            with self._lock:
+                if self._snapshot is not None and self.clock() < self._expires_at:
+                    return self._snapshot
+                
+                inflight = self._inflight
+                if inflight is None:
+                    inflight = self._inflight = threading.Event()
+                    leader = True
+                else:
+                    leader = False
+            
+            if not leader:
+                # Another caller is computing; wait and re-check (it may have failed)
+                inflight.wait()
+                continue
+            
+            try:
+                snapshot = compute()
+            except Exception:
+                with self._lock:
+                    self._inflight = None
+                inflight.set()
+                raise
+            
+            with self._lock:
+                self._snapshot = snapshot
+                self._expires_at = self.clock() + self.ttl_seconds
+                self.computations += 1
+                self._inflight = None
+            inflight.set()
+            return snapshot
+    
+    def peek(self) -> Optional[Dict]:
+        """Current snapshot, even if expired, without triggering a refresh"""
+        return self._snapshot
+    
+    def invalidate(self):
+        """Force the next get() to recompute"""
+        with self._lock:
+            self._expires_at = 0.0
 
 class MarketAnalyzer:
-    def __init__(self):
+    COURSE_LEVELS = ["Beginner", "Intermediate", "Advanced"]
+    
+    def __init__(self, update_interval_hours: float = 4, snapshot_cache: MarketSnapshotCache = None,
+                 analysis_store=None, market_state: MarketState = None, feature_config: Dict = None):
         self.version = "3.2.1"
         self.last_analysis = None
         self.market_data = {}
+        self.snapshot_cache = snapshot_cache or MarketSnapshotCache(update_interval_hours * 3600)
+        self.analysis_store = analysis_store
+        self.market_state = market_state or MarketState()
+        self.feature_config = feature_config or {}
+        # MarketDataStore symbols followed by sync_with_store()
+        self._store = None
+        self._followed: Dict[str, Dict] = {}
+        self._follow_lock = threading.Lock()
+    
+    def on_bar(self, symbol: str, close: float, volume: float = 0.0):
+        """Feed one new bar for the market (symbol "market") or a sector"""
+        self.market_state.on_bar(symbol, close, volume)
+    
+    @traced("market_analyzer")
+    def load_price_history(self, market: PriceSeries = None, sectors: Dict[str, PriceSeries] = None):
+        """Warm the live indicators from historical bars"""
+        if market is not None:
+            self.market_state.warm_up(MarketState.MARKET, market)
+        for sector, prices in (sectors or {}).items():
+            self.market_state.warm_up(sector, prices)
+    
+    @traced("market_analyzer")
+    def load_from_store(self, store, market_symbol: str, sector_symbols: Dict[str, str] = None, end=None):
+        """Warm the live indicators from a MarketDataStore, reading mapped slices only"""
+        def read(symbol):
+            return store.load(symbol, end=end) if symbol in store else None
+        
+        sectors = {sector: read(symbol) for sector, symbol in (sector_symbols or {}).items()}
+        self.load_price_history(read(market_symbol), {k: v for k, v in sectors.items() if v is not None})
+    
+    def follow_store(self, store, market_symbol: str, sector_symbols: Dict[str, str] = None):
+        """Warm from a MarketDataStore, then keep up with bars any process appends to it.
         
+        sync_with_store() (run before every analysis) compares each symbol's
+        bar count in the shared index with the count already consumed and
+        replays only the new tail, so every worker converges on the same
+        indicators without receiving the append itself.
+        """
+        names = {market_symbol: MarketState.MARKET}
+        names.update({symbol: sector for sector, symbol in (sector_symbols or {}).items()})
+        with self._follow_lock:
+            self._store = store
+            self._followed = {symbol: {"name": name, "bars": 0, "start": None} for symbol, name in names.items()}
+        self.sync_with_store()
+    
+    def sync_with_store(self) -> int:
+        """Feed bars appended to the followed store since the last sync; returns how many"""
+        fed = 0
+        with self._follow_lock:
+            for symbol, seen in self._followed.items():
+                info = self._store.info(symbol)
+                if info is None or (info["bars"] == seen["bars"] and info["start"] == seen["start"]):
+                    continue
+                new_bars = info["bars"] - seen["bars"]
+                needed = self.market_state.history_needed()
+                if info["start"] != seen["start"] or not 0 < new_bars <= needed:
+                    # New or replaced series, or more new bars than any window spans: re-seed
+                    prices = self._store.tail(symbol, needed)
+                    self.market_state.reset(seen["name"])
+                    self.market_state.warm_up(seen["name"], prices)
+                else:
+                    prices = self._store.tail(symbol, new_bars)
+                    for close, volume in zip(prices.close, prices.volume):
+                        self.on_bar(seen["name"], close, volume)
+                fed += len(prices)
+                seen.update(bars=info["bars"], start=info["start"])
+        return fed
+        
+    @traced("market_analyzer")
     def analyze_market_conditions(self) -> Dict:
         """Analyze current market conditions for course updates"""
         print("🔍 MarketAnalyzer analyzing current market conditions...")
         
-        # Simulate market analysis
+        if self._store is not None:
+            self.sync_with_store()
+        indicators = self.market_state.snapshot()
         market_conditions = {
+            "snapshot_id": uuid.uuid4().hex,
             "timestamp": datetime.now().isoformat(),
-            "volatility_index": random.uniform(15, 45),
-            "trend_direction": random.choice(["bullish", "bearish", "sideways"]),
-            "sector_performance": {
-                "technology": random.uniform(-2, 5),
-                "finance": random.uniform(-1, 3),
-                "energy": random.uniform(-3, 8)
-            },
-            "trading_volume": random.uniform(0.8, 1.5),
-            "market_sentiment": random.choice(["positive", "neutral", "negative"]),
-            "key_events": self._get_recent_market_events()
+            "volatility_index": indicators["volatility_index"],
+            "trend_direction": indicators["trend_direction"],
+            "trend_slope": indicators["trend_slope"],
+            "sector_performance": indicators["sector_performance"],
+            "trading_volume": indicators["trading_volume"],
+            "market_sentiment": self._derive_sentiment(indicators),
+            "key_events": self._get_recent_market_events(),
+            "bars_analyzed": indicators["bars"]
         }
         
         self.last_analysis = market_conditions
         self.market_data = market_conditions
         
+        # Persist the snapshot with per-level insights so courses can reference it by id
+        if self.analysis_store is not None:
+            insights = {level: self.generate_trading_insights(level) for level in self.COURSE_LEVELS}
+            self.analysis_store.record(market_conditions, insights)
+        
         return market_conditions
     
+    def _derive_sentiment(self, indicators: Dict) -> str:
+        """Positive when the trend is up on at least average volume, negative in a downtrend"""
+        if indicators["trend_direction"] == "bearish":
+            return "negative"
+        if indicators["trend_direction"] == "bullish" and (indicators["trading_volume"] or 0) >= 1.0:
+            return "positive"
+        return "neutral"
+    
+    @traced("market_analyzer")
+    def get_market_snapshot(self) -> Dict:
+        """Latest market analysis, recomputed at most once per update interval"""
+        return self.snapshot_cache.get(self.analyze_market_conditions)
+    
+    def invalidate_market_snapshot(self):
+        """Discard the cached analysis, e.g. after a major market event"""
+        self.snapshot_cache.invalidate()
+    
     def _get_recent_market_events(self) -> List[str]:
         """Get recent market events that might affect trading strategies"""
         events = [
@@ -45,6 +211,7 @@ class MarketAnalyzer:
         ]
         return random.sample(events, 3)
     
+    @traced("market_analyzer")
     def generate_trading_insights(self, course_level: str) -> Dict:
         """Generate trading insights specific to course level"""
         base_insights = {
@@ -91,9 +258,10 @@ class MarketAnalyzer:
         ]
         return random.sample(warnings, 2)
     
+    @traced("market_analyzer", target_type="course")
     def update_course_with_market_analysis(self, course: Dict) -> Dict:
         """Update course content with latest market analysis"""
-        analysis = self.analyze_market_conditions()
+        analysis = self.get_market_snapshot()
         insights = self.generate_trading_insights(course["level"])
         
         # Add market context to course
@@ -101,19 +269,27 @@ class MarketAnalyzer:
             course["market_context"] = {}
         
         course["market_context"].update({
+            "snapshot_id": analysis["snapshot_id"],
             "last_analysis": analysis["timestamp"],
             "current_volatility": analysis["volatility_index"],
-            "trading_insights": insights,
             "recommended_approaches": insights["recommended_strategies"]
         })
         
+        if self.analysis_store is not None:
+            # Full insights live with the persisted snapshot; keep only the reference
+            course["market_context"].pop("trading_insights", None)
+        else:
+            course["market_context"]["trading_insights"] = insights
+        
         # Update course features with market-relevant content
-        market_features = [
-            f"Live analysis of {analysis['trend_direction']} market conditions",
-            f"Strategies for {analysis['volatility_index']:.1f} volatility environment",
-            "Real-time market examples and case studies"
-        ]
+        market_features = [f"Live analysis of {analysis['trend_direction']} market conditions"]
+        if analysis["volatility_index"] is not None:
+            market_features.append(f"Strategies for {analysis['volatility_index']:.1f} volatility environment")
+        market_features.append("Real-time market examples and case studies")
         
-        course["features"] = list(set(course["features"] + market_features))
+        features = FeatureSet.from_course(course, *feature_limits(self.feature_config, course["level"]),
+                                          market_prefixes=MARKET_FEATURE_PREFIXES)
+        features.replace_market_features(market_features)
+        features.apply_to(course)
         
         return course
@@ -0,0 +1,214 @@
+import fcntl
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+from .backtesting import OHLCV_COLUMNS, PriceSeries
+
+INDEX_FILE = "index.json"
+LOCK_FILE = ".lock"
+TIMESTAMP_COLUMN = "timestamp"
+COLUMN_DTYPES = {TIMESTAMP_COLUMN: np.dtype("<i8"), **{name: np.dtype("<f8") for name in OHLCV_COLUMNS}}
+
+TimeBound = Union[datetime, str, np.datetime64]
+
+
+def _seconds(value: TimeBound) -> int:
+    return int(np.datetime64(value, "s").astype(np.int64))
+
+
+class MarketDataStore:
+    """Per-symbol OHLCV series stored column by column and read through np.memmap.
+
+    Each symbol is a directory holding one raw little-endian file per column
+    (int64 epoch seconds for timestamps, float64 for prices and volume), and
+    index.json maps every symbol to its bar count and time range. Reads
+    return PriceSeries whose arrays are views into the mapped files, so a
+    date-range slice costs a binary search rather than a copy. append()
+    writes new bars to the end of each column file and then bumps the bar
+    count in the index; readers only ever look at the first `bars` entries,
+    so a half-finished append is invisible and is truncated on the next one.
+    Writers in every process serialize on an flock over the store's lock
+    file and re-read the index under it, since index.json covers all
+    symbols. Timestamps must be strictly increasing within a symbol.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._maps: Dict[str, tuple] = {}
+        self._index_mtime = None
+        os.makedirs(root, exist_ok=True)
+        self._index = {}
+        self._refresh_index()
+
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive across threads and processes; the index is re-read once held"""
+        with self._lock:
+            with open(os.path.join(self.root, LOCK_FILE), "a") as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    self._index_mtime = None
+                    self._refresh_index()
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+    def _refresh_index(self):
+        """Re-read index.json if another process has appended since we last looked"""
+        path = os.path.join(self.root, INDEX_FILE)
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            return
+        if mtime != self._index_mtime:
+            with open(path, encoding="utf-8") as f:
+                self._index = json.load(f)
+            self._index_mtime = mtime
+
+    def _write_index(self):
+        path = os.path.join(self.root, INDEX_FILE)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        self._index_mtime = os.stat(path).st_mtime_ns
+
+    def symbols(self) -> List[str]:
+        self._refresh_index()
+        return sorted(self._index)
+
+    def info(self, symbol: str) -> Optional[Dict]:
+        """Bar count and time range for a symbol"""
+        self._refresh_index()
+        entry = self._index.get(symbol)
+        return dict(entry) if entry else None
+
+    def __contains__(self, symbol: str) -> bool:
+        return self.info(symbol) is not None
+
+    def _column_path(self, symbol: str, column: str) -> str:
+        return os.path.join(self.root, symbol, f"{column}.bin")
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def write(self, symbol: str, prices: PriceSeries):
+        """Replace a symbol's series"""
+        columns = self._columns(prices)
+        with self._write_lock():
+            self._replace(symbol, prices, columns)
+
+    def _replace(self, symbol: str, prices: PriceSeries, columns: Dict[str, np.ndarray]):
+        os.makedirs(os.path.join(self.root, symbol), exist_ok=True)
+        for column, values in columns.items():
+            with open(self._column_path(symbol, column), "wb") as f:
+                values.tofile(f)
+        self._index[symbol] = self._entry(prices, len(prices), None)
+        self._write_index()
+        self._maps.pop(symbol, None)
+
+    def append(self, symbol: str, prices: PriceSeries) -> int:
+        """Add bars after the symbol's last timestamp without rewriting existing data"""
+        if not len(prices):
+            return 0
+        columns = self._columns(prices)
+
+        with self._write_lock():
+            entry = self._index.get(symbol)
+            if entry is None:
+                self._replace(symbol, prices, columns)
+                return len(prices)
+            if _seconds(prices.timestamps[0]) <= _seconds(entry["end"]):
+                raise ValueError(f"Bars for {symbol} must start after {entry['end']}")
+
+            for column, values in columns.items():
+                path = self._column_path(symbol, column)
+                with open(path, "r+b") as f:
+                    # Drop anything a previous interrupted append left past the indexed end
+                    f.truncate(entry["bars"] * values.itemsize)
+                    f.seek(0, os.SEEK_END)
+                    values.tofile(f)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            self._index[symbol] = self._entry(prices, entry["bars"] + len(prices), entry["start"])
+            self._write_index()
+        return len(prices)
+
+    def import_file(self, symbol: str, path: str):
+        """Load a CSV or Parquet price file into the store"""
+        self.write(symbol, PriceSeries.load(path, symbol))
+
+    @staticmethod
+    def _columns(prices: PriceSeries) -> Dict[str, np.ndarray]:
+        """Column arrays to write; raises ValueError unless timestamps strictly increase"""
+        timestamps = np.asarray(prices.timestamps, dtype="datetime64[s]")
+        if not np.all(np.diff(timestamps.astype(np.int64)) > 0):
+            raise ValueError(f"Bars for {prices.symbol or 'symbol'} must have strictly increasing timestamps")
+        columns = {TIMESTAMP_COLUMN: timestamps.astype(COLUMN_DTYPES[TIMESTAMP_COLUMN])}
+        for name in OHLCV_COLUMNS:
+            columns[name] = np.ascontiguousarray(getattr(prices, name), dtype=COLUMN_DTYPES[name])
+        return columns
+
+    @staticmethod
+    def _entry(prices: PriceSeries, bars: int, start: Optional[str]) -> Dict:
+        return {
+            "bars": bars,
+            "start": start or str(np.datetime64(prices.timestamps[0], "s")),
+            "end": str(np.datetime64(prices.timestamps[-1], "s"))
+        }
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def _mapped(self, symbol: str) -> Dict[str, np.ndarray]:
+        """Memory maps over the indexed bars, reopened only when the bar count changes"""
+        entry = self.info(symbol)
+        if entry is None:
+            raise KeyError(f"No market data for {symbol}")
+
+        with self._lock:
+            cached = self._maps.get(symbol)
+            if cached is not None and cached[0] == entry["bars"]:
+                return cached[1]
+            maps = {
+                column: np.memmap(self._column_path(symbol, column), dtype=dtype, mode="r", shape=(entry["bars"],))
+                for column, dtype in COLUMN_DTYPES.items()
+            }
+            self._maps[symbol] = (entry["bars"], maps)
+            return maps
+
+    def load(self, symbol: str, start: TimeBound = None, end: TimeBound = None) -> PriceSeries:
+        """Bars with start <= timestamp < end as zero-copy views over the mapped columns"""
+        maps = self._mapped(symbol)
+        timestamps = maps[TIMESTAMP_COLUMN]
+        lo = int(np.searchsorted(timestamps, _seconds(start), side="left")) if start is not None else 0
+        hi = int(np.searchsorted(timestamps, _seconds(end), side="left")) if end is not None else len(timestamps)
+
+        return PriceSeries(
+            timestamps[lo:hi].view("datetime64[s]"),
+            *(maps[name][lo:hi] for name in OHLCV_COLUMNS),
+            symbol=symbol
+        )
+
+    def tail(self, symbol: str, bars: int) -> PriceSeries:
+        """The most recent bars of a symbol, also zero-copy"""
+        maps = self._mapped(symbol)
+        lo = max(len(maps[TIMESTAMP_COLUMN]) - bars, 0)
+        return PriceSeries(
+            maps[TIMESTAMP_COLUMN][lo:].view("datetime64[s]"),
+            *(maps[name][lo:] for name in OHLCV_COLUMNS),
+            symbol=symbol
+        )
@@ -1,23 +1,80 @@
+import hashlib
+import json
 import uuid
-from datetime import datetime
+from urllib.parse import parse_qsl
+from models.order import Order, OrderItem, Payment
+from services.webhooks import (
+    WebhookSignatureError, parse_payfast_notification, parse_stripe_event, verify_payfast_signature,
+    verify_stripe_signature
+)
 
 class PaymentProcessor:
-    def __init__(self):
-        self.stripe_key = "sk_test_your_stripe_key"
-        self.payfast_merchant_id = "your_merchant_id"
-        self.payfast_merchant_key = "your_merchant_key"
+    def __init__(self, order_store=None, payment_config=None, stripe_tolerance_seconds=300):
+        payment_config = payment_config or {}
+        stripe_config = payment_config.get("stripe", {})
+        payfast_config = payment_config.get("payfast", {})
+        self.stripe_key = stripe_config.get("secret_key", "sk_test_your_stripe_key")
+        self.stripe_webhook_secret = stripe_config.get("webhook_secret")
+        self.stripe_tolerance_seconds = stripe_tolerance_seconds
+        self.payfast_merchant_id = payfast_config.get("merchant_id", "your_merchant_id")
+        self.payfast_merchant_key = payfast_config.get("merchant_key", "your_merchant_key")
+        self.payfast_passphrase = payfast_config.get("passphrase")
+        self.order_store = order_store
     
-    def create_payment_session(self, cart_items, total_amount, payment_method, user_email):
-        """Create payment session for Stripe or PayFast"""
+    @staticmethod
+    def request_fingerprint(cart_items, total_amount, payment_method, user_email):
+        """Hash of what a checkout request buys: buyer, method, priced cart and total"""
+        fingerprint = json.dumps([
+            (user_email or "").strip().lower(),
+            payment_method,
+            sorted((item["id"], str(item["price"])) for item in cart_items),
+            str(total_amount)
+        ])
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+    
+    @staticmethod
+    def checkout_key(fingerprint):
+        """Idempotency key for clients that retry without sending one: the same request"""
+        return "cart-" + fingerprint
+    
+    def create_payment_session(self, cart_items, total_amount, payment_method, user_email, idempotency_key=None):
+        """Create payment session for Stripe or PayFast.
+        
+        cart_items must already be priced server-side (see PriceIndex.quote);
+        total_amount may be a Decimal. With an order store the session is persisted; a retry carrying the
+        same idempotency key gets the stored session back instead of a new order, and
+        reusing a key for a different request raises IdempotencyConflict.
+        """
+        if payment_method not in ("stripe", "payfast"):
+            raise ValueError("Unsupported payment method")
+        
+        if self.order_store is not None:
+            if not user_email:
+                raise ValueError("Email is required")
+            fingerprint = self.request_fingerprint(cart_items, total_amount, payment_method, user_email)
+            idempotency_key = idempotency_key or self.checkout_key(fingerprint)
+            existing = self.order_store.find_session(idempotency_key, fingerprint)
+            if existing is not None:
+                return existing
         
         payment_id = str(uuid.uuid4())
         
         if payment_method == "stripe":
-            return self.create_stripe_session(cart_items, total_amount, payment_id, user_email)
-        elif payment_method == "payfast":
-            return self.create_payfast_session(cart_items, total_amount, payment_id, user_email)
+            session = self.create_stripe_session(cart_items, total_amount, payment_id, user_email)
         else:
-            raise ValueError("Unsupported payment method")
+            session = self.create_payfast_session(cart_items, total_amount, payment_id, user_email)
+        
+        if self.order_store is None:
+            return session
+        
+        order = Order(order_id=f"ORD-{uuid.uuid4().hex[:16].upper()}", user_id=0, total_amount=float(total_amount))
+        for item in cart_items:
+            order.add_item(OrderItem(item["id"], item["title"], item["price"]))
+        order.set_payment_info(payment_method, payment_id)
+        session["order_id"] = order.order_id
+        
+        payment = Payment(payment_id, order.order_id, order.total_amount, order.currency, payment_method)
+        return self.order_store.create_session(idempotency_key, user_email, order, payment, session, fingerprint)
     
     def create_stripe_session(self, cart_items, total_amount, payment_id, user_email):
         """Create Stripe payment session"""
@@ -25,7 +82,8 @@ class PaymentProcessor:
         return {
             "payment_id": payment_id,
             "payment_method": "stripe",
-            "amount": total_amount,
+            "client_reference_id": payment_id,  # echoed back in Stripe webhooks
+            "amount": float(total_amount),
             "currency": "zar",
             "checkout_url": f"/stripe-checkout/{payment_id}",
             "user_email": user_email,
@@ -44,7 +102,7 @@ class PaymentProcessor:
         return {
             "payment_id": payment_id,
             "payment_method": "payfast",
-            "amount": total_amount,
+            "amount": float(total_amount),
             "currency": "zar",
             "checkout_url": f"/payfast-checkout/{payment_id}",
             "user_email": user_email,
@@ -59,21 +117,37 @@ class PaymentProcessor:
         }
     
     def handle_successful_payment(self, payment_id):
-        """Process successful payment and grant course access"""
-        # In real implementation, this would:
-        # 1. Verify payment with payment provider
-        # 2. Grant user access to purchased courses
-        # 3. Send confirmation email
-        # 4. Update user records
+        """Report whether a payment has been confirmed and which courses it granted.
+        
+        Payments are only completed by verified provider webhooks (see
+        parse_webhook); the client redirect after checkout just reads the result.
+        """
+        result = self.order_store.get_payment(payment_id) if self.order_store is not None else None
+        if result is None:
+            raise ValueError("Payment not found")
         
         return {
-            "success": True,
+            "success": result["status"] == "completed",
+            "status": result["status"],
             "payment_id": payment_id,
-            "courses_granted": ["AI Trading Fundamentals", "Intermediate AI Trading Strategies"],
-            "access_expires": (datetime.now() + timedelta(days=365)).isoformat()
+            "order_id": result["order_id"],
+            "courses_granted": [course["title"] for course in result["courses"]] if result["status"] == "completed" else [],
+            "access_expires": result["access_expires"]
         }
     
-    def validate_payment(self, payment_id, provider):
-        """Validate payment with provider"""
-        # This would make API calls to Stripe/PayFast to verify payment
-        return True  # Simulated success
+    def parse_webhook(self, provider, body, headers):
+        """Verify a provider webhook and return its queue entry (None if the event needs no action).
+        
+        Raises WebhookSignatureError for an unsigned or forged request.
+        """
+        if provider == "stripe":
+            verify_stripe_signature(body, headers.get("Stripe-Signature"), self.stripe_webhook_secret,
+                                    self.stripe_tolerance_seconds)
+            return parse_stripe_event(body)
+        if provider == "payfast":
+            fields = parse_qsl(body.decode("utf-8"), keep_blank_values=True)
+            verify_payfast_signature(fields, self.payfast_passphrase)
+            if dict(fields).get("merchant_id", self.payfast_merchant_id) != self.payfast_merchant_id:
+                raise WebhookSignatureError("PayFast notification is for another merchant")
+            return parse_payfast_notification(fields)
+        raise ValueError("Unsupported payment provider")
@@ -1,18 +1,179 @@
+import os
 import random
+import threading
+import time
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Optional
+
+from .backtesting import BacktestEngine, PriceSeries, resolve_strategy
+from database.optimization_history import OptimizationHistory
+from services.tracing import traced
+from .strategy_sweep import ParameterSweep, risk_space, sweep_pool
+
+SEARCH_MODES = ("none", "grid", "random")
 
 class StrategyOptimizer:
-    def __init__(self):
+    def __init__(self, price_data_path: str = None, cost_bps: float = 1.0, search_config: Dict = None,
+                 market_data=None, symbol: str = None, backtest_start: str = None, backtest_end: str = None,
+                 history: OptimizationHistory = None):
         self.version = "2.5.3"
-        self.optimization_history = []
+        # Bounded in memory; persisted to the optimization_history table when given a pool
+        self.optimization_history = history if history is not None else OptimizationHistory()
+        self.price_data_path = price_data_path
+        self.cost_bps = cost_bps
+        self._backtest_engine = None
+        # Memory-mapped MarketDataStore; preferred over price_data_path when it holds the symbol
+        self.market_data = market_data
+        self.symbol = symbol
+        self.backtest_start = backtest_start
+        self.backtest_end = backtest_end
+        self._engine_bars = None
+        
+        search_config = search_config or {}
+        self.search_mode = search_config.get("mode", "none")
+        if self.search_mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {self.search_mode}")
+        self.search_config = search_config
+        # Best parameters per (strategy, level), reused until they go stale; job
+        # workers share the optimizer, so the cache and engine are guarded by _lock
+        self._sweep_results: Dict[tuple, tuple] = {}
+        self._lock = threading.Lock()
+        # One process pool for every sweep, started on first use and kept until close()
+        self._sweep_pool = None
+        
+    def get_backtest_engine(self) -> Optional[BacktestEngine]:
+        """Backtest engine over the configured price data, reused until new bars arrive"""
+        with self._lock:
+            if self.market_data is not None and self.symbol in self.market_data:
+                bars = self.market_data.info(self.symbol)["bars"]
+                if self._backtest_engine is None or bars != self._engine_bars:
+                    prices = self.market_data.load(self.symbol, self.backtest_start, self.backtest_end)
+                    self._backtest_engine = BacktestEngine(prices, cost_bps=self.cost_bps)
+                    self._engine_bars = bars
+                    self._sweep_results.clear()
+                return self._backtest_engine
+            
+            if self._backtest_engine is None and self.price_data_path and os.path.exists(self.price_data_path):
+                prices = PriceSeries.load(self.price_data_path)
+                self._backtest_engine = BacktestEngine(prices, cost_bps=self.cost_bps)
+            return self._backtest_engine
+    
+    def _get_sweep_pool(self, workers: int):
+        with self._lock:
+            if self._sweep_pool is None and workers > 1:
+                self._sweep_pool = sweep_pool(workers)
+            return self._sweep_pool
+    
+    def worker_settings(self) -> Dict:
+        """Constructor arguments for a copy of this optimizer in an update-engine worker.
+
+        The copy reads the same market data store but keeps history in
+        memory, and sweeps in-process: the engine already runs one worker per core.
+        """
+        return {
+            "price_data_path": self.price_data_path,
+            "cost_bps": self.cost_bps,
+            "search_config": {**self.search_config, "workers": 1},
+            "market_data_root": self.market_data.root if self.market_data is not None else None,
+            "symbol": self.symbol,
+            "backtest_start": self.backtest_start,
+            "backtest_end": self.backtest_end
+        }
+    
+    def close(self):
+        """Shut down the sweep worker processes"""
+        with self._lock:
+            pool, self._sweep_pool = self._sweep_pool, None
+        if pool is not None:
+            pool.shutdown()
+    
+    @traced("strategy_optimizer", action="backtest")
+    def _backtest_strategies(self, strategies: List[Dict], level: str) -> List[Dict]:
+        """Set success rates from backtested win rates; None where there is no price data to test on"""
+        for strategy in strategies:
+            strategy["success_rate"] = None
+        engine = self.get_backtest_engine()
+        if engine is None:
+            return strategies
+        
+        risk = self._calculate_risk_adjustments(level)
+        for strategy in strategies:
+            key = resolve_strategy(strategy["name"])
+            if key is None:
+                continue
+            if self.search_mode == "none":
+                backtest = engine.run(key, position_size=risk["position_size"], stop_loss=risk["stop_loss"]).to_dict()
+            else:
+                sweep = self.sweep_strategy(key, level)
+                if sweep.best is None:
+                    continue
+                backtest = sweep.best
+                strategy["search"] = {k: v for k, v in sweep.to_dict().items() if k not in ("best", "leaderboard")}
+            strategy["success_rate"] = backtest["win_rate"]
+            strategy["backtest"] = backtest
+        
+        return strategies
+    
+    @traced("strategy_optimizer")
+    def sweep_strategy(self, key: str, level: str, mode: str = None):
+        """Search one engine strategy's parameters and the level's risk settings"""
+        mode = mode or self.search_mode
+        with self._lock:
+            cached = self._sweep_results.get((key, level, mode))
+        ttl = self.search_config.get("result_ttl_seconds", 3 * 24 * 3600)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1]
         
+        engine = self.get_backtest_engine()
+        space = risk_space(self._calculate_risk_adjustments(level))
+        if mode == "random":
+            candidates = ParameterSweep.random(key, self.search_config.get("iterations", 200), space)
+        else:
+            candidates = ParameterSweep.grid(key, space)
+        
+        # Warm start: always re-evaluate the parameters that won last time
+        previous = self._previous_best_params(key, level)
+        if previous is not None and previous not in candidates:
+            candidates.insert(0, previous)
+        
+        workers = self.search_config.get("workers", os.cpu_count() or 1)
+        sweep = ParameterSweep(
+            engine.prices,
+            max_workers=workers,
+            pool=self._get_sweep_pool(workers),
+            objective=self.search_config.get("objective", "sharpe_ratio"),
+            cost_bps=self.cost_bps,
+            reduction_factor=self.search_config.get("reduction_factor", 3),
+            min_rung_bars=self.search_config.get("min_rung_bars", 5000),
+            min_score=self.search_config.get("min_score")
+        )
+        result = sweep.run(key, candidates, mode=mode)
+        print(f"🔍 Swept {result.candidates} {key} candidates for {level} in {result.elapsed_seconds:.2f}s "
+              f"({result.pruned} pruned early)")
+        with self._lock:
+            # Only cache against the engine the sweep ran on; new bars cleared the cache meanwhile
+            if engine is self._backtest_engine:
+                self._sweep_results[(key, level, mode)] = (time.monotonic(), result)
+        return result
+        
+    def _previous_best_params(self, key: str, level: str) -> Optional[Dict]:
+        """Parameters of the last backtest of this strategy for the level, if any"""
+        latest = self.optimization_history.latest(level)
+        if latest is None:
+            return None
+        for strategy in latest["optimized_strategies"]:
+            backtest = strategy.get("backtest")
+            if backtest and backtest["strategy"] == key:
+                return dict(backtest["params"])
+        return None
+    
+    @traced("strategy_optimizer", target_type="course")
     def optimize_trading_strategies(self, course_data: Dict) -> Dict:
         """Optimize trading strategies for a course"""
         print("⚡ StrategyOptimizer optimizing trading strategies...")
         
         level = course_data["level"]
-        strategies = self._generate_optimized_strategies(level)
+        strategies = self._backtest_strategies(self._generate_optimized_strategies(level), level)
         
         optimization_result = {
             "timestamp": datetime.now().isoformat(),
@@ -38,14 +199,12 @@ class StrategyOptimizer:
             "Beginner": [
                 {
                     "name": "Trend Following Basic",
-                    "success_rate": random.uniform(55, 65),
                     "complexity": "Low",
                     "description": "Simple trend identification and following",
                     "ai_enhancements": ["Automated trend detection", "Basic risk management"]
                 },
                 {
                     "name": "Support/Resistance Trading",
-                    "success_rate": random.uniform(50, 60),
                     "complexity": "Low",
                     "description": "Trading based on key price levels",
                     "ai_enhancements": ["Level identification", "Breakout confirmation"]
@@ -54,14 +213,12 @@ class StrategyOptimizer:
             "Intermediate": [
                 {
                     "name": "Mean Reversion Advanced",
-                    "success_rate": random.uniform(60, 70),
                     "complexity": "Medium",
                     "description": "Statistical arbitrage and mean reversion",
                     "ai_enhancements": ["Statistical analysis", "Volatility adjustment"]
                 },
                 {
                     "name": "Momentum Breakout",
-                    "success_rate": random.uniform(58, 68),
                     "complexity": "Medium",
                     "description": "Capture momentum in breakout moves",
                     "ai_enhancements": ["Momentum quantification", "Volume analysis"]
@@ -70,14 +227,12 @@ class StrategyOptimizer:
             "Advanced": [
                 {
                     "name": "Neural Network Prediction",
-                    "success_rate": random.uniform(65, 75),
                     "complexity": "High",
                     "description": "Deep learning for price prediction",
                     "ai_enhancements": ["Neural network models", "Feature engineering"]
                 },
                 {
                     "name": "High-Frequency Arbitrage",
-                    "success_rate": random.uniform(70, 80),
                     "complexity": "High",
                     "description": "Microsecond arbitrage opportunities",
                     "ai_enhancements": ["Low-latency systems", "Multi-venue arbitrage"]
@@ -88,15 +243,31 @@ class StrategyOptimizer:
         return base_strategies.get(level, [])
     
     def _calculate_performance_metrics(self, strategies: List[Dict]) -> Dict:
-        """Calculate performance metrics for strategies"""
-        total_strategies = len(strategies)
-        avg_success_rate = sum(s["success_rate"] for s in strategies) / total_strategies
+        """Performance metrics over the backtested strategies; "no_data" if none could be tested"""
+        backtests = [s["backtest"] for s in strategies if "backtest" in s]
+        if not backtests:
+            return {
+                "status": "no_data",
+                "total_strategies": len(strategies),
+                "backtested_strategies": 0,
+                "average_success_rate": None,
+                "risk_adjusted_return": None,
+                "sharpe_ratio": None
+            }
         
+        avg_success_rate = sum(b["win_rate"] for b in backtests) / len(backtests)
+        sharpe_ratio = sum(b["sharpe_ratio"] for b in backtests) / len(backtests)
+        # Return per unit of drawdown, averaged over the backtests that drew down at all
+        return_to_drawdown = [b["total_return"] / b["max_drawdown"] for b in backtests if b["max_drawdown"] > 0]
         return {
+            "status": "backtested",
+            "total_strategies": len(strategies),
+            "backtested_strategies": len(backtests),
             "average_success_rate": round(avg_success_rate, 2),
-            "total_strategies": total_strategies,
-            "risk_adjusted_return": round(avg_success_rate * 0.8, 2),
-            "sharpe_ratio": round(random.uniform(1.5, 3.0), 2)
+            "risk_adjusted_return": (round(sum(return_to_drawdown) / len(return_to_drawdown), 2)
+                                     if return_to_drawdown else None),
+            "sharpe_ratio": round(sharpe_ratio, 2),
+            "max_drawdown": max(b["max_drawdown"] for b in backtests)
         }
     
     def _calculate_risk_adjustments(self, level: str) -> Dict:
@@ -122,6 +293,7 @@ class StrategyOptimizer:
         
         return random.sample(improvements, 3)
     
+    @traced("strategy_optimizer", target_type="course")
     def generate_strategy_report(self, course_data: Dict) -> Dict:
         """Generate comprehensive strategy report for a course"""
         optimized_course = self.optimize_trading_strategies(course_data)
@@ -0,0 +1,295 @@
+import itertools
+import math
+import multiprocessing
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .backtesting import BacktestEngine, PriceSeries
+
+# Strategy parameters searched for each engine strategy
+PARAMETER_SPACES = {
+    "Trend Following": {"fast": [5, 10, 20, 30, 50], "slow": [40, 60, 100, 150, 200]},
+    "Mean Reversion": {"lookback": [10, 20, 30, 50], "entry_z": [1.5, 2.0, 2.5, 3.0], "exit_z": [0.0, 0.25, 0.5, 1.0]},
+    "Momentum Breakout": {"lookback": [10, 20, 40, 55, 100], "exit_lookback": [5, 10, 20, 40]},
+    "Support/Resistance": {"lookback": [20, 50, 100, 200], "band": [0.0025, 0.005, 0.01, 0.02]}
+}
+
+# Constraints that rule out meaningless combinations before any evaluation
+PARAMETER_CONSTRAINTS = {
+    "Trend Following": lambda p: p["fast"] < p["slow"],
+    "Mean Reversion": lambda p: p["exit_z"] < p["entry_z"],
+    "Momentum Breakout": lambda p: p["exit_lookback"] <= p["lookback"]
+}
+
+RISK_MULTIPLIERS = [0.5, 1.0, 1.5, 2.0]
+
+ARRAY_FIELDS = ["open", "high", "low", "close", "volume", "returns"]
+
+
+def risk_space(risk_profile: Dict) -> Dict[str, List[float]]:
+    """stop_loss / position_size values to sweep around a level's risk profile"""
+    return {
+        "stop_loss": sorted({round(risk_profile["stop_loss"] * m, 2) for m in RISK_MULTIPLIERS}),
+        "position_size": sorted({round(risk_profile["position_size"] * m, 2) for m in RISK_MULTIPLIERS})
+    }
+
+
+def sweep_pool(max_workers: int) -> ProcessPoolExecutor:
+    """Process pool for sweeps whose workers are never forked from a threaded caller.
+
+    Workers come from a fork server (or are spawned where there is none),
+    so they can be started from the job queue's threads safely. Like any
+    spawned process they re-import the main module: serve the app with a
+    WSGI server (gunicorn app:app) rather than python app.py.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context(method))
+
+
+# ----------------------------------------------------------------------
+# Worker side: price arrays are attached from shared memory once per sweep
+# ----------------------------------------------------------------------
+class _SweepData:
+    """One sweep's price arrays and settings, with an engine per rung length"""
+
+    def __init__(self, prices: PriceSeries, returns: np.ndarray, settings: Dict):
+        self.prices = prices
+        self.returns = returns
+        self.settings = settings
+        self.engines: Dict[int, BacktestEngine] = {}
+
+    def engine_for(self, bars: int) -> BacktestEngine:
+        """Engine over the first bars of the series (views, no copies)"""
+        engine = self.engines.get(bars)
+        if engine is None:
+            engine = BacktestEngine(
+                self.prices.head(bars),
+                cost_bps=self.settings["cost_bps"],
+                returns=self.returns[:bars],
+                periods_per_year=self.settings["periods_per_year"]
+            )
+            self.engines[bars] = engine
+        return engine
+
+
+# Only ever set in pool worker processes; an in-process sweep keeps its own _SweepData
+_worker_memory = None
+_worker_block: Optional[str] = None
+_worker_data: Optional[_SweepData] = None
+
+
+def _attach_arrays(buffer, bars: int) -> Dict[str, np.ndarray]:
+    block = np.ndarray((len(ARRAY_FIELDS) + 1, bars), dtype=np.float64, buffer=buffer)
+    arrays = {name: block[i] for i, name in enumerate(ARRAY_FIELDS)}
+    arrays["timestamps"] = block[len(ARRAY_FIELDS)].view(np.int64).view("datetime64[s]")
+    return arrays
+
+
+def _init_sweep_worker(memory_name: str, bars: int, settings: Dict):
+    """Point this worker at a sweep's shared arrays; it keeps one block attached at a time"""
+    global _worker_memory, _worker_block, _worker_data
+    if memory_name == _worker_block:
+        return
+
+    previous = _worker_memory
+    _worker_memory = _worker_block = _worker_data = None
+    if previous is not None:
+        try:
+            previous.close()
+        except BufferError:
+            pass  # a view is still alive; the mapping goes when it is collected
+
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    arrays = _attach_arrays(_worker_memory.buf, bars)
+    prices = PriceSeries(arrays["timestamps"], arrays["open"], arrays["high"], arrays["low"],
+                         arrays["close"], arrays["volume"])
+    _worker_data = _SweepData(prices, arrays["returns"], settings)
+    _worker_block = memory_name
+
+
+def _evaluate_batch(data: _SweepData, strategy: str, candidates: List[Dict], bars: int,
+                    objective: str) -> List[Dict]:
+    engine = data.engine_for(bars)
+    outcomes = []
+    for params in candidates:
+        params = dict(params)
+        risk = {"position_size": params.pop("position_size", 100.0), "stop_loss": params.pop("stop_loss", None)}
+        result = engine.run(strategy, **risk, **params).to_dict()
+        score = result[objective]
+        if objective == "max_drawdown":
+            score = -score
+        outcomes.append({"score": score if math.isfinite(score) else -math.inf, "result": result})
+    return outcomes
+
+
+def _evaluate_pooled(block: tuple, strategy: str, candidates: List[Dict], bars: int,
+                     objective: str) -> List[Dict]:
+    _init_sweep_worker(*block)
+    return _evaluate_batch(_worker_data, strategy, candidates, bars, objective)
+
+
+# ----------------------------------------------------------------------
+# Driver
+# ----------------------------------------------------------------------
+class SweepResult:
+    def __init__(self, strategy: str, mode: str):
+        self.strategy = strategy
+        self.mode = mode
+        self.best: Optional[Dict] = None
+        self.leaderboard: List[Dict] = []
+        self.candidates = 0
+        self.evaluations = 0
+        self.pruned = 0
+        self.elapsed_seconds = 0.0
+
+    def to_dict(self) -> Dict:
+        return {
+            "strategy": self.strategy,
+            "mode": self.mode,
+            "best": self.best,
+            "leaderboard": self.leaderboard,
+            "candidates": self.candidates,
+            "evaluations": self.evaluations,
+            "pruned": self.pruned,
+            "elapsed_seconds": round(self.elapsed_seconds, 3)
+        }
+
+
+class ParameterSweep:
+    """Grid or random search over strategy and risk parameters.
+
+    Candidates are backtested on a process pool: the long-lived one passed
+    as pool (see sweep_pool), else one created for this sweep. The OHLCV
+    and return arrays are copied once into a shared-memory block that every
+    worker maps on its first task of the sweep, so no price data is pickled
+    per task. Early stopping uses successive halving: all candidates are
+    scored on a prefix of the history, only the best 1/reduction_factor
+    (and never anything below min_score) move on to a longer prefix, and
+    only the finalists are run on the full series.
+    """
+
+    def __init__(self, prices: PriceSeries, max_workers: int = 4, objective: str = "sharpe_ratio",
+                 cost_bps: float = 1.0, batch_size: int = 16, reduction_factor: int = 3,
+                 min_rung_bars: int = 5000, min_score: float = None, early_stopping: bool = True,
+                 pool: ProcessPoolExecutor = None):
+        self.prices = prices
+        self.pool = pool
+        self.max_workers = max_workers
+        self.objective = objective
+        self.cost_bps = cost_bps
+        self.batch_size = batch_size
+        self.reduction_factor = reduction_factor
+        self.min_rung_bars = min_rung_bars
+        self.min_score = min_score
+        self.early_stopping = early_stopping
+
+    # ------------------------------------------------------------------
+    # Candidate generation
+    # ------------------------------------------------------------------
+    @staticmethod
+    def grid(strategy: str, extra_space: Dict[str, Sequence] = None) -> List[Dict]:
+        """Every valid combination of the strategy's parameter space"""
+        space = {**PARAMETER_SPACES[strategy], **(extra_space or {})}
+        names = list(space)
+        constraint = PARAMETER_CONSTRAINTS.get(strategy, lambda p: True)
+        combos = (dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names)))
+        return [combo for combo in combos if constraint(combo)]
+
+    @classmethod
+    def random(cls, strategy: str, iterations: int, extra_space: Dict[str, Sequence] = None,
+               seed: int = None) -> List[Dict]:
+        """A random sample of distinct valid combinations"""
+        candidates = cls.grid(strategy, extra_space)
+        rng = random.Random(seed)
+        return rng.sample(candidates, min(iterations, len(candidates)))
+
+    # ------------------------------------------------------------------
+    # Search
+    # ------------------------------------------------------------------
+    def _rungs(self) -> List[int]:
+        bars = len(self.prices)
+        if not self.early_stopping:
+            return [bars]
+        rungs = [bars]
+        while rungs[0] // self.reduction_factor >= self.min_rung_bars:
+            rungs.insert(0, rungs[0] // self.reduction_factor)
+        return rungs
+
+    def _shared_block(self):
+        bars = len(self.prices)
+        memory = shared_memory.SharedMemory(create=True, size=(len(ARRAY_FIELDS) + 1) * bars * 8)
+        arrays = _attach_arrays(memory.buf, bars)
+        returns = np.zeros(bars)
+        returns[1:] = np.diff(self.prices.close) / self.prices.close[:-1]
+        for name in ARRAY_FIELDS:
+            arrays[name][:] = returns if name == "returns" else getattr(self.prices, name)
+        arrays["timestamps"][:] = self.prices.timestamps.astype("datetime64[s]")
+        del arrays  # drop the exported views so the block can be closed later
+        return memory
+
+    def run(self, strategy: str, candidates: List[Dict], mode: str = "grid", top_k: int = 5) -> SweepResult:
+        result = SweepResult(strategy, mode)
+        result.candidates = len(candidates)
+        started = time.monotonic()
+        if not candidates:
+            return result
+
+        settings = {"cost_bps": self.cost_bps, "periods_per_year": self.prices.periods_per_year()}
+        memory = None
+        pool = None
+        block = None
+        data = None
+        try:
+            if self.max_workers > 1:
+                memory = self._shared_block()
+                block = (memory.name, len(self.prices), settings)
+                pool = self.pool or sweep_pool(self.max_workers)
+            else:
+                returns = np.zeros(len(self.prices))
+                returns[1:] = np.diff(self.prices.close) / self.prices.close[:-1]
+                data = _SweepData(self.prices, returns, settings)
+
+            survivors = list(candidates)
+            rungs = self._rungs()
+            for rung, bars in enumerate(rungs):
+                outcomes = self._evaluate(pool, block, data, strategy, survivors, bars)
+                result.evaluations += len(outcomes)
+                ranked = sorted(zip(survivors, outcomes), key=lambda pair: pair[1]["score"], reverse=True)
+
+                if rung == len(rungs) - 1:
+                    result.leaderboard = [outcome["result"] for _, outcome in ranked[:top_k]]
+                    result.best = result.leaderboard[0] if result.leaderboard else None
+                    break
+
+                keep = max(1, math.ceil(len(ranked) / self.reduction_factor))
+                next_survivors = [
+                    candidate for candidate, outcome in ranked[:keep]
+                    if self.min_score is None or outcome["score"] >= self.min_score
+                ]
+                # Never prune everything: fall back to the single best candidate
+                survivors = next_survivors or [ranked[0][0]]
+                result.pruned += len(ranked) - len(survivors)
+        finally:
+            if pool is not None and pool is not self.pool:
+                pool.shutdown()
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+
+        result.elapsed_seconds = time.monotonic() - started
+        return result
+
+    def _evaluate(self, pool, block, data, strategy: str, candidates: List[Dict], bars: int) -> List[Dict]:
+        batches = [candidates[i:i + self.batch_size] for i in range(0, len(candidates), self.batch_size)]
+        if pool is None:
+            outcome_batches = [_evaluate_batch(data, strategy, batch, bars, self.objective) for batch in batches]
+        else:
+            futures = [pool.submit(_evaluate_pooled, block, strategy, batch, bars, self.objective)
+                       for batch in batches]
+            outcome_batches = [future.result() for future in futures]
+        return [outcome for batch in outcome_batches for outcome in batch]
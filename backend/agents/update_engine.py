@@ -0,0 +1,188 @@
+import contextvars
+import copy
+import multiprocessing
+import threading
+import time
+import traceback
+from concurrent.futures import ALL_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# (agent name, function taking a course dict and returning the updated course dict)
+UpdateStep = Tuple[str, Callable[[Dict], Dict]]
+
+# Set in each worker process by _init_process_worker so steps are built and
+# semaphores shipped once per process instead of once per task
+_worker_steps: Sequence[UpdateStep] = ()
+_worker_semaphores: Dict = {}
+
+
+def _init_process_worker(step_factory, semaphores):
+    global _worker_steps, _worker_semaphores
+    _worker_steps = list(step_factory())
+    _worker_semaphores = semaphores
+
+
+def _process_context():
+    """Start workers from a fork server (spawn where there is none), as sweep_pool does.
+
+    The engine runs on job queue threads, and forking a threaded process can
+    leave a worker holding a copy of a lock some other thread had taken.
+    """
+    method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+    return multiprocessing.get_context(method)
+
+
+def _update_course(course: Dict, steps: Sequence[UpdateStep], semaphores: Dict) -> Dict:
+    """Run every agent step on one course; failures are reported, not raised"""
+    current = course
+    for agent_name, step in steps:
+        semaphore = semaphores.get(agent_name)
+        try:
+            if semaphore is not None:
+                with semaphore:
+                    current = step(current)
+            else:
+                current = step(current)
+        except Exception as e:
+            return {
+                "ok": False,
+                "course_id": course.get("id"),
+                "agent": agent_name,
+                "error": f"{type(e).__name__}: {e}",
+                "traceback": traceback.format_exc(limit=5)
+            }
+    return {"ok": True, "course": current}
+
+
+def _update_chunk(courses: List[Dict], steps=None, semaphores=None) -> List[Dict]:
+    if steps is None:
+        steps, semaphores = _worker_steps, _worker_semaphores
+    return [_update_course(course, steps, semaphores) for course in courses]
+
+
+class UpdateBatchResult:
+    """Outcome of one update run: updated courses plus per-course failures"""
+
+    def __init__(self):
+        self.updated: List[Dict] = []
+        self.failed: List[Dict] = []
+        self.unfinished: List[Dict] = []
+        self.elapsed_seconds = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return not self.failed and not self.unfinished
+
+    def to_dict(self) -> Dict:
+        return {
+            "updated_count": len(self.updated),
+            "failed_count": len(self.failed),
+            "unfinished_count": len(self.unfinished),
+            "failures": [
+                {"course_id": f["course_id"], "agent": f["agent"], "error": f["error"]}
+                for f in self.failed
+            ],
+            "elapsed_seconds": round(self.elapsed_seconds, 3)
+        }
+
+
+class CourseUpdateEngine:
+    """Fans per-course agent updates out across a thread or process pool.
+
+    Each course runs through the agent steps in order, but different courses
+    run concurrently. agent_concurrency caps how many courses may be inside a
+    given agent at once (e.g. to respect a rate-limited data source). A
+    failing course is recorded and the rest of the batch carries on; with a
+    timeout, courses that have not finished are reported as unfinished and
+    the updates that did complete are still returned.
+
+    Thread mode suits agents that wait on I/O. Process mode gives CPU-bound
+    agents real parallelism. Its workers are not forked from the caller, so
+    they cannot inherit the agents' locks, threads or connections: instead
+    step_factory, a picklable callable (a module-level function or a
+    functools.partial of one), builds the steps once in each worker. Agent
+    state mutated inside a step stays in the worker process.
+    """
+
+    def __init__(self,
+                 steps: Sequence[UpdateStep] = (),
+                 executor: str = "thread",
+                 max_workers: int = 4,
+                 chunk_size: int = 100,
+                 agent_concurrency: Dict[str, int] = None,
+                 step_factory: Callable[[], Sequence[UpdateStep]] = None):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Unknown executor type: {executor}")
+        if executor == "process" and step_factory is None:
+            raise ValueError("Process mode needs a picklable step_factory to build the steps in each worker")
+
+        self.steps = list(steps)
+        self.step_factory = step_factory
+        self.executor = executor
+        self.max_workers = max_workers
+        self.chunk_size = max(1, chunk_size)
+        self.agent_concurrency = agent_concurrency or {}
+
+    def _semaphores(self, factory) -> Dict:
+        return {
+            agent_name: factory(limit)
+            for agent_name, limit in self.agent_concurrency.items()
+            if limit and limit < self.max_workers
+        }
+
+    def run(self, courses: List[Dict], timeout: Optional[float] = None) -> UpdateBatchResult:
+        """Update every course, returning whatever finished within the timeout"""
+        result = UpdateBatchResult()
+        started = time.monotonic()
+        chunks = [courses[i:i + self.chunk_size] for i in range(0, len(courses), self.chunk_size)]
+
+        if self.executor == "process":
+            context = _process_context()
+            semaphores = self._semaphores(context.BoundedSemaphore)
+            pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=context,
+                initializer=_init_process_worker,
+                initargs=(self.step_factory, semaphores)
+            )
+            submit = lambda chunk: pool.submit(_update_chunk, chunk)
+        else:
+            semaphores = self._semaphores(threading.BoundedSemaphore)
+            pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="course-update")
+            # Threads share the caller's dicts, so work on copies to keep the input untouched.
+            # Each chunk runs in a copy of the caller's context so agent spans nest under its trace.
+            submit = lambda chunk: pool.submit(
+                contextvars.copy_context().run,
+                _update_chunk, [copy.deepcopy(course) for course in chunk], self.steps, semaphores
+            )
+
+        try:
+            futures = {submit(chunk): chunk for chunk in chunks}
+            _, not_done = wait(futures, timeout=timeout, return_when=ALL_COMPLETED)
+
+            for future in futures:
+                chunk = futures[future]
+                if future in not_done:
+                    future.cancel()
+                    result.unfinished.extend({"course_id": course.get("id")} for course in chunk)
+                    continue
+
+                error = future.exception()
+                if error is not None:
+                    # The whole chunk was lost (e.g. a worker process died)
+                    result.failed.extend(
+                        {"course_id": course.get("id"), "agent": None, "error": repr(error)}
+                        for course in chunk
+                    )
+                    continue
+
+                for outcome in future.result():
+                    if outcome["ok"]:
+                        result.updated.append(outcome["course"])
+                    else:
+                        result.failed.append(outcome)
+        finally:
+            pool.shutdown(wait=timeout is None, cancel_futures=True)
+
+        result.elapsed_seconds = time.monotonic() - started
+        return result
@@ -1,89 +1,183 @@
-from flask import Flask, render_template, request, jsonify, session
+from flask import Flask, Response, g, render_template, request, jsonify, session
 from flask_cors import CORS
 import json
+import os
+import time
 import uuid
 from datetime import datetime, timedelta
-from agents.course_generator import CourseGenerator
-from agents.content_updater import ContentUpdater
+import numpy as np
+from agents.backtesting import OHLCV_COLUMNS, PriceSeries
+from agents.course_generator import CourseGenerator, ContentUpdater
+from agents.indicators import MarketState
+from agents.market_analyzer import MarketAnalyzer
+from agents.market_data import MarketDataStore
 from agents.payment_processor import PaymentProcessor
+from agents.strategy_optimizer import StrategyOptimizer
+from config.config import get_config
+from database.connection import get_pool
+from database.course_analytics import CourseAnalyticsStore
+from database.course_index import CourseIndex
+from database.course_query import LEVELS, CourseQuery
+from database.course_repository import CourseRepository
+from database.course_search import CourseSearch
+from database.course_versions import CourseVersionStore
+from database.market_analysis_store import MarketAnalysisStore
+from database.optimization_history import OptimizationHistory
+from database.order_store import IdempotencyConflict, OrderStore
+from database.price_index import PriceIndex
+from database.progress_store import ProgressStore
+from models.course import Course
+from services.job_queue import JobQueue
+from services.response_cache import ResponseCache, cached_json_response
+from services.metrics import metrics
+from services.notifications import NotificationService, SMTPConnectionPool
+from services.progress_heartbeats import HeartbeatBuffer
+from services.tracing import tracer
+from services.webhooks import WebhookQueue, WebhookSignatureError
+
+app_config = get_config()
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'
 CORS(app)
 
+tracer.configure(
+    get_pool(app_config),
+    batch_size=app_config.TRACING_CONFIG['batch_size'],
+    flush_interval_seconds=app_config.TRACING_CONFIG['flush_interval_seconds'],
+    window_size=app_config.TRACING_CONFIG['latency_window']
+)
+tracer.start()
+
+@app.before_request
+def begin_request_trace():
+    """Agent spans recorded while serving a request share one trace id"""
+    g.trace_token = tracer.begin_trace(request.headers.get('X-Trace-Id'))
+
+@app.teardown_request
+def end_request_trace(exc=None):
+    token = g.pop('trace_token', None)
+    if token is not None:
+        tracer.end_trace(token)
+
+# Request metrics (exposed at /metrics)
+metrics.counter('http_requests_total', 'HTTP requests by route, method and status')
+metrics.counter('http_request_errors_total', 'HTTP requests that returned a 5xx status')
+metrics.histogram('http_request_duration_seconds', 'HTTP request latency by route and method')
+metrics.gauge('http_requests_in_flight', 'HTTP requests currently being served')
+
+def request_route():
+    return request.url_rule.rule if request.url_rule else 'unmatched'
+
+@app.before_request
+def begin_request_metrics():
+    g.metrics_started = time.perf_counter()
+    metrics.add_gauge('http_requests_in_flight', 1)
+
+def record_request_metrics(status):
+    labels = {"route": request_route(), "method": request.method}
+    metrics.observe('http_request_duration_seconds', time.perf_counter() - g.metrics_started, labels)
+    metrics.inc('http_requests_total', {**labels, "status": str(status)})
+    if status >= 500:
+        metrics.inc('http_request_errors_total', {**labels, "status": str(status)})
+
+@app.after_request
+def end_request_metrics(response):
+    if 'metrics_started' in g:
+        record_request_metrics(response.status_code)
+        g.metrics_recorded = True
+    return response
+
+@app.teardown_request
+def release_request_metrics(exc=None):
+    if 'metrics_started' not in g:
+        return
+    # An unhandled exception skips after_request; count it as a 500
+    if not g.pop('metrics_recorded', False):
+        record_request_metrics(500)
+    metrics.add_gauge('http_requests_in_flight', -1)
+
 # Initialize AI Agents
 course_generator = CourseGenerator()
-content_updater = ContentUpdater()
-payment_processor = PaymentProcessor()
+market_analysis_store = MarketAnalysisStore(
+    get_pool(app_config),
+    batch_size=app_config.AI_AGENTS['market_analyzer']['history_batch_size'],
+    flush_interval_seconds=app_config.AI_AGENTS['market_analyzer']['history_flush_interval_seconds']
+)
+market_analysis_store.start()
+market_analyzer = MarketAnalyzer(
+    update_interval_hours=app_config.AI_AGENTS['market_analyzer']['update_interval_hours'],
+    analysis_store=market_analysis_store,
+    market_state=MarketState(app_config.AI_AGENTS['market_analyzer']['indicators']),
+    feature_config=app_config.COURSE_CONFIG['features']
+)
+
+market_data = MarketDataStore(app_config.MARKET_DATA_CONFIG['root'])
+
+def load_market_history(analyzer, market_config):
+    """Warm the analyzer's live indicators from the market data store (else from price files) and follow it"""
+    data_config = app_config.MARKET_DATA_CONFIG
+    if data_config['market_symbol'] not in market_data:
+        load_price_files(analyzer, market_config)
+    analyzer.follow_store(market_data, data_config['market_symbol'], data_config['sector_symbols'])
+
+def load_price_files(analyzer, market_config):
+    """Warm the analyzer from the configured CSV/Parquet price files"""
+    def load(path):
+        return PriceSeries.load(path) if path and os.path.exists(path) else None
+    
+    sectors = {name: load(path) for name, path in market_config['sector_data_paths'].items()}
+    analyzer.load_price_history(
+        load(market_config['market_data_path']),
+        {name: prices for name, prices in sectors.items() if prices is not None}
+    )
+
+load_market_history(market_analyzer, app_config.AI_AGENTS['market_analyzer'])
+
+history_config = app_config.AI_AGENTS['strategy_optimizer']['history']
+optimization_history = OptimizationHistory(
+    get_pool(app_config),
+    max_entries=history_config['max_entries'],
+    batch_size=history_config['batch_size'],
+    flush_interval_seconds=history_config['flush_interval_seconds'],
+    stats_window_seconds=history_config['stats_window_hours'] * 3600
+)
+optimization_history.start()
+strategy_optimizer = StrategyOptimizer(
+    price_data_path=app_config.AI_AGENTS['strategy_optimizer']['price_data_path'],
+    cost_bps=app_config.AI_AGENTS['strategy_optimizer']['backtest_cost_bps'],
+    search_config=app_config.AI_AGENTS['strategy_optimizer']['search'],
+    market_data=market_data,
+    symbol=app_config.MARKET_DATA_CONFIG['market_symbol'],
+    backtest_start=app_config.MARKET_DATA_CONFIG['backtest_start'],
+    backtest_end=app_config.MARKET_DATA_CONFIG['backtest_end'],
+    history=optimization_history
+)
+content_updater = ContentUpdater(
+    market_analyzer=market_analyzer,
+    strategy_optimizer=strategy_optimizer,
+    engine_config=app_config.UPDATE_ENGINE_CONFIG,
+    feature_config=app_config.COURSE_CONFIG['features']
+)
+order_store = OrderStore(get_pool(app_config))
+payment_processor = PaymentProcessor(
+    order_store,
+    payment_config=app_config.PAYMENT_CONFIG,
+    stripe_tolerance_seconds=app_config.WEBHOOK_CONFIG['stripe_tolerance_seconds']
+)
+webhook_queue = WebhookQueue(
+    get_pool(app_config),
+    order_store,
+    batch_size=app_config.WEBHOOK_CONFIG['batch_size'],
+    poll_interval_seconds=app_config.WEBHOOK_CONFIG['poll_interval_seconds'],
+    max_attempts=app_config.WEBHOOK_CONFIG['max_attempts']
+)
+response_cache = ResponseCache()
 
 class AITradingAcademy:
-    def __init__(self):
-        self.courses = self.load_courses()
+    def __init__(self, catalog):
+        self.catalog = catalog
         self.ai_agents = self.load_ai_agents()
-        
-    def load_courses(self):
-        return [
-            {
-                "id": 1,
-                "title": "AI Trading Fundamentals",
-                "description": "Begin your journey into AI-powered trading with our foundational course",
-                "level": "Beginner",
-                "price": 499,
-                "currency": "ZAR",
-                "duration": "4 weeks",
-                "lessons": 12,
-                "features": [
-                    "Basic trading concepts",
-                    "Introduction to AI in trading",
-                    "Risk management fundamentals",
-                    "Live AI-assisted exercises"
-                ],
-                "ai_generated": True,
-                "last_updated": "2024-01-15",
-                "next_update": "2024-02-15",
-                "content_version": "1.2.3"
-            },
-            {
-                "id": 2,
-                "title": "Intermediate AI Trading Strategies",
-                "description": "Advanced strategies and AI integration for consistent returns",
-                "level": "Intermediate",
-                "price": 899,
-                "currency": "ZAR",
-                "duration": "6 weeks",
-                "lessons": 18,
-                "features": [
-                    "Technical analysis with AI",
-                    "Algorithm development",
-                    "Portfolio optimization",
-                    "Real-time market analysis"
-                ],
-                "ai_generated": True,
-                "last_updated": "2024-01-10",
-                "next_update": "2024-02-10",
-                "content_version": "2.1.4"
-            },
-            {
-                "id": 3,
-                "title": "Advanced AI Trading Mastery",
-                "description": "Master complex AI algorithms and high-frequency trading strategies",
-                "level": "Advanced",
-                "price": 1499,
-                "currency": "ZAR",
-                "duration": "8 weeks",
-                "lessons": 24,
-                "features": [
-                    "Neural network strategies",
-                    "High-frequency trading",
-                    "Advanced risk models",
-                    "Personal AI trading assistant"
-                ],
-                "ai_generated": True,
-                "last_updated": "2024-01-05",
-                "next_update": "2024-02-05",
-                "content_version": "3.0.1"
-            }
-        ]
     
     def load_ai_agents(self):
         return [
@@ -125,7 +219,85 @@ class AITradingAcademy:
             }
         ]
 
-academy = AITradingAcademy()
+academy = AITradingAcademy(CourseIndex(
+    CourseRepository(get_pool(app_config)),
+    sync_interval_seconds=app_config.CATALOG_SYNC_INTERVAL_SECONDS
+))
+
+price_index = PriceIndex(
+    academy.catalog,
+    base_price=app_config.COURSE_CONFIG['base_price_zar'],
+    price_increment=app_config.COURSE_CONFIG['price_increment']
+)
+
+progress_store = ProgressStore(get_pool(app_config), academy.catalog.repository, academy.catalog)
+heartbeats = HeartbeatBuffer(
+    progress_store,
+    flush_interval_seconds=app_config.PROGRESS_CONFIG['flush_interval_seconds'],
+    max_pending=app_config.PROGRESS_CONFIG['max_pending']
+)
+heartbeats.start()
+
+course_analytics = CourseAnalyticsStore(get_pool(app_config))
+course_analytics.ensure_built()
+
+course_search = CourseSearch(get_pool(app_config))
+course_search.ensure_built()
+
+course_versions = CourseVersionStore(
+    get_pool(app_config),
+    max_versions=app_config.COURSE_CONFIG['content_update']['max_versions'],
+    snapshot_interval=app_config.COURSE_CONFIG['content_update']['snapshot_interval']
+)
+
+job_queue = JobQueue(
+    get_pool(app_config),
+    workers=app_config.JOB_QUEUE_CONFIG['workers'],
+    poll_interval_seconds=app_config.JOB_QUEUE_CONFIG['poll_interval_seconds'],
+    lease_seconds=app_config.JOB_QUEUE_CONFIG['lease_seconds'],
+    max_attempts=app_config.JOB_QUEUE_CONFIG['max_attempts']
+)
+
+# Email notifications (course updates fan out from a background job, confirmations from the webhook worker)
+email_config = app_config.EMAIL_CONFIG
+notifications = None
+if email_config['enabled']:
+    notifications = NotificationService(
+        get_pool(app_config),
+        SMTPConnectionPool(
+            email_config['smtp_server'],
+            email_config['smtp_port'],
+            username=email_config['username'],
+            password=email_config['password'],
+            use_tls=email_config['use_tls'],
+            size=email_config['pool_size']
+        ),
+        from_email=email_config['from_email'],
+        from_name=email_config['from_name'],
+        base_url=email_config['base_url'],
+        catalog=academy.catalog,
+        ai_agents=academy.ai_agents,
+        batch_size=email_config['batch_size'],
+        queue_size=email_config['queue_size'],
+        max_attempts=email_config['max_attempts'],
+        retry_backoff_seconds=email_config['retry_backoff_seconds']
+    )
+    notifications.start()
+    webhook_queue.on_applied = notifications.notify_payments
+webhook_queue.start()
+
+metrics.gauge('catalog_courses', 'Active courses in the catalog', callback=lambda: academy.catalog.count())
+metrics.gauge('job_queue_depth', 'Background jobs queued or running', callback=lambda: job_queue.pending_count())
+metrics.gauge('webhook_queue_depth', 'Payment webhooks waiting to be applied', callback=lambda: webhook_queue.pending_count())
+metrics.counter('webhook_events_total', 'Payment webhooks received by provider and outcome')
+metrics.gauge('progress_heartbeats_pending', 'Learner/course pairs with heartbeats waiting to be flushed',
+              callback=lambda: heartbeats.pending_count())
+metrics.counter('progress_heartbeats_total', 'Learner heartbeats accepted or rejected')
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus text exposition of request and application metrics"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
 
 @app.route('/')
 def home():
@@ -137,51 +309,329 @@ def home():
 
 @app.route('/api/courses')
 def get_courses():
-    return jsonify(academy.courses)
+    """List courses with cursor pagination, filters, sorting and sparse fieldsets"""
+    pagination = app_config.COURSE_CONFIG['pagination']
+    try:
+        query = CourseQuery.from_args(
+            request.args,
+            default_limit=pagination['default_page_size'],
+            max_limit=pagination['max_page_size']
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    def build_page():
+        courses, next_cursor = academy.catalog.query(query)
+        return {
+            "courses": courses,
+            "count": len(courses),
+            "limit": query.limit,
+            "next_cursor": next_cursor
+        }
+
+    cached = response_cache.get_or_build(query.cache_key(), academy.catalog.generation, build_page)
+    return cached_json_response(cached, request)
+
+@app.route('/api/search')
+def search_courses():
+    """Ranked full-text course search with prefix matching and level/price facets"""
+    level = request.args.get('level')
+    if level is not None:
+        level = level.lower()
+        if level not in LEVELS:
+            return jsonify({"error": f"Unknown level: {request.args.get('level')}"}), 400
+    params = {
+        "text": ' '.join(request.args.get('q', '').lower().split()),
+        "level": level,
+        "min_price": request.args.get('min_price', type=float),
+        "max_price": request.args.get('max_price', type=float),
+        "limit": max(1, min(request.args.get('limit', 20, type=int), 100)),
+        "offset": max(0, request.args.get('offset', 0, type=int))
+    }
+    try:
+        # Broad queries rank most of the catalog, so repeats are served from the cache
+        cached = response_cache.get_or_build(
+            ('search',) + tuple(params.values()), academy.catalog.generation,
+            lambda: course_search.search(**params)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return cached_json_response(cached, request)
 
 @app.route('/api/courses/<int:course_id>')
 def get_course(course_id):
-    course = next((c for c in academy.courses if c['id'] == course_id), None)
+    course = academy.catalog.get(course_id)
+    if course and course.is_active:
+        cached = response_cache.get_or_build(
+            ('course', course_id), academy.catalog.generation, course.to_dict
+        )
+        return cached_json_response(cached, request)
+    return jsonify({"error": "Course not found"}), 404
+
+@app.route('/api/courses/<int:course_id>/versions')
+def list_course_versions(course_id):
+    """Recorded content versions of a course, newest first"""
+    return jsonify({"course_id": course_id, "versions": course_versions.list_versions(course_id)})
+
+@app.route('/api/courses/<int:course_id>/versions/<version>')
+def get_course_version(course_id, version):
+    """A course as it was at a past content_version"""
+    course = course_versions.get_version(course_id, version)
     if course:
         return jsonify(course)
-    return jsonify({"error": "Course not found"}), 404
+    return jsonify({"error": "Version not found"}), 404
+
+@app.route('/api/courses/<int:course_id>/progress')
+def get_course_progress(course_id):
+    """Completion summary across every student of a course"""
+    summary = progress_store.cohort_summary(course_id)
+    if summary is None:
+        return jsonify({"error": "Course not found"}), 404
+    return jsonify(summary)
+
+@app.route('/api/users/<int:user_id>/courses/<int:course_id>/progress')
+def get_user_progress(user_id, course_id):
+    progress = progress_store.get(user_id, course_id)
+    if progress is None:
+        return jsonify({"error": "Course not found"}), 404
+    return jsonify(progress.to_dict())
+
+@app.route('/api/users/<int:user_id>/courses/<int:course_id>/lessons/<int:lesson_id>/complete', methods=['POST'])
+def complete_lesson(user_id, course_id, lesson_id):
+    try:
+        progress = progress_store.complete_lesson(user_id, course_id, lesson_id)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    return jsonify(progress.to_dict())
+
+@app.route('/api/progress/heartbeats', methods=['POST'])
+def record_heartbeats():
+    """Accept player heartbeats, one event or {"events": [...]}; they are written in the next flush
+    
+    Each event is {user_id, course_id, seconds, lesson_id, completed, quiz_id, quiz_score}.
+    """
+    data = request.json or {}
+    events = data.get('events', [data])
+    progress_config = app_config.PROGRESS_CONFIG
+    if not isinstance(events, list) or not events or len(events) > progress_config['max_events_per_request']:
+        return jsonify({"error": f"Send between 1 and {progress_config['max_events_per_request']} events"}), 400
+    
+    accepted = []
+    try:
+        for event in events:
+            user_id, course_id = int(event['user_id']), int(event['course_id'])
+            layout = progress_store.layout(course_id)
+            if layout is None:
+                raise ValueError(f"Course {course_id} not found")
+            seconds = float(event.get('seconds', 0))
+            if not 0 <= seconds <= progress_config['max_heartbeat_seconds']:
+                raise ValueError(f"seconds must be between 0 and {progress_config['max_heartbeat_seconds']}")
+            lesson_id = int(event['lesson_id']) if event.get('lesson_id') is not None else None
+            if lesson_id is not None:
+                layout.ordinal(lesson_id)
+            quiz_score = float(event['quiz_score']) if event.get('quiz_score') is not None else None
+            if quiz_score is not None and not 0 <= quiz_score <= 100:
+                raise ValueError("quiz_score must be between 0 and 100")
+            accepted.append((user_id, course_id, seconds, lesson_id, bool(event.get('completed')),
+                             event.get('quiz_id'), quiz_score))
+    except (KeyError, TypeError, ValueError) as e:
+        metrics.inc('progress_heartbeats_total', {"outcome": "rejected"}, len(events))
+        return jsonify({"error": f"Invalid heartbeat: {e}"}), 400
+    
+    # Validate the whole request before buffering any of it
+    for heartbeat in accepted:
+        heartbeats.record(*heartbeat)
+    metrics.inc('progress_heartbeats_total', {"outcome": "accepted"}, len(accepted))
+    return jsonify({"accepted": len(accepted)}), 202
+
+@app.route('/api/analytics/courses')
+def get_course_analytics():
+    """Precomputed per-course enrollments, revenue, refunds, ratings and completion"""
+    if not app_config.ANALYTICS_CONFIG['track_course_performance']:
+        return jsonify({"error": "Course analytics are disabled"}), 404
+    try:
+        limit = min(int(request.args.get('limit', 100)), 500)
+        courses = course_analytics.list(
+            sort=request.args.get('sort', 'revenue'),
+            level=request.args.get('level'),
+            limit=limit
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"courses": courses, "count": len(courses)})
+
+@app.route('/api/analytics/courses/<int:course_id>')
+def get_single_course_analytics(course_id):
+    if not app_config.ANALYTICS_CONFIG['track_course_performance']:
+        return jsonify({"error": "Course analytics are disabled"}), 404
+    analytics = course_analytics.get(course_id)
+    if analytics is None:
+        return jsonify({"error": "Course not found"}), 404
+    return jsonify(analytics)
 
 @app.route('/api/ai-agents')
 def get_ai_agents():
-    return jsonify(academy.ai_agents)
+    cached = response_cache.get_or_build(
+        'ai-agents', academy.catalog.generation, lambda: academy.ai_agents
+    )
+    return cached_json_response(cached, request)
+
+def run_generate_course(payload):
+    """Job handler: generate a new course using AI agents"""
+    level = payload.get('level', 'Intermediate')
+    
+    # Use AI agents to generate course
+    generated = course_generator.generate_course(level)
+    new_course = academy.catalog.add(Course.from_dict(generated))
+    response_cache.invalidate()
+    
+    return {
+        "message": "Course generated successfully",
+        "course": new_course.to_dict()
+    }
+
+def run_update_courses(payload):
+    """Job handler: update all courses with latest content"""
+    courses = [course.to_dict() for course in academy.catalog.iter_courses()]
+    batch = content_updater.update_courses_batch(courses)
+    updated = [Course.from_dict(course) for course in batch.updated]
+    academy.catalog.save_many(updated)
+    
+    previous = {course["id"]: course for course in courses}
+    course_versions.record_many(
+        ((course.course_id, previous[course.course_id], course.to_dict()) for course in updated),
+        ai_agents_used=[name for name, _ in content_updater.get_update_steps()],
+        market_conditions={"snapshot_id": market_analyzer.get_market_snapshot()["snapshot_id"]}
+    )
+    response_cache.invalidate()
+    
+    result = {
+        "message": "Courses updated successfully" if batch.complete else "Courses partially updated",
+        **batch.to_dict()
+    }
+    if notifications is not None and updated:
+        # Emailing enrolled students can take a while; it runs as its own job
+        result["notification_job_id"] = job_queue.submit('notify_course_updates', {"updates": [
+            {
+                "course_id": course.course_id,
+                "title": course.title,
+                "new_version": course.content_version,
+                "next_update": course.next_update,
+                "updates": [feature for feature in course.features
+                            if feature not in previous[course.course_id].get("features", [])]
+                           or ["Content refreshed with the latest market analysis"]
+            }
+            for course in updated
+        ]})["job_id"]
+    return result
+
+def run_notify_course_updates(payload):
+    """Job handler: email every enrolled student about updated courses"""
+    return notifications.notify_course_updates(payload.get('updates', []))
+
+job_queue.register('generate_course', run_generate_course)
+job_queue.register('update_courses', run_update_courses)
+job_queue.register('notify_course_updates', run_notify_course_updates)
+job_queue.start()
+
+def accepted_job(job):
+    """202 response pointing at the job status endpoint"""
+    status_url = f"/api/jobs/{job['job_id']}"
+    response = jsonify({**job, "status_url": status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
 
 @app.route('/api/generate-course', methods=['POST'])
 def generate_course():
-    """Generate a new course using AI agents"""
+    """Queue generation of a new course using AI agents"""
     try:
-        data = request.json
-        level = data.get('level', 'Intermediate')
-        
-        # Use AI agents to generate course
-        new_course = course_generator.generate_course(level)
-        academy.courses.append(new_course)
-        
-        return jsonify({
-            "message": "Course generated successfully",
-            "course": new_course
-        })
+        data = request.get_json(silent=True) or {}
+        job = job_queue.submit('generate_course', {"level": data.get('level', 'Intermediate')})
+        return accepted_job(job)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/update-courses', methods=['POST'])
 def update_courses():
-    """Update all courses with latest content"""
+    """Queue an update of all courses with latest content"""
     try:
-        updated_courses = content_updater.update_all_courses(academy.courses)
-        academy.courses = updated_courses
-        
-        return jsonify({
-            "message": "Courses updated successfully",
-            "updated_count": len(updated_courses)
-        })
+        job = job_queue.submit('update_courses')
+        return accepted_job(job)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """Status (and result once finished) of a background job"""
+    job = job_queue.get(job_id)
+    if job:
+        return jsonify(job)
+    return jsonify({"error": "Job not found"}), 404
+
+@app.route('/api/market-analysis')
+def list_market_analysis():
+    """Stream market snapshots in [start, end) as newline-delimited JSON"""
+    start = request.args.get('start')
+    end = request.args.get('end', datetime.now().isoformat())
+    if not start:
+        return jsonify({"error": "start is required"}), 400
+    
+    try:
+        start, end = datetime.fromisoformat(start), datetime.fromisoformat(end)
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO 8601 timestamps"}), 400
+    
+    snapshots = market_analysis_store.iter_snapshots(start, end)
+    return Response((json.dumps(snapshot) + "\n" for snapshot in snapshots),
+                    mimetype='application/x-ndjson')
+
+@app.route('/api/market-analysis/<snapshot_id>')
+def get_market_analysis(snapshot_id):
+    """Snapshot referenced by a course's market_context.snapshot_id"""
+    snapshot = market_analysis_store.get(snapshot_id)
+    if snapshot:
+        return jsonify(snapshot)
+    return jsonify({"error": "Snapshot not found"}), 404
+
+@app.route('/api/market-data/<symbol>/bars', methods=['POST'])
+def post_market_bars(symbol):
+    """Append new OHLCV bars to the market data store.
+    
+    Every worker's analyzer picks the bars up from the store's index before
+    its next analysis; this worker's is brought up to date right away.
+    """
+    if symbol.startswith('.') or not symbol.replace('.', '').replace('-', '').isalnum():
+        return jsonify({"error": "invalid symbol"}), 400
+    bars = (request.get_json(silent=True) or {}).get('bars')
+    if not isinstance(bars, list) or not bars:
+        return jsonify({"error": "a non-empty list of bars is required"}), 400
+    
+    try:
+        prices = PriceSeries(
+            np.array([bar['timestamp'] for bar in bars], dtype='datetime64[s]'),
+            *([float(bar[column]) for bar in bars] for column in OHLCV_COLUMNS),
+            symbol=symbol
+        )
+        appended = market_data.append(symbol, prices)
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({"error": f"invalid bars: {e}"}), 400
+    market_analyzer.sync_with_store()
+    return jsonify({"symbol": symbol, "bars": appended})
+
+@app.route('/api/optimization-history')
+def get_optimization_history():
+    """Latest optimization per course level and rolling stats"""
+    return jsonify({
+        "latest": optimization_history.latest_per_level(),
+        "stats": optimization_history.window_stats()
+    })
+
+@app.route('/api/agents/latency')
+def get_agent_latency():
+    """p50/p95/p99 latency per agent action over recent spans"""
+    return jsonify(tracer.latency_stats())
+
 @app.route('/api/create-payment', methods=['POST'])
 def create_payment():
     """Create payment session for Stripe or PayFast"""
@@ -194,35 +644,72 @@ def create_payment():
         if not cart_items:
             return jsonify({"error": "Cart is empty"}), 400
         
-        # Calculate total
-        total = sum(item['price'] for item in cart_items)
+        # Price the cart from the catalog; client-supplied titles and prices are ignored
+        try:
+            quote = price_index.quote(int(item['id']) for item in cart_items)
+        except (KeyError, TypeError, ValueError) as e:
+            return jsonify({"error": f"Invalid cart: {e}"}), 400
         
-        # Create payment session
+        # Create payment session; retries with the same key get the same session back
         payment_data = payment_processor.create_payment_session(
-            cart_items, total, payment_method, user_email
+            quote.to_dict()['items'], quote.total, payment_method, user_email,
+            idempotency_key=request.headers.get('Idempotency-Key') or data.get('idempotency_key')
         )
         
         return jsonify(payment_data)
+    except IdempotencyConflict as e:
+        return jsonify({"error": str(e)}), 409
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/payment-success', methods=['POST'])
 def payment_success():
-    """Handle successful payment"""
+    """Report a payment's status once the client returns from checkout"""
     try:
         data = request.json
         payment_id = data.get('payment_id')
         
-        # Process successful payment
+        # Payments are confirmed by provider webhooks; this only reads the outcome
         result = payment_processor.handle_successful_payment(payment_id)
         
+        if result['status'] == 'pending':
+            return jsonify({"message": "Payment not confirmed yet", **result}), 202
+        if not result['success']:
+            return jsonify({"message": f"Payment {result['status']}", **result}), 402
         return jsonify({
             "message": "Payment processed successfully",
             "payment_id": payment_id,
-            "courses_granted": result['courses_granted']
+            "order_id": result['order_id'],
+            "courses_granted": result['courses_granted'],
+            "access_expires": result['access_expires']
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/webhooks/<provider>', methods=['POST'])
+def payment_webhook(provider):
+    """Verify a Stripe or PayFast webhook and queue it; the webhook worker applies it"""
+    if provider not in ('stripe', 'payfast'):
+        return jsonify({"error": "Unknown provider"}), 404
+    try:
+        event = payment_processor.parse_webhook(provider, request.get_data(), request.headers)
+    except WebhookSignatureError as e:
+        metrics.inc('webhook_events_total', {"provider": provider, "outcome": "rejected"})
+        return jsonify({"error": str(e)}), 400
+    except ValueError as e:
+        metrics.inc('webhook_events_total', {"provider": provider, "outcome": "invalid"})
+        return jsonify({"error": str(e)}), 400
+    
+    if event is None:
+        outcome = "skipped"
+    else:
+        outcome = "queued" if webhook_queue.enqueue(event) else "duplicate"
+    metrics.inc('webhook_events_total', {"provider": provider, "outcome": outcome})
+    return jsonify({"received": True})
+
 if __name__ == '__main__':
   app.run(debug=True, port=5000)
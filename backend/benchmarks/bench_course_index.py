@@ -0,0 +1,81 @@
+"""Micro-benchmark: /api/courses/<id> lookup latency vs catalog size.
+
+Compares the old linear scan over a list of course dicts with CourseIndex
+lookups against a SQLite catalog of 10 to 100k courses.
+
+Run from the backend directory:
+    python -m benchmarks.bench_course_index
+"""
+import os
+import random
+import tempfile
+import time
+
+from database.connection import ConnectionPool
+from database.course_index import CourseIndex
+from database.course_repository import CourseRepository, INSERT_COURSE
+from models.course import Course
+
+SIZES = [10, 100, 1000, 10000, 100000]
+LOOKUPS = 2000
+LEVELS = ["Beginner", "Intermediate", "Advanced"]
+
+
+def synthetic_course(i: int) -> Course:
+    return Course(
+        course_id=None,
+        title=f"Synthetic Course {i}",
+        description="Benchmark course",
+        level=LEVELS[i % 3],
+        price=499 + i % 1500,
+        features=["AI-assisted learning", "Progress tracking"]
+    )
+
+
+def build_catalog(directory: str, size: int) -> CourseRepository:
+    pool = ConnectionPool(os.path.join(directory, f"bench_{size}.db"))
+    repository = CourseRepository(pool)
+    with pool.transaction() as conn:
+        conn.execute("DELETE FROM courses")
+        conn.executemany(
+            INSERT_COURSE,
+            (repository._course_params(synthetic_course(i)) for i in range(size))
+        )
+    return repository
+
+
+def time_per_lookup(lookup, ids) -> float:
+    start = time.perf_counter()
+    for course_id in ids:
+        lookup(course_id)
+    return (time.perf_counter() - start) / len(ids) * 1e6
+
+
+def main():
+    print(f"{'courses':>8} | {'linear scan (us)':>16} | {'CourseIndex (us)':>16}")
+    print("-" * 47)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            repository = build_catalog(directory, size)
+            index = CourseIndex(repository, sync_interval_seconds=60)
+            index.sync(force=True)
+
+            all_ids = sorted(index.active_ids())
+            ids = [random.choice(all_ids) for _ in range(LOOKUPS)]
+
+            # The pre-index implementation: next(...) over a list of dicts
+            course_dicts = [course.to_dict() for course in index.iter_courses()]
+            scan_ids = ids[:max(10, LOOKUPS * 1000 // size)]
+            linear = time_per_lookup(
+                lambda course_id: next((c for c in course_dicts if c['id'] == course_id), None),
+                scan_ids
+            )
+            indexed = time_per_lookup(index.get, ids)
+
+            print(f"{size:>8} | {linear:>16.2f} | {indexed:>16.3f}")
+            repository.pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,109 @@
+"""Benchmark: learner heartbeats written directly versus coalesced by HeartbeatBuffer.
+
+Simulates N learners on one course, each sending a 10-second heartbeat
+per round from several threads. "direct" upserts every heartbeat into
+user_progress in its own transaction, which is what an endpoint without
+the buffer would do; "coalesced" records them in a HeartbeatBuffer that
+a background flusher writes in one batch per interval. Reports heartbeat
+throughput, per-heartbeat latency and how many write transactions ran.
+
+Run from the backend directory:
+    python -m benchmarks.bench_heartbeats [learners] [rounds]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from database.connection import ConnectionPool
+from database.course_index import CourseIndex
+from database.course_repository import CourseRepository
+from database.progress_store import ProgressStore
+from services.progress_heartbeats import HeartbeatBuffer
+
+THREADS = 8
+
+
+def enrol(pool, learners: int):
+    with pool.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO users (email, first_name, last_name, password_hash) VALUES (?, ?, 'Bench', '')",
+            [(f"learner{i}@example.com", f"Learner{i}") for i in range(learners)]
+        )
+        return [row[0] for row in conn.execute("SELECT user_id FROM users WHERE last_name = 'Bench'")]
+
+
+def run(directory: str, mode: str, learners: int, rounds: int):
+    pool = ConnectionPool(os.path.join(directory, f"{mode}.db"))
+    repository = CourseRepository(pool)
+    catalog = CourseIndex(repository)
+    store = ProgressStore(pool, repository, catalog)
+    course_id = next(catalog.iter_courses()).course_id
+    user_ids = enrol(pool, learners)
+    buffer = HeartbeatBuffer(store, flush_interval_seconds=1.0)
+    transactions = [0]
+    lock = threading.Lock()
+
+    def direct(user_id: int):
+        store.apply_activity([{"user_id": user_id, "course_id": course_id, "last_accessed": "2026-01-01 00:00:00",
+                               "minutes": 0, "quiz_scores": {}, "lessons": []}])
+        with lock:
+            transactions[0] += 1
+
+    latencies = []
+
+    def learner_thread(assigned):
+        local = []
+        for _ in range(rounds):
+            for user_id in assigned:
+                started = time.perf_counter()
+                if mode == "direct":
+                    direct(user_id)
+                else:
+                    buffer.record(user_id, course_id, seconds=10)
+                local.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(local)
+
+    if mode == "coalesced":
+        original = store.apply_activity
+
+        def counted(batch):
+            transactions[0] += 1
+            return original(batch)
+        store.apply_activity = counted
+        buffer.start()
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=learner_thread, args=(user_ids[i::THREADS],)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if mode == "coalesced":
+        buffer.stop()
+    elapsed = time.perf_counter() - started
+
+    with pool.connection() as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM user_progress").fetchone()[0]
+    pool.close()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{mode:>9} | {total / elapsed:>10,.0f} | {latencies[total // 2] * 1000:>8.3f} | "
+          f"{latencies[int(total * 0.99)] * 1000:>8.3f} | {transactions[0]:>12} | {rows:>5}")
+
+
+def main():
+    learners = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    print(f"{learners} learners x {rounds} heartbeats, {THREADS} threads")
+    print(f"{'mode':>9} | {'beats/s':>10} | {'p50 ms':>8} | {'p99 ms':>8} | {'transactions':>12} | {'rows':>5}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("direct", "coalesced"):
+            run(directory, mode, learners, rounds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Benchmark: memory-mapped market data versus re-reading a CSV.
+
+Writes a multi-year one-minute series into a MarketDataStore, then times
+date-range loads and appends against parsing the same data from CSV, and
+reports how much memory a one-year slice allocates.
+
+Run from the backend directory:
+    python -m benchmarks.bench_market_data [bars]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from agents.market_data import MarketDataStore
+from agents.backtesting import BacktestEngine, PriceSeries
+from benchmarks.bench_backtest import synthetic_minute_bars
+
+
+def write_csv(path, prices):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("timestamp,open,high,low,close,volume\n")
+        for row in zip(prices.timestamps.astype("datetime64[s]").astype(str), prices.open, prices.high,
+                       prices.low, prices.close, prices.volume):
+            f.write(",".join(str(value) for value in row) + "\n")
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    prices = synthetic_minute_bars(bars)
+
+    with tempfile.TemporaryDirectory() as root:
+        store = MarketDataStore(os.path.join(root, "market"))
+        start = time.perf_counter()
+        store.write("SYNTH", prices)
+        print(f"{bars:,} bars written in {time.perf_counter() - start:.2f}s")
+
+        csv_path = os.path.join(root, "prices.csv")
+        write_csv(csv_path, prices)
+        start = time.perf_counter()
+        PriceSeries.load(csv_path)
+        print(f"CSV load: {time.perf_counter() - start:.2f}s")
+
+        year_start, year_end = prices.timestamps[bars // 4], prices.timestamps[bars // 4] + np.timedelta64(365, "D")
+        tracemalloc.start()
+        start = time.perf_counter()
+        window = store.load("SYNTH", year_start, year_end)
+        elapsed = time.perf_counter() - start
+        allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        print(f"Date-range load of {len(window):,} bars: {elapsed * 1000:.2f}ms, "
+              f"{allocated / 1024:.1f} KiB allocated (the slice itself is {len(window) * 48 / 2**20:.1f} MiB)")
+
+        start = time.perf_counter()
+        result = BacktestEngine(window, cost_bps=0).run("Trend Following")
+        print(f"Backtest over the mapped slice: {time.perf_counter() - start:.2f}s, {result.trades} trades")
+
+        new_bars = synthetic_minute_bars(1440, seed=11)
+        new_bars.timestamps = prices.timestamps[-1] + np.arange(1, 1441).astype("timedelta64[m]")
+        start = time.perf_counter()
+        store.append("SYNTH", new_bars)
+        print(f"Appending one day of bars: {(time.perf_counter() - start) * 1000:.2f}ms, "
+              f"now {store.info('SYNTH')['bars']:,} bars")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: course-update fan-out over pooled SMTP versus one connection per message.
+
+Enrols N synthetic students in one course, then emails all of them through
+a LocalSMTPSink twice: once opening a fresh SMTP connection per message
+(what a naive smtplib loop does) and once through NotificationService with
+its cached templates, streamed enrolment query and pooled connections.
+
+Run from the backend directory:
+    python -m benchmarks.bench_notifications [students]
+"""
+import os
+import smtplib
+import sys
+import tempfile
+import time
+
+from database.connection import ConnectionPool
+from services.notifications import NotificationService, SMTPConnectionPool, TemplateRenderer
+from services.smtp_sink import LocalSMTPSink
+
+UPDATE = {
+    "course_id": 1,
+    "title": "AI Trading Fundamentals",
+    "new_version": "1.3.0",
+    "next_update": "2026-01-01",
+    "updates": ["Live AI trading simulations", "Personalized learning paths"]
+}
+
+
+def enrol(pool, students: int):
+    with pool.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO users (email, first_name, last_name, password_hash) VALUES (?, ?, 'Bench', '')",
+            [(f"student{i}@example.com", f"Student{i}") for i in range(students)]
+        )
+        conn.execute("""
+            INSERT INTO user_courses (user_id, course_id, purchase_amount)
+            SELECT user_id, 1, 499 FROM users WHERE last_name = 'Bench'
+        """)
+
+
+def naive(service: NotificationService, sink: LocalSMTPSink) -> int:
+    renderer = TemplateRenderer()
+    sent = 0
+    for user in service.iter_enrolled(UPDATE["course_id"]):
+        html = renderer.render('course_update.html', user_name=user["first_name"], course_title=UPDATE["title"],
+                               new_version=UPDATE["new_version"], updates=UPDATE["updates"], ai_agents=[],
+                               course_url='', next_update_date=UPDATE["next_update"])
+        with smtplib.SMTP(sink.host, sink.port) as conn:
+            conn.send_message(service._message(user["email"], UPDATE["title"], html))
+        sent += 1
+    return sent
+
+
+def main():
+    students = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as directory:
+        pool = ConnectionPool(os.path.join(directory, "bench.db"))
+        enrol(pool, students)
+
+        for mode in ("per-message", "pooled"):
+            sink = LocalSMTPSink().start()
+            smtp_pool = SMTPConnectionPool(sink.host, sink.port, use_tls=False, size=2)
+            service = NotificationService(pool, smtp_pool)
+            started = time.perf_counter()
+            if mode == "per-message":
+                sent = naive(service, sink)
+            else:
+                service.start()
+                sent = service.notify_course_updates([UPDATE])["sent"]
+                service.stop()
+            elapsed = time.perf_counter() - started
+            print(f"{mode:>11}: {sent} emails in {elapsed:.2f}s ({sent / elapsed:,.0f}/s), "
+                  f"{sink.connections} SMTP connections")
+            sink.stop()
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Benchmark: course search latency with FTS5 versus scanning the catalog.
+
+Fills a catalog with N synthetic generated courses, then times a set of
+queries (selective words, short prefixes, filtered by level and price)
+two ways: "scan" loads every active course and filters in Python, which
+is what a client filtering the full /api/courses list does; "fts" runs
+CourseSearch, including its facet query.
+
+Run from the backend directory:
+    python -m benchmarks.bench_search [courses]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from database.connection import ConnectionPool
+from database.course_repository import CourseRepository
+from database.course_search import CourseSearch
+
+WORDS = [
+    "momentum", "breakout", "scalping", "volatility", "arbitrage", "options", "futures", "forex",
+    "crypto", "sentiment", "regression", "neural", "reinforcement", "portfolio", "hedging", "swing",
+    "candlestick", "ichimoku", "fibonacci", "liquidity", "orderflow", "backtesting", "risk", "macro",
+    "equities", "commodities", "indicators", "quantitative", "execution", "signals"
+]
+LEVELS = ["beginner", "intermediate", "advanced"]
+SYLLABLES = ["ka", "lo", "mi", "ner", "tus", "va", "rex", "qui", "son", "del", "tra", "por", "zen", "fi"]
+QUERIES = [
+    ("ichimoku", {}),
+    ("neural hedging", {}),
+    ("vol", {}),
+    ("crypto", {"level": "advanced"}),
+    ("options", {"max_price": 900}),
+    ("ai trading", {}),  # in every course: the worst case, ranks the whole catalog
+]
+
+
+def vocabulary(rng, size: int = 5000):
+    """Trading terms first, then generated words; phrase() draws them Zipf-distributed"""
+    words = list(WORDS)
+    while len(words) < size:
+        words.append("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return words
+
+
+def phrase(rng, words: int) -> str:
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words))
+
+
+VOCABULARY = vocabulary(random.Random(3))
+CUM_WEIGHTS = []
+for rank in range(len(VOCABULARY)):
+    CUM_WEIGHTS.append((CUM_WEIGHTS[-1] if CUM_WEIGHTS else 0) + 1 / (rank + 10))
+
+# Trading terms rank first and appear in a large share of courses; generated
+# words further down the Zipf tail give selective queries
+QUERIES += [(VOCABULARY[1000], {}), (f"{VOCABULARY[400]} {VOCABULARY[60]}", {})]
+
+
+def fill(pool, count: int):
+    rng = random.Random(7)
+    rows = [
+        (f"{phrase(rng, 3).title()} {i}", f"Learn AI trading: {phrase(rng, 25)}.", rng.choice(LEVELS),
+         rng.choice([499, 899, 1499]), json.dumps([phrase(rng, 3) for _ in range(6)]),
+         json.dumps([{"title": phrase(rng, 3), "lessons": [phrase(rng, 4) for _ in range(4)]} for _ in range(3)]))
+        for i in range(count)
+    ]
+    with pool.transaction() as conn:
+        conn.executemany(
+            "INSERT INTO courses (title, description, level, price, features, curriculum) VALUES (?, ?, ?, ?, ?, ?)",
+            rows
+        )
+
+
+def scan(repository: CourseRepository, text: str, filters) -> int:
+    terms = text.lower().split()
+    matches = 0
+    for course in repository.iter_courses():
+        if filters.get("level") and course.level != filters["level"]:
+            continue
+        if filters.get("max_price") and course.price > filters["max_price"]:
+            continue
+        document = " ".join([course.title, course.description, json.dumps(course.features),
+                             json.dumps(course.curriculum)]).lower()
+        if all(term in document for term in terms):
+            matches += 1
+    return matches
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    with tempfile.TemporaryDirectory() as directory:
+        pool = ConnectionPool(os.path.join(directory, "bench.db"))
+        fill(pool, count)
+        search = CourseSearch(pool)
+        started = time.perf_counter()
+        search.rebuild()
+        print(f"{count} courses, index built in {time.perf_counter() - started:.1f}s")
+        repository = CourseRepository(pool)
+
+        print(f"{'query':>24} | {'matches':>7} | {'fts ms':>8} | {'scan ms':>8}")
+        for text, filters in QUERIES:
+            timings = []
+            for _ in range(20):
+                started = time.perf_counter()
+                result = search.search(text, **filters)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+
+            started = time.perf_counter()
+            scan(repository, text, filters)
+            scanned = time.perf_counter() - started
+
+            label = text + (f" {filters}" if filters else "")
+            print(f"{label[:24]:>24} | {result['total']:>7} | {timings[len(timings) // 2] * 1000:>8.2f} | "
+                  f"{scanned * 1000:>8.0f}")
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
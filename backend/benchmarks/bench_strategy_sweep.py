@@ -0,0 +1,40 @@
+"""Benchmark: parallel parameter sweeps with successive-halving early stopping.
+
+Sweeps every strategy's full grid (strategy parameters crossed with the
+Intermediate risk space) over synthetic one-minute bars, with and without
+early stopping, on one worker and on every core.
+
+Run from the backend directory:
+    python -m benchmarks.bench_strategy_sweep [bars]
+"""
+import os
+import sys
+
+from agents.strategy_sweep import PARAMETER_SPACES, ParameterSweep, risk_space
+from benchmarks.bench_backtest import synthetic_minute_bars
+
+RISK_PROFILE = {"stop_loss": 3, "position_size": 10}
+
+
+def main():
+    bars = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    prices = synthetic_minute_bars(bars)
+    worker_counts = sorted({1, os.cpu_count() or 1})
+
+    print(f"{bars:,} one-minute bars ({os.cpu_count()} CPUs)")
+    print(f"{'strategy':<20} | {'workers':>7} | {'early stop':>10} | {'candidates':>10} | "
+          f"{'evaluations':>11} | {'seconds':>8} | {'best sharpe':>11}")
+    print("-" * 96)
+    for strategy in PARAMETER_SPACES:
+        candidates = ParameterSweep.grid(strategy, risk_space(RISK_PROFILE))
+        for workers in worker_counts:
+            for early_stopping in (False, True):
+                sweep = ParameterSweep(prices, max_workers=workers, cost_bps=0, early_stopping=early_stopping)
+                result = sweep.run(strategy, candidates)
+                print(f"{strategy:<20} | {workers:>7} | {str(early_stopping):>10} | {result.candidates:>10} | "
+                      f"{result.evaluations:>11} | {result.elapsed_seconds:>8.2f} | "
+                      f"{result.best['sharpe_ratio']:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+"""Benchmark: webhook burst handled inline versus queued and applied in batches.
+
+Creates a burst of pending checkouts, then has the fake provider sign one
+Stripe completion event per checkout. "inline" verifies each event and
+applies it in its own transaction inside the request path, which is what
+an endpoint without the queue would do; "queued" only verifies and
+enqueues in the request path, and the WebhookQueue then applies the
+backlog in batches. Reports per-event acknowledgement latency and the
+total time until every payment is completed.
+
+Run from the backend directory:
+    python -m benchmarks.bench_webhooks [events]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+from agents.payment_processor import PaymentProcessor
+from database.connection import ConnectionPool
+from database.order_store import OrderStore
+from models.order import Order, OrderItem, Payment
+from services.fake_payment_provider import FakePaymentProvider
+from services.webhooks import WebhookQueue
+
+SECRET = "whsec_benchmark"
+
+
+def create_checkouts(store: OrderStore, count: int):
+    payment_ids = []
+    for i in range(count):
+        payment_id = str(uuid.uuid4())
+        order = Order(f"ORD-{uuid.uuid4().hex[:16].upper()}", 0, 499.0)
+        order.add_item(OrderItem(1 + i % 3, "Benchmark course", 499.0))
+        order.set_payment_info("stripe", payment_id)
+        payment = Payment(payment_id, order.order_id, 499.0)
+        store.create_session(f"bench-{payment_id}", f"buyer{i}@example.com", order, payment,
+                             {"payment_id": payment_id})
+        payment_ids.append(payment_id)
+    return payment_ids
+
+
+def run(directory: str, mode: str, count: int):
+    pool = ConnectionPool(os.path.join(directory, f"{mode}.db"))
+    store = OrderStore(pool)
+    processor = PaymentProcessor(store, payment_config={"stripe": {"webhook_secret": SECRET}})
+    queue = WebhookQueue(pool, store, batch_size=100)
+    provider = FakePaymentProvider(SECRET)
+
+    requests = [provider.stripe_event(payment_id, amount=499.0) for payment_id in create_checkouts(store, count)]
+
+    started = time.perf_counter()
+    acks = []
+    for body, headers in requests:
+        request_started = time.perf_counter()
+        event = processor.parse_webhook("stripe", body, headers)
+        if mode == "inline":
+            with pool.transaction() as conn:
+                store.transition_payment(conn, event["payment_id"], event["target_status"],
+                                         {"provider": event["provider"], **event["payload"]})
+        else:
+            queue.enqueue(event)
+        acks.append(time.perf_counter() - request_started)
+    acknowledged = time.perf_counter() - started
+
+    if mode == "queued":
+        queue.drain()
+    total = time.perf_counter() - started
+
+    with pool.connection() as conn:
+        completed = conn.execute("SELECT COUNT(*) FROM payments WHERE status = 'completed'").fetchone()[0]
+    pool.close()
+
+    acks.sort()
+    print(f"{mode:>7} | {acks[len(acks) // 2] * 1000:>10.3f} | {acks[int(len(acks) * 0.99)] * 1000:>10.3f} | "
+          f"{acknowledged:>9.2f} | {total:>8.2f} | {completed:>9}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    print(f"{count} webhook events")
+    print(f"{'mode':>7} | {'ack p50 ms':>10} | {'ack p99 ms':>10} | {'acked (s)':>9} | {'done (s)':>8} | {'completed':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for mode in ("inline", "queued"):
+            run(directory, mode, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,6 +10,9 @@ class Config:
     
     # Database Configuration
     DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///aitrading.db')
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', 5))
+    DATABASE_BUSY_TIMEOUT_MS = int(os.environ.get('DATABASE_BUSY_TIMEOUT_MS', 5000))
+    CATALOG_SYNC_INTERVAL_SECONDS = float(os.environ.get('CATALOG_SYNC_INTERVAL_SECONDS', 1.0))
     
     # AI Agents Configuration
     AI_AGENTS = {
@@ -26,15 +29,110 @@ class Config:
         'market_analyzer': {
             'version': '3.2.1',
             'auto_update': True,
-            'update_interval_hours': 4
+            'update_interval_hours': 4,
+            'history_batch_size': 50,
+            'history_flush_interval_seconds': 5,
+            # Bars used to warm the live indicators; sector files are optional
+            'market_data_path': os.environ.get('MARKET_DATA_PATH', 'data/prices.csv'),
+            'sector_data_paths': {
+                'technology': 'data/sectors/technology.csv',
+                'finance': 'data/sectors/finance.csv',
+                'energy': 'data/sectors/energy.csv'
+            },
+            'indicators': {
+                'volatility_window': 20,
+                'fast_span': 12,
+                'slow_span': 26,
+                'volume_short_window': 5,
+                'volume_long_window': 20,
+                'return_window': 20,
+                'trend_threshold': 0.002,
+                'periods_per_year': 252
+            }
         },
         'strategy_optimizer': {
             'version': '2.5.3',
             'auto_update': True,
-            'update_interval_days': 3
+            'update_interval_days': 3,
+            'price_data_path': os.environ.get('PRICE_DATA_PATH', 'data/prices.csv'),
+            'backtest_cost_bps': 1.0,
+            # Recent results kept in memory; everything is written to optimization_history
+            'history': {
+                'max_entries': 500,
+                'batch_size': 50,
+                'flush_interval_seconds': 5,
+                'stats_window_hours': 24
+            },
+            # Parameter search: 'none' backtests default parameters, 'grid' or 'random' sweeps them
+            'search': {
+                'mode': os.environ.get('STRATEGY_SEARCH_MODE', 'none'),
+                'iterations': 200,
+                'workers': int(os.environ.get('STRATEGY_SEARCH_WORKERS', os.cpu_count() or 1)),
+                'objective': 'sharpe_ratio',
+                'reduction_factor': 3,
+                'min_rung_bars': 5000,
+                'min_score': None,
+                'result_ttl_seconds': 3 * 24 * 3600
+            }
         }
     }
     
+    # Market Data Store Configuration (memory-mapped OHLCV columns per symbol)
+    MARKET_DATA_CONFIG = {
+        'root': os.environ.get('MARKET_DATA_ROOT', 'data/market'),
+        'market_symbol': os.environ.get('MARKET_SYMBOL', 'SPY'),
+        'sector_symbols': {
+            'technology': 'XLK',
+            'finance': 'XLF',
+            'energy': 'XLE'
+        },
+        'backtest_start': os.environ.get('BACKTEST_START'),
+        'backtest_end': os.environ.get('BACKTEST_END')
+    }
+    
+    # Course Update Engine Configuration
+    UPDATE_ENGINE_CONFIG = {
+        'executor': os.environ.get('UPDATE_EXECUTOR', 'thread'),  # 'thread' or 'process'
+        'max_workers': int(os.environ.get('UPDATE_WORKERS', 4)),
+        'chunk_size': 100,
+        'agent_concurrency': {
+            'content_updater': 4,
+            'market_analyzer': 2,
+            'strategy_optimizer': 2
+        }
+    }
+    
+    # Agent Tracing Configuration (spans written to ai_agents_log)
+    TRACING_CONFIG = {
+        'batch_size': 100,
+        'flush_interval_seconds': 2,
+        'latency_window': 1000  # recent spans per agent action kept for percentiles
+    }
+    
+    # Background Job Configuration
+    JOB_QUEUE_CONFIG = {
+        'workers': int(os.environ.get('JOB_WORKERS', 2)),
+        'poll_interval_seconds': 2,
+        'lease_seconds': 300,
+        'max_attempts': 3  # only for job types registered with retry=True
+    }
+    
+    # Payment Webhook Configuration (verified events are queued, then applied in batches)
+    WEBHOOK_CONFIG = {
+        'batch_size': 100,
+        'poll_interval_seconds': 1,
+        'max_attempts': 5,
+        'stripe_tolerance_seconds': 300  # max age of a Stripe-Signature timestamp
+    }
+    
+    # Learner Progress Heartbeats (coalesced per user and course, flushed in batches)
+    PROGRESS_CONFIG = {
+        'flush_interval_seconds': 5,
+        'max_pending': 10000,  # (user, course) pairs buffered before record() flushes inline
+        'max_heartbeat_seconds': 300,  # longest interval a single heartbeat may report
+        'max_events_per_request': 100
+    }
+    
     # Payment Configuration
     PAYMENT_CONFIG = {
         'stripe': {
@@ -66,7 +164,21 @@ class Config:
         'content_update': {
             'enabled': True,
             'interval_days': 30,
-            'max_versions': 10
+            'max_versions': 10,
+            'snapshot_interval': 5  # full copy every N versions, diffs in between
+        },
+        'features': {
+            # Cap on a course's feature list; market-generated features are evicted first
+            'max_features': {
+                'beginner': 12,
+                'intermediate': 13,
+                'advanced': 14
+            },
+            'max_market_features': 3
+        },
+        'pagination': {
+            'default_page_size': 50,
+            'max_page_size': 200
         }
     }
     
@@ -77,7 +189,15 @@ class Config:
         'username': os.environ.get('EMAIL_USERNAME', ''),
         'password': os.environ.get('EMAIL_PASSWORD', ''),
         'from_email': os.environ.get('FROM_EMAIL', 'noreply@aitradingacademy.com'),
-        'from_name': 'AI Trading Academy'
+        'from_name': 'AI Trading Academy',
+        'enabled': os.environ.get('EMAIL_ENABLED', 'False').lower() == 'true',
+        'use_tls': os.environ.get('SMTP_USE_TLS', 'True').lower() == 'true',
+        'base_url': os.environ.get('APP_BASE_URL', 'http://localhost:3000'),
+        'pool_size': 2,  # persistent SMTP connections (one sender thread each)
+        'queue_size': 1000,  # rendered messages waiting to send; producers block beyond this
+        'batch_size': 200,  # enrolled students read per query during a fan-out
+        'max_attempts': 3,
+        'retry_backoff_seconds': 2
     }
     
     # Security Configuration
@@ -0,0 +1,186 @@
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'schema.sql')
+
+# Columns added to tables after they first shipped: (table, column, definition).
+# CREATE TABLE IF NOT EXISTS leaves an existing table alone, so these are
+# added with ALTER TABLE before the indexes that depend on them are created.
+COLUMN_MIGRATIONS = [
+    ('orders', 'idempotency_key', 'VARCHAR(100)'),
+    ('market_analysis', 'snapshot_id', 'VARCHAR(32)'),
+    ('user_progress', 'lessons_bitmap', 'BLOB'),
+    ('user_progress', 'completed_count', 'INTEGER DEFAULT 0'),
+    ('user_progress', 'total_lessons', 'INTEGER DEFAULT 0'),
+]
+
+
+def sqlite_path_from_url(database_url: str) -> str:
+    """Turn a sqlite:/// DATABASE_URL into a filesystem path for sqlite3"""
+    if database_url.startswith('sqlite:///'):
+        return database_url[len('sqlite:///'):] or ':memory:'
+    if database_url.startswith('sqlite://'):
+        return ':memory:'
+    raise ValueError(f"Unsupported DATABASE_URL: {database_url}")
+
+
+def split_sql_statements(sql: str):
+    """Split a SQL script into complete statements.
+
+    Blank and comment lines before a statement are dropped, so every
+    statement starts with its keyword and can be classified by it.
+    """
+    statements = []
+    buffer = ''
+    for line in sql.splitlines(keepends=True):
+        stripped = line.strip()
+        if not buffer and (not stripped or stripped.startswith('--')):
+            continue
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip())
+            buffer = ''
+    return statements
+
+
+class ConnectionPool:
+    """Fixed-size pool of SQLite connections shared by the API and the AI agents.
+
+    Every connection runs in WAL mode so readers never block the single writer,
+    and keeps a large statement cache so the repositories' constant SQL strings
+    are prepared once per connection and reused on every call.
+    """
+
+    def __init__(self, database_path: str, pool_size: int = 5, busy_timeout_ms: int = 5000,
+                 statement_cache_size: int = 256):
+        self.database_path = database_path
+        self.pool_size = pool_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.statement_cache_size = statement_cache_size
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+        self._created = 0
+        self._lock = threading.Lock()
+
+        # A private in-memory database is only visible to a single connection
+        if database_path == ':memory:':
+            self.pool_size = 1
+            self._pool = queue.LifoQueue(maxsize=1)
+
+        self._initialize_schema()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database_path,
+            timeout=self.busy_timeout_ms / 1000,
+            check_same_thread=False,
+            cached_statements=self.statement_cache_size,
+            isolation_level=None  # transactions are managed explicitly in transaction()
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        return conn
+
+    def _initialize_schema(self):
+        """Apply schema.sql; seed rows are only inserted into a fresh database"""
+        with open(SCHEMA_PATH, encoding='utf-8') as schema_file:
+            schema_sql = schema_file.read()
+
+        with self.connection() as conn:
+            existing = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'courses'"
+            ).fetchone()
+
+            if existing is None:
+                conn.executescript(schema_sql)
+            else:
+                self._migrate_columns(conn)
+                # Re-run only the idempotent DDL so new tables and indexes get created
+                # without re-inserting the sample log rows on every start
+                for statement in split_sql_statements(schema_sql):
+                    if statement.lstrip().upper().startswith('CREATE'):
+                        conn.execute(statement)
+
+    @staticmethod
+    def _migrate_columns(conn: sqlite3.Connection):
+        for table, column, definition in COLUMN_MIGRATIONS:
+            columns = {row['name'] for row in conn.execute(f"PRAGMA table_info({table})")}
+            if columns and column not in columns:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    def _acquire(self) -> sqlite3.Connection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return self._connect()
+
+        return self._pool.get()
+
+    def _release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        self._pool.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the with-block"""
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """Borrow a connection and run the with-block in a single write transaction"""
+        with self.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def close(self):
+        """Close every idle connection in the pool"""
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._created -= 1
+
+
+_default_pool = None
+_default_pool_lock = threading.Lock()
+
+
+def get_pool(config=None) -> ConnectionPool:
+    """Return the process-wide connection pool, creating it from config on first use"""
+    global _default_pool
+
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                if config is None:
+                    from config.config import get_config
+                    config = get_config()
+                _default_pool = ConnectionPool(
+                    sqlite_path_from_url(config.DATABASE_URL),
+                    pool_size=config.DATABASE_POOL_SIZE,
+                    busy_timeout_ms=config.DATABASE_BUSY_TIMEOUT_MS
+                )
+    return _default_pool
@@ -0,0 +1,144 @@
+from typing import Dict, List, Optional
+
+from database.course_query import LEVELS
+
+ANALYTICS_COLUMNS = """
+    c.course_id, c.title, c.level,
+    COALESCE(a.enrollments, 0) AS enrollments, COALESCE(a.sales, 0) AS sales,
+    COALESCE(a.revenue_cents, 0) AS revenue_cents, COALESCE(a.refunds, 0) AS refunds,
+    COALESCE(a.refunds_cents, 0) AS refunds_cents, COALESCE(a.rating_count, 0) AS rating_count,
+    COALESCE(a.rating_sum, 0) AS rating_sum, COALESCE(a.learners, 0) AS learners,
+    COALESCE(a.completed_learners, 0) AS completed_learners, COALESCE(a.time_spent_total, 0) AS time_spent_total,
+    a.updated_at
+"""
+
+SELECT_ANALYTICS = f"""
+    SELECT {ANALYTICS_COLUMNS}
+    FROM courses c LEFT JOIN course_analytics a ON a.course_id = c.course_id
+    WHERE c.is_active = 1 AND (:level IS NULL OR c.level = :level)
+    ORDER BY {{order}}, c.course_id
+    LIMIT :limit
+"""
+
+SELECT_COURSE_ANALYTICS = f"""
+    SELECT {ANALYTICS_COLUMNS}
+    FROM courses c LEFT JOIN course_analytics a ON a.course_id = c.course_id
+    WHERE c.course_id = ?
+"""
+
+# Sort keys accepted by list(); all are computed from the rollup row alone
+SORT_EXPRESSIONS = {
+    "revenue": "COALESCE(a.revenue_cents - a.refunds_cents, 0) DESC",
+    "enrollments": "COALESCE(a.enrollments, 0) DESC",
+    "completion_rate": "COALESCE(1.0 * a.completed_learners / NULLIF(a.learners, 0), 0) DESC",
+    "rating": "COALESCE(1.0 * a.rating_sum / NULLIF(a.rating_count, 0), 0) DESC",
+    "time_spent": "COALESCE(1.0 * a.time_spent_total / NULLIF(a.learners, 0), 0) DESC"
+}
+
+# Full recomputation from the source tables, used to seed the rollups for a
+# database that predates them (and to repair them if ever needed)
+REBUILD_ANALYTICS = """
+    INSERT INTO course_analytics (
+        course_id, enrollments, sales, revenue_cents, refunds, refunds_cents,
+        rating_count, rating_sum, learners, completed_learners, time_spent_total
+    )
+    SELECT
+        c.course_id,
+        COALESCE(e.enrollments, 0), COALESCE(s.sales, 0), COALESCE(s.revenue_cents, 0),
+        COALESCE(s.refunds, 0), COALESCE(s.refunds_cents, 0),
+        COALESCE(e.rating_count, 0), COALESCE(e.rating_sum, 0),
+        COALESCE(p.learners, 0), COALESCE(p.completed_learners, 0), COALESCE(p.time_spent_total, 0)
+    FROM courses c
+    LEFT JOIN (
+        SELECT course_id, SUM(is_active = 1) AS enrollments, COUNT(rating) AS rating_count,
+               COALESCE(SUM(rating), 0) AS rating_sum
+        FROM user_courses GROUP BY course_id
+    ) e ON e.course_id = c.course_id
+    LEFT JOIN (
+        SELECT oi.course_id, COUNT(*) AS sales,
+               SUM(CAST(ROUND(oi.price * oi.quantity * 100) AS INTEGER)) AS revenue_cents,
+               SUM(o.status = 'refunded') AS refunds,
+               SUM((o.status = 'refunded') * CAST(ROUND(oi.price * oi.quantity * 100) AS INTEGER)) AS refunds_cents
+        FROM order_items oi JOIN orders o ON o.order_id = oi.order_id
+        WHERE o.status IN ('completed', 'refunded')
+        GROUP BY oi.course_id
+    ) s ON s.course_id = c.course_id
+    LEFT JOIN (
+        SELECT course_id, COUNT(*) AS learners, SUM(completion_status = 'completed') AS completed_learners,
+               COALESCE(SUM(time_spent), 0) AS time_spent_total
+        FROM user_progress GROUP BY course_id
+    ) p ON p.course_id = c.course_id
+"""
+
+
+def _row_to_analytics(row) -> Dict:
+    learners = row["learners"]
+    return {
+        "course_id": row["course_id"],
+        "title": row["title"],
+        "level": row["level"].capitalize(),
+        "enrollments": row["enrollments"],
+        "sales": row["sales"],
+        "revenue": row["revenue_cents"] / 100,
+        "refunds": row["refunds"],
+        "refunded_amount": row["refunds_cents"] / 100,
+        "net_revenue": (row["revenue_cents"] - row["refunds_cents"]) / 100,
+        "rating_count": row["rating_count"],
+        "average_rating": round(row["rating_sum"] / row["rating_count"], 2) if row["rating_count"] else None,
+        "learners": learners,
+        "completed_learners": row["completed_learners"],
+        "completion_rate": round(row["completed_learners"] / learners * 100, 2) if learners else 0.0,
+        "average_time_spent": round(row["time_spent_total"] / learners, 1) if learners else 0.0,
+        "updated_at": row["updated_at"]
+    }
+
+
+class CourseAnalyticsStore:
+    """Per-course rollups read from the course_analytics table.
+
+    The rollups are maintained by triggers in schema.sql: every insert,
+    update or delete on user_courses, orders, order_items and
+    user_progress adds its delta to the course's row inside the same
+    transaction, so reads never aggregate the source tables and the
+    numbers are always consistent with the committed data.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def ensure_built(self) -> bool:
+        """Seed the rollups from the source tables if they have never been built"""
+        with self.pool.connection() as conn:
+            if conn.execute("SELECT 1 FROM course_analytics LIMIT 1").fetchone() is not None:
+                return False
+        with self.pool.transaction() as conn:
+            if conn.execute("SELECT 1 FROM course_analytics LIMIT 1").fetchone() is not None:
+                return False
+            conn.execute(REBUILD_ANALYTICS)
+        print("📊 Course analytics rollups built")
+        return True
+
+    def rebuild(self):
+        """Recompute every rollup from the source tables"""
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM course_analytics")
+            conn.execute(REBUILD_ANALYTICS)
+
+    def list(self, sort: str = "revenue", level: str = None, limit: int = 100) -> List[Dict]:
+        """Active courses' rollups; sort is one of SORT_EXPRESSIONS"""
+        if sort not in SORT_EXPRESSIONS:
+            raise ValueError(f"sort must be one of: {', '.join(SORT_EXPRESSIONS)}")
+        if level is not None:
+            # Levels are stored lowercase, as CourseQuery.from_args filters them
+            original, level = level, level.lower()
+            if level not in LEVELS:
+                raise ValueError(f"Unknown level: {original}")
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_ANALYTICS.format(order=SORT_EXPRESSIONS[sort]),
+                                {"level": level, "limit": limit}).fetchall()
+        return [_row_to_analytics(row) for row in rows]
+
+    def get(self, course_id: int) -> Optional[Dict]:
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_COURSE_ANALYTICS, (course_id,)).fetchone()
+        return _row_to_analytics(row) if row is not None else None
@@ -0,0 +1,180 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from models.course import Course
+
+
+class CourseIndex:
+    """In-process course store keyed by id, with secondary indexes on level and is_active.
+
+    Mirrors idx_courses_level / idx_courses_active from the schema so the API
+    can answer lookups with a dict access instead of scanning the catalog.
+    Writes go through to the CourseRepository and update the indexes in
+    place; writes made by other workers are picked up by polling the catalog
+    generation and reloading only the courses listed in the change log.
+
+    Courses returned from the index are shared: treat them as read-only and
+    persist changes through add()/save_many().
+    """
+
+    def __init__(self, repository, sync_interval_seconds: float = 1.0):
+        self.repository = repository
+        self.sync_interval_seconds = sync_interval_seconds
+        self._by_id: Dict[int, Course] = {}
+        self._by_level: Dict[str, Set[int]] = defaultdict(set)
+        self._active: Set[int] = set()
+        self._lock = threading.RLock()
+        self._generation = None
+        self._synced_at = 0.0
+
+    # ------------------------------------------------------------------
+    # Index maintenance
+    # ------------------------------------------------------------------
+    def _index(self, course: Course):
+        course_id = course.course_id
+        previous = self._by_id.get(course_id)
+        if previous is not None and previous.level != course.level:
+            self._by_level[previous.level.lower()].discard(course_id)
+
+        self._by_id[course_id] = course
+        self._by_level[course.level.lower()].add(course_id)
+        if course.is_active:
+            self._active.add(course_id)
+        else:
+            self._active.discard(course_id)
+
+    def _reload(self):
+        # Build the indexes off to the side and swap them in under the lock, so
+        # get() and count(), which read without it, never see them half-filled
+        generation = self.repository.generation()
+        by_id: Dict[int, Course] = {}
+        by_level: Dict[str, Set[int]] = defaultdict(set)
+        active: Set[int] = set()
+        for course in self.repository.iter_courses(include_inactive=True):
+            by_id[course.course_id] = course
+            by_level[course.level.lower()].add(course.course_id)
+            if course.is_active:
+                active.add(course.course_id)
+
+        with self._lock:
+            self._by_id, self._by_level, self._active = by_id, by_level, active
+            self._generation = generation
+
+    def sync(self, force: bool = False):
+        """Pick up catalog writes committed by other processes"""
+        now = time.monotonic()
+        if not force and self._generation is not None and now - self._synced_at < self.sync_interval_seconds:
+            return
+
+        with self._lock:
+            self._synced_at = now
+            if self._generation is None:
+                self._reload()
+                return
+
+            generation = self.repository.generation()
+            if generation == self._generation:
+                return
+
+            changed_ids = self.repository.changes_since(self._generation)
+            if changed_ids is None:
+                self._reload()
+                return
+
+            for course in self.repository.get_many(changed_ids):
+                self._index(course)
+            self._generation = generation
+
+    @property
+    def generation(self) -> int:
+        """Catalog generation the index currently reflects"""
+        self.sync()
+        return self._generation
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get(self, course_id: int) -> Optional[Course]:
+        """O(1) lookup by course id"""
+        self.sync()
+        return self._by_id.get(course_id)
+
+    def ids_for_level(self, level: str, active_only: bool = True) -> Set[int]:
+        """Ids of the courses at a level (secondary index on level)"""
+        self.sync()
+        with self._lock:
+            ids = set(self._by_level.get(level.lower(), ()))
+            return ids & self._active if active_only else ids
+
+    def active_ids(self) -> Set[int]:
+        """Ids of every active course (secondary index on is_active)"""
+        self.sync()
+        with self._lock:
+            return set(self._active)
+
+    def iter_courses(self, level: str = None, include_inactive: bool = False) -> Iterator[Course]:
+        """Courses in id order, filtered through the secondary indexes"""
+        self.sync()
+        with self._lock:
+            if level is not None:
+                ids = self.ids_for_level(level, active_only=not include_inactive)
+                courses = [self._by_id[course_id] for course_id in sorted(ids)]
+            else:
+                courses = [
+                    course for course in self._by_id.values()
+                    if include_inactive or course.course_id in self._active
+                ]
+        return iter(courses)
+
+    def list_courses(self, level: str = None, include_inactive: bool = False) -> List[Course]:
+        return list(self.iter_courses(level=level, include_inactive=include_inactive))
+
+    def query(self, query):
+        """Filtered, paginated listing; pushed down to SQLite so it can use the schema indexes"""
+        return self.repository.query_courses(query)
+
+    def count(self) -> int:
+        """Number of active courses"""
+        self.sync()
+        return len(self._active)
+
+    # ------------------------------------------------------------------
+    # Writes (write-through to the repository)
+    #
+    # The generation is not advanced here; instead the next read is forced to
+    # sync, replaying the change log so it re-reads these courses along with
+    # anything other workers wrote in the meantime.
+    # ------------------------------------------------------------------
+    def add(self, course: Course) -> Course:
+        self.sync()
+        with self._lock:
+            course = self.repository.add(course)
+            self._index(course)
+            self._synced_at = 0.0
+        return course
+
+    def save(self, course: Course) -> Course:
+        self.save_many([course])
+        return course
+
+    def save_many(self, courses: Iterable[Course]) -> int:
+        courses = list(courses)
+        self.sync()
+        with self._lock:
+            saved = self.repository.save_many(courses)
+            for course in courses:
+                self._index(course)
+            self._synced_at = 0.0
+        return saved
+
+    def deactivate(self, course_id: int):
+        self.sync()
+        with self._lock:
+            self.repository.deactivate(course_id)
+            course = self._by_id.get(course_id)
+            if course is not None:
+                course.is_active = False
+                self._index(course)
+            self._synced_at = 0.0
@@ -0,0 +1,218 @@
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+# API field name -> courses column
+FIELD_COLUMNS = {
+    "id": "course_id",
+    "title": "title",
+    "description": "description",
+    "level": "level",
+    "price": "price",
+    "currency": "currency",
+    "duration": "duration",
+    "lessons": "lessons",
+    "image": "image_url",
+    "features": "features",
+    "curriculum": "curriculum",
+    "ai_instructors": "ai_instructors",
+    "reviews": "reviews",
+    "ai_generated": "ai_generated",
+    "last_updated": "last_updated",
+    "next_update": "next_update",
+    "content_version": "content_version",
+    "is_active": "is_active",
+    "ai_agents_used": "ai_agents_used",
+    "market_context": "market_context",
+    "optimized_strategies": "optimized_strategies",
+    "ai_improvements": "ai_improvements"
+}
+
+JSON_FIELDS = {
+    "features", "curriculum", "ai_instructors", "reviews", "ai_agents_used",
+    "market_context", "optimized_strategies", "ai_improvements"
+}
+BOOLEAN_FIELDS = {"ai_generated", "is_active"}
+
+SORT_COLUMNS = {
+    "id": "course_id",
+    "price": "price",
+    "title": "title",
+    "level": "level",
+    "last_updated": "last_updated"
+}
+
+LEVELS = {"beginner", "intermediate", "advanced"}
+
+
+def encode_cursor(values: List[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list) or len(values) != 2:
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def _parse_bool(value: str) -> bool:
+    lowered = value.lower()
+    if lowered in ("1", "true", "yes"):
+        return True
+    if lowered in ("0", "false", "no"):
+        return False
+    raise ValueError(f"Invalid boolean value: {value}")
+
+
+class CourseQuery:
+    """Filters, sort order, keyset cursor and field projection for /api/courses.
+
+    Everything is translated into a single SQL statement so the filters use
+    idx_courses_active / idx_courses_level_price, pagination seeks straight to
+    the cursor position instead of OFFSET-scanning, and only the requested
+    columns are read and decoded.
+    """
+
+    def __init__(self,
+                 level: str = None,
+                 min_price: float = None,
+                 max_price: float = None,
+                 ai_generated: bool = None,
+                 sort: str = "id",
+                 descending: bool = False,
+                 fields: List[str] = None,
+                 limit: int = 50,
+                 cursor: str = None):
+        self.level = level
+        self.min_price = min_price
+        self.max_price = max_price
+        self.ai_generated = ai_generated
+        self.sort = sort
+        self.descending = descending
+        self.fields = fields or list(FIELD_COLUMNS)
+        self.limit = limit
+        self.cursor = cursor
+
+    @classmethod
+    def from_args(cls, args, default_limit: int = 50, max_limit: int = 200) -> 'CourseQuery':
+        """Build a query from request args, raising ValueError on bad input"""
+        level = args.get("level")
+        if level is not None:
+            level = level.lower()
+            if level not in LEVELS:
+                raise ValueError(f"Unknown level: {args.get('level')}")
+
+        try:
+            min_price = float(args["min_price"]) if "min_price" in args else None
+            max_price = float(args["max_price"]) if "max_price" in args else None
+            limit = int(args.get("limit", default_limit))
+        except ValueError:
+            raise ValueError("min_price, max_price and limit must be numbers")
+        if limit < 1:
+            raise ValueError("limit must be positive")
+
+        ai_generated = _parse_bool(args["ai_generated"]) if "ai_generated" in args else None
+
+        sort = args.get("sort", "id")
+        descending = sort.startswith("-")
+        sort = sort.lstrip("-")
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"Cannot sort by: {sort}")
+
+        fields = None
+        if args.get("fields"):
+            fields = [field.strip() for field in args["fields"].split(",") if field.strip()]
+            unknown = [field for field in fields if field not in FIELD_COLUMNS]
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+        cursor = args.get("cursor")
+        if cursor:
+            decode_cursor(cursor)
+
+        return cls(
+            level=level,
+            min_price=min_price,
+            max_price=max_price,
+            ai_generated=ai_generated,
+            sort=sort,
+            descending=descending,
+            fields=fields,
+            limit=min(limit, max_limit),
+            cursor=cursor
+        )
+
+    def cache_key(self) -> Tuple:
+        """Normalized form of the query, used as a response cache key"""
+        return (
+            "courses", self.level, self.min_price, self.max_price, self.ai_generated,
+            self.sort, self.descending, tuple(self.fields), self.limit, self.cursor
+        )
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        """Compile the query into SQL and parameters"""
+        sort_column = SORT_COLUMNS[self.sort]
+        columns = [FIELD_COLUMNS[field] for field in self.fields]
+        # The sort key and id are always read so the next cursor can be built
+        for column in (sort_column, "course_id"):
+            if column not in columns:
+                columns.append(column)
+
+        where = ["is_active = 1"]
+        params: List[Any] = []
+        if self.level is not None:
+            where.append("level = ?")
+            params.append(self.level)
+        if self.min_price is not None:
+            where.append("price >= ?")
+            params.append(self.min_price)
+        if self.max_price is not None:
+            where.append("price <= ?")
+            params.append(self.max_price)
+        if self.ai_generated is not None:
+            where.append("ai_generated = ?")
+            params.append(1 if self.ai_generated else 0)
+
+        if self.cursor:
+            after_value, after_id = decode_cursor(self.cursor)
+            comparison = "<" if self.descending else ">"
+            if sort_column == "course_id":
+                where.append(f"course_id {comparison} ?")
+                params.append(after_id)
+            else:
+                where.append(f"({sort_column}, course_id) {comparison} (?, ?)")
+                params.extend([after_value, after_id])
+
+        direction = "DESC" if self.descending else "ASC"
+        order_by = f"course_id {direction}" if sort_column == "course_id" \
+            else f"{sort_column} {direction}, course_id {direction}"
+
+        sql = (
+            f"SELECT {', '.join(columns)} FROM courses "
+            f"WHERE {' AND '.join(where)} ORDER BY {order_by} LIMIT ?"
+        )
+        # Fetch one extra row to learn whether there is a next page
+        params.append(self.limit + 1)
+        return sql, params
+
+    def project(self, row) -> Dict[str, Any]:
+        """Turn a result row into the sparse API representation"""
+        course = {}
+        for field in self.fields:
+            value = row[FIELD_COLUMNS[field]]
+            if field in JSON_FIELDS:
+                value = json.loads(value) if value else ({} if field == "market_context" else [])
+            elif field in BOOLEAN_FIELDS:
+                value = bool(value)
+            elif field == "level":
+                value = value.capitalize()
+            course[field] = value
+        return course
+
+    def next_cursor(self, last_row) -> Optional[str]:
+        return encode_cursor([last_row[SORT_COLUMNS[self.sort]], last_row["course_id"]])
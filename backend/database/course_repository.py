@@ -0,0 +1,355 @@
+import json
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from database.course_search import reindex_courses
+from models.course import Course, CourseModule, Lesson, LessonLayout
+
+# Columns holding JSON documents, mapped to the Course attribute they hydrate
+JSON_COLUMNS = {
+    "features": "features",
+    "curriculum": "curriculum",
+    "ai_instructors": "ai_instructors",
+    "reviews": "reviews",
+    "ai_agents_used": "ai_agents_used",
+    "market_context": "market_context",
+    "optimized_strategies": "optimized_strategies",
+    "ai_improvements": "ai_improvements"
+}
+
+COURSE_COLUMNS = (
+    "course_id, title, description, level, price, currency, duration, lessons, image_url, "
+    "features, curriculum, ai_instructors, reviews, ai_generated, content_version, "
+    "last_updated, next_update, ai_agents_used, market_context, optimized_strategies, "
+    "ai_improvements, is_active"
+)
+
+# Constant SQL strings: sqlite3 prepares each once per pooled connection and reuses it
+SELECT_COURSE = f"SELECT {COURSE_COLUMNS} FROM courses WHERE course_id = ?"
+SELECT_ACTIVE_COURSES = f"SELECT {COURSE_COLUMNS} FROM courses WHERE is_active = 1 ORDER BY course_id"
+SELECT_ALL_COURSES = f"SELECT {COURSE_COLUMNS} FROM courses ORDER BY course_id"
+SELECT_COURSES_BY_LEVEL = (
+    f"SELECT {COURSE_COLUMNS} FROM courses WHERE level = ? AND is_active = 1 ORDER BY course_id"
+)
+SELECT_COURSES_BY_IDS = (
+    f"SELECT {COURSE_COLUMNS} FROM courses WHERE course_id IN (SELECT value FROM json_each(?))"
+)
+COUNT_ACTIVE_COURSES = "SELECT COUNT(*) FROM courses WHERE is_active = 1"
+
+INSERT_COURSE = """
+    INSERT INTO courses (
+        title, description, level, price, currency, duration, lessons, image_url,
+        features, curriculum, ai_instructors, reviews, ai_generated, content_version,
+        last_updated, next_update, ai_agents_used, market_context, optimized_strategies,
+        ai_improvements, is_active
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+UPDATE_COURSE = """
+    UPDATE courses SET
+        title = ?, description = ?, level = ?, price = ?, currency = ?, duration = ?,
+        lessons = ?, image_url = ?, features = ?, curriculum = ?, ai_instructors = ?,
+        reviews = ?, ai_generated = ?, content_version = ?, last_updated = ?, next_update = ?,
+        ai_agents_used = ?, market_context = ?, optimized_strategies = ?, ai_improvements = ?,
+        is_active = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE course_id = ?
+"""
+
+DEACTIVATE_COURSE = """
+    UPDATE courses SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE course_id = ?
+"""
+
+SELECT_MODULES = """
+    SELECT module_id, title, description, module_order
+    FROM course_modules WHERE course_id = ? ORDER BY module_order
+"""
+
+SELECT_MODULE_LESSONS = """
+    SELECT l.lesson_id, l.module_id, l.title, l.duration, l.content, l.lesson_type, l.lesson_order
+    FROM lessons l
+    JOIN course_modules m ON m.module_id = l.module_id
+    WHERE m.course_id = ?
+    ORDER BY m.module_order, l.lesson_order
+"""
+
+SELECT_LESSON_IDS = """
+    SELECT l.lesson_id FROM lessons l
+    JOIN course_modules m ON m.module_id = l.module_id
+    WHERE m.course_id = ?
+"""
+
+SELECT_LESSON_COUNT = "SELECT lessons FROM courses WHERE course_id = ?"
+
+INSERT_MODULE = """
+    INSERT INTO course_modules (course_id, title, description, module_order) VALUES (?, ?, ?, ?)
+"""
+
+INSERT_LESSON = """
+    INSERT INTO lessons (module_id, title, content, duration, lesson_type, lesson_order)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+BUMP_GENERATION = """
+    INSERT INTO catalog_state (state_id, generation) VALUES (1, 1)
+    ON CONFLICT(state_id) DO UPDATE SET generation = generation + 1, updated_at = CURRENT_TIMESTAMP
+    RETURNING generation
+"""
+
+SELECT_GENERATION = "SELECT generation FROM catalog_state WHERE state_id = 1"
+
+INSERT_CHANGE = "INSERT OR IGNORE INTO catalog_changes (generation, course_id) VALUES (?, ?)"
+
+PRUNE_CHANGES = "DELETE FROM catalog_changes WHERE generation <= ?"
+
+SELECT_CHANGES_SINCE = """
+    SELECT DISTINCT course_id FROM catalog_changes WHERE generation > ?
+"""
+
+SELECT_OLDEST_CHANGE = "SELECT MIN(generation) FROM catalog_changes"
+
+
+def _dump(value) -> Optional[str]:
+    return json.dumps(value) if value is not None else None
+
+
+def _load(value, default):
+    if value is None or value == '':
+        return default
+    return json.loads(value)
+
+
+class CourseRepository:
+    """Course catalog persisted in the courses / course_modules / lessons tables.
+
+    Every gunicorn worker talks to the same SQLite file through its own
+    ConnectionPool, so all workers see one consistent catalog and none of
+    them has to hold the whole catalog in memory.
+    """
+
+    def __init__(self, pool, change_log_size: int = 1000):
+        self.pool = pool
+        self.change_log_size = change_log_size
+
+    # ------------------------------------------------------------------
+    # Hydration
+    # ------------------------------------------------------------------
+    def _row_to_course(self, row) -> Course:
+        course = Course(
+            course_id=row["course_id"],
+            title=row["title"],
+            description=row["description"] or "",
+            level=row["level"].capitalize(),
+            price=row["price"],
+            currency=row["currency"] or "ZAR",
+            duration=row["duration"] or "",
+            lessons=row["lessons"] or 0,
+            image=row["image_url"] or "",
+            ai_generated=bool(row["ai_generated"]),
+            last_updated=row["last_updated"],
+            next_update=row["next_update"],
+            content_version=row["content_version"] or "1.0.0",
+            is_active=bool(row["is_active"])
+        )
+
+        for column, attribute in JSON_COLUMNS.items():
+            default = {} if attribute == "market_context" else []
+            setattr(course, attribute, _load(row[column], default))
+
+        return course
+
+    def _course_params(self, course: Course) -> tuple:
+        return (
+            course.title,
+            course.description,
+            course.level.lower(),
+            course.price,
+            course.currency,
+            course.duration,
+            course.lessons,
+            course.image,
+            _dump(course.features),
+            _dump(course.curriculum),
+            _dump(course.ai_instructors),
+            _dump(course.reviews),
+            1 if course.ai_generated else 0,
+            course.content_version,
+            course.last_updated,
+            course.next_update,
+            _dump(course.ai_agents_used),
+            _dump(course.market_context),
+            _dump(course.optimized_strategies),
+            _dump(course.ai_improvements),
+            1 if course.is_active else 0
+        )
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get(self, course_id: int) -> Optional[Course]:
+        """Fetch a single course by primary key"""
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_COURSE, (course_id,)).fetchone()
+        return self._row_to_course(row) if row else None
+
+    def get_many(self, course_ids: Iterable[int]) -> List[Course]:
+        """Fetch several courses with one statement, whatever the number of ids"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_COURSES_BY_IDS, (json.dumps(list(course_ids)),)).fetchall()
+        return [self._row_to_course(row) for row in rows]
+
+    def list_courses(self, level: str = None, include_inactive: bool = False) -> List[Course]:
+        """Return courses ordered by id, optionally restricted to one level"""
+        return list(self.iter_courses(level=level, include_inactive=include_inactive))
+
+    def iter_courses(self, level: str = None, include_inactive: bool = False,
+                     batch_size: int = 500) -> Iterator[Course]:
+        """Stream courses in batches instead of materialising the whole catalog"""
+        if level is not None:
+            sql, params = SELECT_COURSES_BY_LEVEL, (level.lower(),)
+        elif include_inactive:
+            sql, params = SELECT_ALL_COURSES, ()
+        else:
+            sql, params = SELECT_ACTIVE_COURSES, ()
+
+        with self.pool.connection() as conn:
+            cursor = conn.execute(sql, params)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._row_to_course(row)
+
+    def query_courses(self, query) -> Tuple[List[Dict], Optional[str]]:
+        """Run a CourseQuery; returns one page of projected courses and the next cursor"""
+        sql, params = query.to_sql()
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        has_more = len(rows) > query.limit
+        rows = rows[:query.limit]
+        next_cursor = query.next_cursor(rows[-1]) if has_more else None
+        return [query.project(row) for row in rows], next_cursor
+
+    def count(self) -> int:
+        """Number of active courses in the catalog"""
+        with self.pool.connection() as conn:
+            return conn.execute(COUNT_ACTIVE_COURSES).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Catalog generation
+    # ------------------------------------------------------------------
+    def generation(self) -> int:
+        """Current catalog generation; increases on every committed catalog write"""
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_GENERATION).fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, generation: int) -> Optional[List[int]]:
+        """Ids of courses changed after the given generation.
+
+        Returns None when the change log no longer reaches back that far,
+        in which case the caller has to reload the whole catalog.
+        """
+        with self.pool.connection() as conn:
+            oldest = conn.execute(SELECT_OLDEST_CHANGE).fetchone()[0]
+            if oldest is not None and generation < oldest - 1:
+                return None
+            rows = conn.execute(SELECT_CHANGES_SINCE, (generation,)).fetchall()
+        return [row[0] for row in rows]
+
+    def _record_changes(self, conn, course_ids: List[int]) -> int:
+        """Bump the generation, log the changed ids and refresh their search rows inside the caller's transaction"""
+        generation = conn.execute(BUMP_GENERATION).fetchone()[0]
+        conn.executemany(INSERT_CHANGE, [(generation, course_id) for course_id in course_ids])
+        conn.execute(PRUNE_CHANGES, (generation - self.change_log_size,))
+        reindex_courses(conn, course_ids)
+        return generation
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def add(self, course: Course) -> Course:
+        """Insert a new course; the database assigns its id"""
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(INSERT_COURSE, self._course_params(course))
+            course.course_id = cursor.lastrowid
+            self._record_changes(conn, [course.course_id])
+        return course
+
+    def save(self, course: Course) -> Course:
+        """Persist changes to an existing course"""
+        self.save_many([course])
+        return course
+
+    def save_many(self, courses: Iterable[Course]) -> int:
+        """Persist a batch of updated courses in a single transaction"""
+        courses = list(courses)
+        params = [self._course_params(course) + (course.course_id,) for course in courses]
+        if not params:
+            return 0
+
+        with self.pool.transaction() as conn:
+            conn.executemany(UPDATE_COURSE, params)
+            self._record_changes(conn, [course.course_id for course in courses])
+        return len(params)
+
+    def deactivate(self, course_id: int):
+        """Hide a course from the catalog without deleting purchase history"""
+        with self.pool.transaction() as conn:
+            conn.execute(DEACTIVATE_COURSE, (course_id,))
+            self._record_changes(conn, [course_id])
+
+    # ------------------------------------------------------------------
+    # Modules and lessons
+    # ------------------------------------------------------------------
+    def get_modules(self, course_id: int) -> List[CourseModule]:
+        """Load a course's modules with their lessons in two queries"""
+        with self.pool.connection() as conn:
+            module_rows = conn.execute(SELECT_MODULES, (course_id,)).fetchall()
+            lesson_rows = conn.execute(SELECT_MODULE_LESSONS, (course_id,)).fetchall()
+
+        modules: Dict[int, CourseModule] = {}
+        for row in module_rows:
+            modules[row["module_id"]] = CourseModule(
+                module_id=row["module_id"],
+                title=row["title"],
+                description=row["description"] or "",
+                order=row["module_order"]
+            )
+
+        for row in lesson_rows:
+            modules[row["module_id"]].add_lesson(Lesson(
+                lesson_id=row["lesson_id"],
+                title=row["title"],
+                duration=row["duration"] or 0,
+                content=row["content"] or "",
+                lesson_type=row["lesson_type"],
+                order=row["lesson_order"]
+            ))
+
+        return list(modules.values())
+
+    def add_module(self, course_id: int, module: CourseModule) -> CourseModule:
+        """Insert a module and its lessons; ids are assigned by the database"""
+        with self.pool.transaction() as conn:
+            cursor = conn.execute(INSERT_MODULE, (course_id, module.title, module.description, module.order))
+            module.module_id = cursor.lastrowid
+
+            for lesson in module.lessons:
+                cursor = conn.execute(INSERT_LESSON, (
+                    module.module_id, lesson.title, lesson.content, lesson.duration,
+                    lesson.lesson_type, lesson.order
+                ))
+                lesson.lesson_id = cursor.lastrowid
+            self._record_changes(conn, [course_id])
+
+        return module
+
+    def get_lesson_layout(self, course_id: int) -> Optional[LessonLayout]:
+        """Lesson ordinals for progress tracking; None for an unknown course"""
+        with self.pool.connection() as conn:
+            lesson_ids = [row[0] for row in conn.execute(SELECT_LESSON_IDS, (course_id,))]
+            if lesson_ids:
+                return LessonLayout(course_id, lesson_ids)
+            row = conn.execute(SELECT_LESSON_COUNT, (course_id,)).fetchone()
+        return LessonLayout.from_count(course_id, row[0]) if row else None
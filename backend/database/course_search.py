@@ -0,0 +1,169 @@
+import re
+from typing import Dict, Iterable, List, Optional
+
+DELETE_SEARCH_ROW = "DELETE FROM course_search WHERE rowid = ?"
+DELETE_FACET_ROW = "DELETE FROM course_search_facets WHERE course_id = ?"
+
+# One search row per active course: features are flattened from their JSON
+# array, lessons combine lesson-table titles with the text of the curriculum
+SEARCH_ROWS = """
+    INSERT INTO course_search (rowid, title, description, features, lessons)
+    SELECT
+        c.course_id, c.title, c.description,
+        (SELECT group_concat(value, ' ') FROM json_each(COALESCE(c.features, '[]'))),
+        (SELECT group_concat(title, ' ') FROM (
+            SELECT l.title FROM lessons l JOIN course_modules m ON m.module_id = l.module_id
+            WHERE m.course_id = c.course_id
+            UNION ALL
+            SELECT value FROM json_tree(COALESCE(c.curriculum, '[]')) WHERE type = 'text'
+        ))
+    FROM courses c
+    WHERE c.is_active = 1
+"""
+
+FACET_ROWS = """
+    INSERT INTO course_search_facets (course_id, level, price)
+    SELECT course_id, level, price FROM courses WHERE is_active = 1
+"""
+
+INSERT_SEARCH_ROW = SEARCH_ROWS + "    AND c.course_id = ?\n"
+INSERT_FACET_ROW = FACET_ROWS + "    AND course_id = ?\n"
+
+# Column weights for bm25(): title, description, features, lessons
+SEARCH_RESULTS = """
+    SELECT s.rowid AS course_id, f.level, f.price, bm25(course_search, 10.0, 2.0, 4.0, 1.0) AS score
+    FROM course_search s JOIN course_search_facets f ON f.course_id = s.rowid
+    WHERE course_search MATCH :match
+      AND (:level IS NULL OR f.level = :level)
+      AND (:min_price IS NULL OR f.price >= :min_price)
+      AND (:max_price IS NULL OR f.price <= :max_price)
+    ORDER BY score, s.rowid
+    LIMIT :limit OFFSET :offset
+"""
+
+# Titles and highlighted snippets are only produced for the page being returned
+SEARCH_SNIPPETS = """
+    SELECT rowid AS course_id, title, snippet(course_search, 1, '<mark>', '</mark>', '…', 16) AS snippet
+    FROM course_search
+    WHERE course_search MATCH ? AND rowid IN ({placeholders})
+"""
+
+# Facets describe the whole match set, before the level and price filters,
+# so a client can show what each filter would narrow down to
+SEARCH_FACETS = """
+    SELECT f.level, f.price, COUNT(*) AS matches
+    FROM course_search s JOIN course_search_facets f ON f.course_id = s.rowid
+    WHERE course_search MATCH ?
+    GROUP BY f.level, f.price
+"""
+
+TERM = re.compile(r"\w+", re.UNICODE)
+
+
+def match_expression(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query: every word must match, as a prefix.
+
+    Words are quoted so FTS5 operators and punctuation in user input are
+    never interpreted; None if the text has no searchable words.
+    """
+    terms = TERM.findall(text or "")[:16]
+    return " ".join(f'"{term}"*' for term in terms) or None
+
+
+def reindex_courses(conn, course_ids: Iterable[int]):
+    """Refresh the search rows of the given courses inside the caller's transaction"""
+    for course_id in course_ids:
+        conn.execute(DELETE_SEARCH_ROW, (course_id,))
+        conn.execute(DELETE_FACET_ROW, (course_id,))
+        conn.execute(INSERT_SEARCH_ROW, (course_id,))
+        conn.execute(INSERT_FACET_ROW, (course_id,))
+
+
+class CourseSearch:
+    """Ranked full-text search over the catalog, backed by the course_search FTS5 table.
+
+    CourseRepository refreshes a course's rows in the same transaction as
+    every write that bumps the catalog generation, so the index never lags
+    behind what CourseGenerator and ContentUpdater save. Matching uses the
+    FTS5 prefix indexes (2 and 3 characters) and results are ranked by
+    bm25 with title matches weighted highest. Level and price come from
+    course_search_facets, so filtering and facet counts never read the
+    indexed documents; snippets are built for the returned page only.
+    """
+
+    def __init__(self, pool, price_buckets: List[float] = None):
+        self.pool = pool
+        self.price_buckets = sorted(price_buckets or [500, 1000, 1500])
+
+    def ensure_built(self) -> bool:
+        """Index the catalog if the search tables are empty (a new or pre-search database)"""
+        with self.pool.connection() as conn:
+            if conn.execute("SELECT 1 FROM course_search_facets LIMIT 1").fetchone() is not None:
+                return False
+        self.rebuild()
+        return True
+
+    def rebuild(self):
+        with self.pool.transaction() as conn:
+            conn.execute("DELETE FROM course_search")
+            conn.execute("DELETE FROM course_search_facets")
+            conn.execute(SEARCH_ROWS)
+            conn.execute(FACET_ROWS)
+            conn.execute("INSERT INTO course_search (course_search) VALUES ('optimize')")
+
+    def _price_bucket(self, price: float) -> str:
+        lower = 0
+        for upper in self.price_buckets:
+            if price < upper:
+                return f"{lower}-{upper}"
+            lower = upper
+        return f"{lower}+"
+
+    def search(self, text: str, level: str = None, min_price: float = None, max_price: float = None,
+               limit: int = 20, offset: int = 0) -> Dict:
+        """Ranked matches for text plus level and price facets over all matches"""
+        match = match_expression(text)
+        if match is None:
+            raise ValueError("Search text must contain at least one word")
+
+        params = {"match": match, "level": level, "min_price": min_price, "max_price": max_price,
+                  "limit": limit, "offset": offset}
+        with self.pool.connection() as conn:
+            rows = conn.execute(SEARCH_RESULTS, params).fetchall()
+            snippets = {}
+            if rows:
+                sql = SEARCH_SNIPPETS.format(placeholders=", ".join("?" * len(rows)))
+                snippets = {row["course_id"]: row for row in
+                            conn.execute(sql, [match] + [row["course_id"] for row in rows])}
+            facet_rows = conn.execute(SEARCH_FACETS, (match,)).fetchall()
+
+        levels: Dict[str, int] = {}
+        prices: Dict[str, int] = {}
+        total = 0
+        for row in facet_rows:
+            # Levels are stored lowercase; the API reports them capitalized like CourseRepository
+            label = row["level"].capitalize()
+            levels[label] = levels.get(label, 0) + row["matches"]
+            bucket = self._price_bucket(row["price"])
+            prices[bucket] = prices.get(bucket, 0) + row["matches"]
+            if ((level is None or row["level"] == level)
+                    and (min_price is None or row["price"] >= min_price)
+                    and (max_price is None or row["price"] <= max_price)):
+                total += row["matches"]
+
+        return {
+            "query": text,
+            "total": total,
+            "results": [
+                {
+                    "id": row["course_id"],
+                    "title": snippets[row["course_id"]]["title"],
+                    "level": row["level"].capitalize(),
+                    "price": row["price"],
+                    "snippet": snippets[row["course_id"]]["snippet"],
+                    "score": round(-row["score"], 4)
+                }
+                for row in rows
+            ],
+            "facets": {"level": levels, "price": prices}
+        }
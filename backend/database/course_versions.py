@@ -0,0 +1,226 @@
+import copy
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Structural diff operations, applied in order:
+#   ["set", path, value]      replace (or add) the value at path
+#   ["del", path]             remove the key at path
+#   ["append", path, values]  extend the list at path
+Diff = List[list]
+
+SNAPSHOT_TYPE = "snapshot"
+
+INSERT_VERSION = """
+    INSERT INTO course_update_history (
+        course_id, old_version, new_version, update_type, changes, ai_agents_used, market_conditions
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Diffs recorded since the course's most recent snapshot (NULL when it has none)
+SELECT_SNAPSHOT_STATE = """
+    SELECT
+        (SELECT MAX(update_id) FROM course_update_history
+         WHERE course_id = ? AND update_type = 'snapshot') AS snapshot_id,
+        (SELECT COUNT(*) FROM course_update_history
+         WHERE course_id = ? AND update_id > COALESCE(
+             (SELECT MAX(update_id) FROM course_update_history
+              WHERE course_id = ? AND update_type = 'snapshot'), 0)) AS diffs_since
+"""
+
+SELECT_VERSIONS = """
+    SELECT update_id, old_version, new_version, update_type, ai_agents_used, market_conditions, created_at
+    FROM course_update_history WHERE course_id = ? ORDER BY update_id DESC
+"""
+
+SELECT_VERSION_ROW = """
+    SELECT update_id FROM course_update_history
+    WHERE course_id = ? AND new_version = ? ORDER BY update_id DESC LIMIT 1
+"""
+
+SELECT_LATEST_ROW = """
+    SELECT update_id FROM course_update_history WHERE course_id = ? ORDER BY update_id DESC LIMIT 1
+"""
+
+# The nearest snapshot at or before the target, then every diff up to the target
+SELECT_REPLAY_ROWS = """
+    SELECT update_id, update_type, changes FROM course_update_history
+    WHERE course_id = ? AND update_id <= ? AND update_id >= (
+        SELECT MAX(update_id) FROM course_update_history
+        WHERE course_id = ? AND update_type = 'snapshot' AND update_id <= ?
+    )
+    ORDER BY update_id
+"""
+
+SELECT_OLDEST_KEPT = """
+    SELECT update_id, update_type, changes FROM course_update_history
+    WHERE course_id = ? ORDER BY update_id DESC LIMIT 1 OFFSET ?
+"""
+
+REWRITE_AS_SNAPSHOT = """
+    UPDATE course_update_history SET update_type = 'snapshot', changes = ? WHERE update_id = ?
+"""
+
+HAS_OLDER_VERSIONS = "SELECT EXISTS (SELECT 1 FROM course_update_history WHERE course_id = ? AND update_id < ?)"
+
+DELETE_OLDER_VERSIONS = "DELETE FROM course_update_history WHERE course_id = ? AND update_id < ?"
+
+
+def diff_documents(old, new, path: list = None) -> Diff:
+    """Structural diff between two JSON documents"""
+    path = path or []
+    if isinstance(old, dict) and isinstance(new, dict):
+        ops = []
+        for key, value in new.items():
+            if key not in old:
+                ops.append(["set", path + [key], value])
+            elif old[key] != value:
+                ops.extend(diff_documents(old[key], value, path + [key]))
+        ops.extend(["del", path + [key]] for key in old if key not in new)
+        return ops
+
+    if old == new:
+        return []
+    if isinstance(old, list) and isinstance(new, list) and len(new) > len(old) and new[:len(old)] == old:
+        return [["append", path, new[len(old):]]]
+    return [["set", path, new]]
+
+
+def apply_diff(document: Dict, diff: Diff) -> Dict:
+    """Apply a diff to a document in place and return it"""
+    for op in diff:
+        kind, path = op[0], op[1]
+        if not path:
+            if kind == "set":
+                document = copy.deepcopy(op[2])
+            elif kind == "append":
+                document.extend(copy.deepcopy(op[2]))
+            continue
+
+        parent = document
+        for key in path[:-1]:
+            parent = parent[key]
+        if kind == "set":
+            parent[path[-1]] = copy.deepcopy(op[2])
+        elif kind == "del":
+            parent.pop(path[-1], None)
+        elif kind == "append":
+            parent[path[-1]].extend(copy.deepcopy(op[2]))
+    return document
+
+
+class CourseVersionStore:
+    """Course version history kept as structural diffs in course_update_history.
+
+    The first update recorded for a course also stores the document it
+    started from as a snapshot. Every recorded update stores only the diff
+    from the previous version; every snapshot_interval-th version stores
+    the full document instead, so rebuilding any version replays at most
+    snapshot_interval - 1 diffs. Each course keeps at most
+    max_versions rows: older rows are deleted after the oldest survivor is
+    rewritten as a snapshot so it can still be rebuilt on its own.
+    """
+
+    def __init__(self, pool, max_versions: int = 10, snapshot_interval: int = 5):
+        self.pool = pool
+        self.max_versions = max_versions
+        self.snapshot_interval = snapshot_interval
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def record(self, course_id: int, old: Dict, new: Dict, update_type: str = "content",
+               ai_agents_used: List[str] = None, market_conditions: Dict = None) -> bool:
+        return self.record_many([(course_id, old, new)], update_type, ai_agents_used, market_conditions) > 0
+
+    def record_many(self, updates: Iterable[Tuple[int, Dict, Dict]], update_type: str = "content",
+                    ai_agents_used: List[str] = None, market_conditions: Dict = None) -> int:
+        """Record (course_id, old document, new document) updates in one transaction.
+
+        Updates that changed nothing are skipped; returns how many were recorded.
+        """
+        recorded = 0
+        with self.pool.transaction() as conn:
+            for course_id, old, new in updates:
+                diff = diff_documents(old, new)
+                if not diff:
+                    continue
+
+                state = conn.execute(SELECT_SNAPSHOT_STATE, (course_id, course_id, course_id)).fetchone()
+                if state["snapshot_id"] is None:
+                    # First update of this course: keep the document it started from as the base
+                    conn.execute(INSERT_VERSION, (
+                        course_id, None, old.get("content_version", "1.0.0"), SNAPSHOT_TYPE,
+                        json.dumps({"snapshot": old, "diff": []}), json.dumps([]), json.dumps({})
+                    ))
+                    state = {"diffs_since": 0}
+
+                if state["diffs_since"] + 1 >= self.snapshot_interval:
+                    row_type, changes = SNAPSHOT_TYPE, {"snapshot": new, "diff": diff}
+                else:
+                    row_type, changes = update_type, {"diff": diff}
+
+                conn.execute(INSERT_VERSION, (
+                    course_id,
+                    old.get("content_version"),
+                    new.get("content_version", "1.0.0"),
+                    row_type,
+                    json.dumps(changes),
+                    json.dumps(ai_agents_used or []),
+                    json.dumps(market_conditions or {})
+                ))
+                self._compact(conn, course_id)
+                recorded += 1
+        return recorded
+
+    def _compact(self, conn, course_id: int):
+        """Drop versions beyond max_versions, keeping the oldest survivor rebuildable"""
+        oldest = conn.execute(SELECT_OLDEST_KEPT, (course_id, self.max_versions - 1)).fetchone()
+        if oldest is None or not conn.execute(HAS_OLDER_VERSIONS, (course_id, oldest["update_id"])).fetchone()[0]:
+            return
+        if oldest["update_type"] != SNAPSHOT_TYPE:
+            changes = json.loads(oldest["changes"])
+            changes["snapshot"] = self._replay(conn, course_id, oldest["update_id"])
+            conn.execute(REWRITE_AS_SNAPSHOT, (json.dumps(changes), oldest["update_id"]))
+        conn.execute(DELETE_OLDER_VERSIONS, (course_id, oldest["update_id"]))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def list_versions(self, course_id: int) -> List[Dict]:
+        """Recorded versions of a course, newest first (metadata only)"""
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_VERSIONS, (course_id,)).fetchall()
+        return [
+            {
+                "update_id": row["update_id"],
+                "old_version": row["old_version"],
+                "version": row["new_version"],
+                "update_type": row["update_type"],
+                "ai_agents_used": json.loads(row["ai_agents_used"]) if row["ai_agents_used"] else [],
+                "market_conditions": json.loads(row["market_conditions"]) if row["market_conditions"] else {},
+                "created_at": row["created_at"]
+            }
+            for row in rows
+        ]
+
+    def get_version(self, course_id: int, version: str = None) -> Optional[Dict]:
+        """Rebuild the course document as of a content_version (latest if omitted)"""
+        with self.pool.connection() as conn:
+            if version is None:
+                row = conn.execute(SELECT_LATEST_ROW, (course_id,)).fetchone()
+            else:
+                row = conn.execute(SELECT_VERSION_ROW, (course_id, version)).fetchone()
+            if row is None:
+                return None
+            return self._replay(conn, course_id, row["update_id"])
+
+    @staticmethod
+    def _replay(conn, course_id: int, update_id: int) -> Optional[Dict]:
+        rows = conn.execute(SELECT_REPLAY_ROWS, (course_id, update_id, course_id, update_id)).fetchall()
+        if not rows:
+            return None
+
+        document = json.loads(rows[0]["changes"])["snapshot"]
+        for row in rows[1:]:
+            apply_diff(document, json.loads(row["changes"])["diff"])
+        return document
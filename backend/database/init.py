@@ -1 +1,20 @@
 # Database Package
+from .connection import ConnectionPool, get_pool
+from .course_repository import CourseRepository
+from .course_index import CourseIndex
+from .market_analysis_store import MarketAnalysisStore
+from .optimization_history import OptimizationHistory
+from .course_versions import CourseVersionStore
+from .order_store import OrderStore
+from .price_index import PriceIndex
+from .progress_store import ProgressStore
+from .course_analytics import CourseAnalyticsStore
+from .course_search import CourseSearch
+
+__all__ = [
+    'ConnectionPool', 'get_pool',
+    'CourseRepository', 'CourseIndex',
+    'MarketAnalysisStore', 'OptimizationHistory',
+    'CourseVersionStore', 'OrderStore', 'PriceIndex',
+    'ProgressStore', 'CourseAnalyticsStore', 'CourseSearch'
+]
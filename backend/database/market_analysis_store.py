@@ -0,0 +1,181 @@
+import json
+import threading
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Union
+
+INSERT_SNAPSHOT = """
+    INSERT OR IGNORE INTO market_analysis (
+        snapshot_id, timestamp, volatility_index, trend_direction, sector_performance,
+        trading_volume, market_sentiment, key_events, insights
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SNAPSHOT_COLUMNS = """
+    analysis_id, snapshot_id, timestamp, volatility_index, trend_direction, sector_performance,
+    trading_volume, market_sentiment, key_events, insights
+"""
+
+SELECT_SNAPSHOT = f"SELECT {SNAPSHOT_COLUMNS} FROM market_analysis WHERE snapshot_id = ?"
+
+SELECT_LATEST_SNAPSHOT = f"""
+    SELECT {SNAPSHOT_COLUMNS} FROM market_analysis ORDER BY timestamp DESC, analysis_id DESC LIMIT 1
+"""
+
+# Keyset pagination over idx_market_analysis_date so a long range is read in
+# bounded pages without holding a pooled connection for the whole iteration
+SELECT_SNAPSHOT_PAGE = f"""
+    SELECT {SNAPSHOT_COLUMNS} FROM market_analysis
+    WHERE timestamp >= ? AND timestamp < ? AND (timestamp, analysis_id) > (?, ?)
+    ORDER BY timestamp, analysis_id
+    LIMIT ?
+"""
+
+TimeBound = Union[datetime, str]
+
+
+def _iso(value: TimeBound) -> str:
+    """Normalize a bound to the ISO format snapshots are stored in.
+
+    The timestamp column has NUMERIC affinity, so a bare year such as
+    '2024' would be compared as a number; parsing first rules that out.
+    """
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    return value.isoformat()
+
+
+def _row_to_snapshot(row) -> Dict:
+    return {
+        "analysis_id": row["analysis_id"],
+        "snapshot_id": row["snapshot_id"],
+        "timestamp": row["timestamp"],
+        "volatility_index": row["volatility_index"],
+        "trend_direction": row["trend_direction"],
+        "sector_performance": json.loads(row["sector_performance"]) if row["sector_performance"] else {},
+        "trading_volume": row["trading_volume"],
+        "market_sentiment": row["market_sentiment"],
+        "key_events": json.loads(row["key_events"]) if row["key_events"] else [],
+        "insights": json.loads(row["insights"]) if row["insights"] else {}
+    }
+
+
+class MarketAnalysisStore:
+    """History of MarketAnalyzer snapshots in the market_analysis table.
+
+    record() only appends to an in-memory buffer; the buffer is written with
+    a single executemany() once it reaches batch_size or when the background
+    flusher wakes up every flush_interval_seconds, whichever comes first.
+    """
+
+    def __init__(self, pool, batch_size: int = 50, flush_interval_seconds: float = 5.0):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._buffer: List[tuple] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def record(self, snapshot: Dict, insights: Dict = None) -> str:
+        """Buffer a snapshot for writing; returns its snapshot_id"""
+        row = (
+            snapshot["snapshot_id"],
+            snapshot["timestamp"],
+            snapshot.get("volatility_index"),
+            snapshot.get("trend_direction"),
+            json.dumps(snapshot.get("sector_performance", {})),
+            snapshot.get("trading_volume"),
+            snapshot.get("market_sentiment"),
+            json.dumps(snapshot.get("key_events", [])),
+            json.dumps(insights or {})
+        )
+
+        with self._buffer_lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+
+        if full:
+            self.flush()
+        return snapshot["snapshot_id"]
+
+    def flush(self) -> int:
+        """Write every buffered snapshot in one transaction"""
+        with self._flush_lock:
+            with self._buffer_lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+
+            try:
+                with self.pool.transaction() as conn:
+                    conn.executemany(INSERT_SNAPSHOT, rows)
+            except Exception:
+                # Put the rows back so the next flush retries them
+                with self._buffer_lock:
+                    self._buffer = rows + self._buffer
+                raise
+            return len(rows)
+
+    def start(self):
+        """Start the periodic background flusher"""
+        if self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="market-analysis-flusher",
+                                         daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        """Stop the flusher and write whatever is still buffered"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ MarketAnalysisStore flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def get(self, snapshot_id: str) -> Optional[Dict]:
+        """Look up one snapshot by the id courses reference"""
+        self.flush()
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_SNAPSHOT, (snapshot_id,)).fetchone()
+        return _row_to_snapshot(row) if row else None
+
+    def latest(self) -> Optional[Dict]:
+        """Most recent persisted snapshot"""
+        self.flush()
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_LATEST_SNAPSHOT).fetchone()
+        return _row_to_snapshot(row) if row else None
+
+    def iter_snapshots(self, start: TimeBound, end: TimeBound, page_size: int = 200) -> Iterator[Dict]:
+        """Stream snapshots with start <= timestamp < end, oldest first"""
+        self.flush()
+        start, end = _iso(start), _iso(end)
+        after_timestamp, after_id = "", 0
+
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(
+                    SELECT_SNAPSHOT_PAGE, (start, end, after_timestamp, after_id, page_size)
+                ).fetchall()
+
+            for row in rows:
+                yield _row_to_snapshot(row)
+
+            if len(rows) < page_size:
+                return
+            after_timestamp, after_id = rows[-1]["timestamp"], rows[-1]["analysis_id"]
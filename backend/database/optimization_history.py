@@ -0,0 +1,226 @@
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Optional
+
+INSERT_RESULT = """
+    INSERT INTO optimization_history (
+        course_level, created_at, average_success_rate, sharpe_ratio, max_drawdown, result
+    ) VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_LATEST_FOR_LEVEL = """
+    SELECT result FROM optimization_history
+    WHERE course_level = ?
+    ORDER BY created_at DESC, history_id DESC
+    LIMIT 1
+"""
+
+SELECT_LEVELS = "SELECT DISTINCT course_level FROM optimization_history"
+
+
+class WindowStats:
+    """Per-level aggregates over a sliding time window, kept in fixed time buckets.
+
+    add() touches one bucket and stats() sums at most `buckets` buckets, so
+    both cost O(buckets) at worst no matter how many results arrive. Memory
+    is bounded by buckets x levels. Results expire one bucket at a time.
+    """
+
+    def __init__(self, window_seconds: float, buckets: int = 60, clock: Callable[[], float] = time.time):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = window_seconds / buckets
+        self.clock = clock
+        self._buckets = deque()  # (bucket_number, {level: aggregate})
+
+    def _expire(self, now: float):
+        oldest = int((now - self.window_seconds) // self.bucket_seconds)
+        while self._buckets and self._buckets[0][0] <= oldest:
+            self._buckets.popleft()
+
+    def add(self, level: str, success_rate: float, sharpe_ratio: float, max_drawdown: Optional[float]):
+        now = self.clock()
+        self._expire(now)
+        number = int(now // self.bucket_seconds)
+        if not self._buckets or self._buckets[-1][0] != number:
+            self._buckets.append((number, {}))
+
+        aggregate = self._buckets[-1][1].setdefault(
+            level, {"count": 0, "success_rate": 0.0, "sharpe_ratio": 0.0, "max_drawdown": None}
+        )
+        aggregate["count"] += 1
+        aggregate["success_rate"] += success_rate
+        aggregate["sharpe_ratio"] += sharpe_ratio
+        if max_drawdown is not None:
+            aggregate["max_drawdown"] = max(aggregate["max_drawdown"] or 0.0, max_drawdown)
+
+    def stats(self) -> Dict[str, Dict]:
+        self._expire(self.clock())
+        totals: Dict[str, Dict] = {}
+        for _, levels in self._buckets:
+            for level, aggregate in levels.items():
+                total = totals.setdefault(
+                    level, {"count": 0, "success_rate": 0.0, "sharpe_ratio": 0.0, "max_drawdown": None}
+                )
+                total["count"] += aggregate["count"]
+                total["success_rate"] += aggregate["success_rate"]
+                total["sharpe_ratio"] += aggregate["sharpe_ratio"]
+                if aggregate["max_drawdown"] is not None:
+                    total["max_drawdown"] = max(total["max_drawdown"] or 0.0, aggregate["max_drawdown"])
+
+        return {
+            level: {
+                "optimizations": total["count"],
+                "average_success_rate": round(total["success_rate"] / total["count"], 2),
+                "average_sharpe_ratio": round(total["sharpe_ratio"] / total["count"], 2),
+                "max_drawdown": total["max_drawdown"]
+            }
+            for level, total in totals.items()
+        }
+
+
+class OptimizationHistory:
+    """StrategyOptimizer results: a bounded ring in memory, everything in the database.
+
+    The newest max_entries results stay in a deque; every result is also
+    queued for the optimization_history table and written in batches by a
+    background flusher, the same way MarketAnalysisStore handles snapshots.
+    latest() answers from memory and only falls back to the table for a
+    level that has not been optimized since the process started.
+    """
+
+    def __init__(self, pool=None, max_entries: int = 500, batch_size: int = 50,
+                 flush_interval_seconds: float = 5.0, stats_window_seconds: float = 24 * 3600,
+                 clock: Callable[[], float] = time.time):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self._entries = deque(maxlen=max_entries)
+        self._latest: Dict[str, Dict] = {}
+        self._window = WindowStats(stats_window_seconds, clock=clock)
+        self._lock = threading.Lock()
+        self._pending: List[tuple] = []
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[Dict]:
+        with self._lock:
+            entries = list(self._entries)
+        return iter(entries)
+
+    @property
+    def max_entries(self) -> int:
+        return self._entries.maxlen
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def append(self, result: Dict):
+        level = result["course_level"]
+        metrics = result.get("performance_metrics", {})
+        row = (
+            level,
+            result["timestamp"],
+            metrics.get("average_success_rate"),
+            metrics.get("sharpe_ratio"),
+            metrics.get("max_drawdown"),
+            json.dumps(result)
+        )
+
+        with self._lock:
+            self._entries.append(result)
+            self._latest[level] = result
+            # Runs without price data have no metrics to average
+            if metrics.get("average_success_rate") is not None:
+                self._window.add(level, metrics["average_success_rate"], metrics["sharpe_ratio"],
+                                 metrics.get("max_drawdown"))
+            if self.pool is None:
+                return
+            self._pending.append(row)
+            full = len(self._pending) >= self.batch_size
+
+        if full:
+            self.flush()
+
+    def flush(self) -> int:
+        """Write queued results to the optimization_history table in one transaction"""
+        if self.pool is None:
+            return 0
+        with self._flush_lock:
+            with self._lock:
+                rows, self._pending = self._pending, []
+            if not rows:
+                return 0
+
+            try:
+                with self.pool.transaction() as conn:
+                    conn.executemany(INSERT_RESULT, rows)
+            except Exception:
+                with self._lock:
+                    self._pending = rows + self._pending
+                raise
+            return len(rows)
+
+    def start(self):
+        """Start the periodic background flusher"""
+        if self.pool is None or self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="optimization-history-flusher",
+                                         daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        """Stop the flusher and write whatever is still queued"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ OptimizationHistory flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    def latest(self, level: str) -> Optional[Dict]:
+        """Most recent result for a course level"""
+        with self._lock:
+            result = self._latest.get(level)
+        if result is not None or self.pool is None:
+            return result
+
+        self.flush()
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_LATEST_FOR_LEVEL, (level,)).fetchone()
+        if row is None:
+            return None
+
+        result = json.loads(row["result"])
+        with self._lock:
+            self._latest.setdefault(level, result)
+        return result
+
+    def latest_per_level(self) -> Dict[str, Dict]:
+        """Most recent result for every level that has one"""
+        levels = set(self._latest)
+        if self.pool is not None:
+            with self.pool.connection() as conn:
+                levels.update(row["course_level"] for row in conn.execute(SELECT_LEVELS))
+        return {level: self.latest(level) for level in sorted(levels)}
+
+    def window_stats(self) -> Dict:
+        """Per-level averages over the stats window for results recorded by this process"""
+        with self._lock:
+            levels = self._window.stats()
+        return {"window_seconds": self._window.window_seconds, "levels": levels}
@@ -0,0 +1,260 @@
+import json
+import sqlite3
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from models.order import Order, Payment
+
+# One lookup through idx_orders_idempotency and the payments primary key
+SELECT_SESSION_BY_KEY = """
+    SELECT p.gateway_response FROM orders o
+    JOIN payments p ON p.payment_id = o.payment_id
+    WHERE o.idempotency_key = ?
+"""
+
+SELECT_USER_ID = "SELECT user_id FROM users WHERE email = ?"
+
+# Checkout only knows an email; unknown buyers get a guest account with no password
+INSERT_GUEST_USER = """
+    INSERT OR IGNORE INTO users (email, first_name, last_name, password_hash) VALUES (?, 'Guest', '', '')
+"""
+
+INSERT_ORDER = """
+    INSERT INTO orders (
+        order_id, user_id, total_amount, currency, status, payment_method, payment_id,
+        billing_address, idempotency_key, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+INSERT_ORDER_ITEM = """
+    INSERT INTO order_items (order_id, course_id, course_title, price, quantity) VALUES (?, ?, ?, ?, ?)
+"""
+
+INSERT_PAYMENT = """
+    INSERT INTO payments (
+        payment_id, order_id, amount, currency, payment_method, status, gateway_response, created_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_PAYMENT = """
+    SELECT p.payment_id, p.order_id, p.amount, p.currency, p.payment_method, p.status,
+           p.gateway_response, p.processed_at, p.refund_amount, o.user_id
+    FROM payments p JOIN orders o ON o.order_id = p.order_id
+    WHERE p.payment_id = ?
+"""
+
+SELECT_ORDER_ITEMS = "SELECT course_id, course_title, price FROM order_items WHERE order_id = ? ORDER BY order_item_id"
+
+UPDATE_PAYMENT = """
+    UPDATE payments SET status = ?, gateway_response = ?, processed_at = ?, refund_amount = ?,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE payment_id = ?
+"""
+
+UPDATE_ORDER_STATUS = "UPDATE orders SET status = ?, updated_at = ? WHERE order_id = ?"
+
+# A failed or refunded checkout frees its key so retrying the same cart starts a new order
+RELEASE_IDEMPOTENCY_KEY = "UPDATE orders SET idempotency_key = NULL WHERE order_id = ?"
+
+# Keys derived from the cart (PaymentProcessor.checkout_key) only guard an open
+# order; once it completes, buying the same cart again is a new checkout
+RELEASE_DERIVED_IDEMPOTENCY_KEY = """
+    UPDATE orders SET idempotency_key = NULL WHERE order_id = ? AND idempotency_key LIKE 'cart-%'
+"""
+
+GRANT_COURSE = """
+    INSERT INTO user_courses (user_id, course_id, purchase_amount, currency, access_expiry)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, course_id) DO UPDATE SET
+        is_active = 1, access_expiry = excluded.access_expiry, updated_at = CURRENT_TIMESTAMP
+"""
+
+REVOKE_COURSE = """
+    UPDATE user_courses SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND course_id = ?
+"""
+
+# Allowed payment status changes; anything else (a late "failed" after a
+# success, a replayed event) is ignored
+PAYMENT_TRANSITIONS = {
+    "pending": {"completed", "failed"},
+    "failed": {"completed"},
+    "completed": {"refunded"},
+    "refunded": set()
+}
+
+ACCESS_DAYS = 365
+
+
+class IdempotencyConflict(ValueError):
+    """An idempotency key reused for a different checkout request"""
+
+
+class OrderStore:
+    """Checkout sessions persisted in the orders / order_items / payments tables.
+
+    A session is written as one order, its items and a pending payment in a
+    single transaction. The provider's checkout session is kept in the
+    payment's gateway_response, so a checkout retried with the same
+    idempotency key is answered by find_session() without touching the
+    provider or writing anything. The request's fingerprint is stored next
+    to it, and a key replayed with a different cart, amount or buyer raises
+    IdempotencyConflict instead of returning the other request's session.
+    """
+
+    def __init__(self, pool, access_days: int = ACCESS_DAYS):
+        self.pool = pool
+        self.access_days = access_days
+
+    def find_session(self, idempotency_key: str, fingerprint: str = None) -> Optional[Dict]:
+        """Checkout session previously created under an idempotency key for the same request"""
+        with self.pool.connection() as conn:
+            return self._find_session(conn, idempotency_key, fingerprint)
+
+    @staticmethod
+    def _find_session(conn, idempotency_key: str, fingerprint: str = None) -> Optional[Dict]:
+        row = conn.execute(SELECT_SESSION_BY_KEY, (idempotency_key,)).fetchone()
+        if row is None or not row["gateway_response"]:
+            return None
+        stored = json.loads(row["gateway_response"])
+        if fingerprint and stored.get("fingerprint") not in (None, fingerprint):
+            raise IdempotencyConflict("Idempotency key was already used for a different checkout")
+        return stored.get("session")
+
+    def create_session(self, idempotency_key: str, user_email: str, order: Order, payment: Payment,
+                       session: Dict, fingerprint: str = None) -> Dict:
+        """Persist a new checkout session, or return the one a concurrent retry already stored"""
+        with self.pool.transaction() as conn:
+            existing = self._find_session(conn, idempotency_key, fingerprint)
+            if existing is not None:
+                return existing
+
+            conn.execute(INSERT_GUEST_USER, (user_email,))
+            order.user_id = conn.execute(SELECT_USER_ID, (user_email,)).fetchone()["user_id"]
+            payment.payment_gateway_response = {"session": session, "fingerprint": fingerprint}
+
+            try:
+                conn.execute(INSERT_ORDER, (
+                    order.order_id, order.user_id, order.total_amount, order.currency, order.status,
+                    order.payment_method, order.payment_id, json.dumps(order.billing_address),
+                    idempotency_key, order.created_at, order.updated_at
+                ))
+                conn.executemany(INSERT_ORDER_ITEM, [
+                    (order.order_id, item.course_id, item.course_title, item.price, item.quantity)
+                    for item in order.items
+                ])
+                conn.execute(INSERT_PAYMENT, (
+                    payment.payment_id, payment.order_id, payment.amount, payment.currency,
+                    payment.payment_method, payment.status, json.dumps(payment.payment_gateway_response),
+                    payment.created_at
+                ))
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Cart contains unknown courses: {e}")
+        return session
+
+    def get_payment(self, payment_id: str) -> Optional[Dict]:
+        """Payment status and the courses it covers"""
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_PAYMENT, (payment_id,)).fetchone()
+            if row is None:
+                return None
+            return self._result(row, conn.execute(SELECT_ORDER_ITEMS, (row["order_id"],)).fetchall())
+
+    def complete_payment(self, payment_id: str, gateway_response: Dict = None) -> Optional[Dict]:
+        """Mark a payment and its order completed and grant the purchased courses.
+
+        Completing an already completed payment changes nothing and returns
+        the same result, so provider callbacks can safely be repeated.
+        """
+        with self.pool.transaction() as conn:
+            return self.transition_payment(conn, payment_id, "completed", gateway_response)
+
+    def transition_payment(self, conn, payment_id: str, status: str, gateway_response: Dict = None) -> Optional[Dict]:
+        """Move a payment (and its order) to status inside the caller's transaction.
+
+        Completion grants the order's courses and a refund revokes them. A
+        completion carrying a provider response must report the payment's
+        amount and currency, else ValueError is raised and nothing changes.
+        Transitions not in PAYMENT_TRANSITIONS leave the rows untouched; the
+        result reports whether anything changed under "applied". Returns
+        None for an unknown payment.
+        """
+        row = conn.execute(SELECT_PAYMENT, (payment_id,)).fetchone()
+        if row is None:
+            return None
+        items = conn.execute(SELECT_ORDER_ITEMS, (row["order_id"],)).fetchall()
+
+        payment = Payment(row["payment_id"], row["order_id"], row["amount"], row["currency"],
+                          row["payment_method"], row["status"])
+        payment.payment_gateway_response = json.loads(row["gateway_response"] or "{}")
+        payment.processed_at = row["processed_at"]
+        payment.refund_amount = row["refund_amount"]
+
+        if status not in PAYMENT_TRANSITIONS.get(payment.status, ()):
+            return {**self._result(row, items), "applied": False}
+        if status == "completed" and gateway_response is not None:
+            self._check_paid_amount(payment, gateway_response)
+
+        # The checkout session stays in gateway_response; provider details are kept next to it
+        responses = dict(payment.payment_gateway_response)
+        if status == "completed":
+            payment.mark_completed()
+        elif status == "failed":
+            payment.mark_failed((gateway_response or {}).get("error", "Payment failed"))
+        else:
+            payment.process_refund(payment.amount)
+        if gateway_response:
+            responses[status] = gateway_response
+        payment.payment_gateway_response = responses
+
+        now = datetime.now().isoformat()
+        conn.execute(UPDATE_PAYMENT, (payment.status, json.dumps(payment.payment_gateway_response),
+                                      payment.processed_at, payment.refund_amount, payment.payment_id))
+        conn.execute(UPDATE_ORDER_STATUS, (payment.status, now, payment.order_id))
+        if status == "completed":
+            access_expiry = self._access_expiry(payment.processed_at)
+            conn.executemany(GRANT_COURSE, [
+                (row["user_id"], item["course_id"], item["price"], payment.currency, access_expiry)
+                for item in items
+            ])
+            conn.execute(RELEASE_DERIVED_IDEMPOTENCY_KEY, (payment.order_id,))
+        elif status == "failed":
+            conn.execute(RELEASE_IDEMPOTENCY_KEY, (payment.order_id,))
+        elif status == "refunded":
+            conn.executemany(REVOKE_COURSE, [(row["user_id"], item["course_id"]) for item in items])
+            conn.execute(RELEASE_IDEMPOTENCY_KEY, (payment.order_id,))
+
+        result = self._result(row, items)
+        result.update(status=payment.status, processed_at=payment.processed_at,
+                      access_expires=self._access_expiry(payment.processed_at), applied=True)
+        return result
+
+    @staticmethod
+    def _check_paid_amount(payment: Payment, gateway_response: Dict):
+        """Raise ValueError unless the provider reports exactly the payment's amount and currency"""
+        amount, currency = gateway_response.get("amount"), gateway_response.get("currency")
+        try:
+            paid_cents = int(round(float(amount) * 100))
+        except (TypeError, ValueError):
+            raise ValueError(f"Payment {payment.payment_id} completion does not report an amount")
+        expected_cents = int(round(float(payment.amount) * 100))
+        if paid_cents != expected_cents or (currency or "").upper() != payment.currency.upper():
+            raise ValueError(f"Payment {payment.payment_id} completed for {amount} {currency}, "
+                             f"expected {payment.amount} {payment.currency}")
+
+    def _access_expiry(self, processed_at: Optional[str]) -> Optional[str]:
+        if not processed_at:
+            return None
+        return (datetime.fromisoformat(processed_at) + timedelta(days=self.access_days)).isoformat()
+
+    def _result(self, row, items) -> Dict:
+        return {
+            "payment_id": row["payment_id"],
+            "order_id": row["order_id"],
+            "user_id": row["user_id"],
+            "amount": row["amount"],
+            "currency": row["currency"],
+            "status": row["status"],
+            "processed_at": row["processed_at"],
+            "access_expires": self._access_expiry(row["processed_at"]) if row["status"] == "completed" else None,
+            "courses": [{"course_id": item["course_id"], "title": item["course_title"]} for item in items]
+        }
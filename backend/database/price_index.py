@@ -0,0 +1,119 @@
+import threading
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Dict, Iterable, List, Optional
+
+CENT = Decimal("0.01")
+
+
+def to_money(value) -> Decimal:
+    """Round a price to cents; floats go through str() so 899.1 stays 899.10"""
+    return Decimal(str(value)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class PriceEntry:
+    """Server-side price of one course at a catalog generation"""
+
+    __slots__ = ("course_id", "title", "level", "price", "currency")
+
+    def __init__(self, course_id: int, title: str, level: str, price: Decimal, currency: str):
+        self.course_id = course_id
+        self.title = title
+        self.level = level
+        self.price = price
+        self.currency = currency
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.course_id,
+            "title": self.title,
+            "level": self.level,
+            "price": float(self.price),
+            "currency": self.currency
+        }
+
+
+class Quote:
+    """Priced cart: the entries in cart order and their Decimal total"""
+
+    def __init__(self, entries: List[PriceEntry], generation: int):
+        self.entries = entries
+        self.generation = generation
+        self.currency = entries[0].currency if entries else None
+        self.total = sum((entry.price for entry in entries), Decimal("0.00"))
+
+    def to_dict(self) -> Dict:
+        return {
+            "items": [entry.to_dict() for entry in self.entries],
+            "total": float(self.total),
+            "currency": self.currency,
+            "catalog_generation": self.generation
+        }
+
+
+class PriceIndex:
+    """Prices of every active course, rebuilt whenever the catalog generation moves.
+
+    The index is an immutable {course_id: PriceEntry} dict tagged with the
+    generation it was built from. A rebuild swaps in a new dict rather than
+    mutating the old one, so a quote taken while the catalog is being
+    updated is priced entirely from one generation. Pricing a cart is a
+    single dict lookup per item with no database access.
+
+    A course's own price is used when it has one; otherwise the price is
+    base_price times the level's price_increment multiplier.
+    """
+
+    def __init__(self, catalog, base_price: float, price_increment: Dict[str, float]):
+        self.catalog = catalog
+        self.base_price = to_money(base_price)
+        self.price_increment = {level.lower(): Decimal(str(factor)) for level, factor in price_increment.items()}
+        self._snapshot = (None, {})
+        self._lock = threading.Lock()
+
+    def level_price(self, level: str) -> Decimal:
+        """Price of a course at a level from the base price and its multiplier"""
+        return to_money(self.base_price * self.price_increment.get(level.lower(), Decimal(1)))
+
+    def _build(self) -> Dict[int, PriceEntry]:
+        entries = {}
+        for course in self.catalog.iter_courses():
+            price = to_money(course.price) if course.price else self.level_price(course.level)
+            entries[course.course_id] = PriceEntry(course.course_id, course.title, course.level, price,
+                                                   course.currency)
+        return entries
+
+    def _current(self):
+        generation = self.catalog.generation
+        snapshot = self._snapshot
+        if snapshot[0] == generation:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot[0] != generation:
+                # Tagged with the generation read before building, so at worst
+                # a concurrent write triggers one extra rebuild on the next call
+                self._snapshot = (generation, self._build())
+            return self._snapshot
+
+    def get(self, course_id: int) -> Optional[PriceEntry]:
+        return self._current()[1].get(course_id)
+
+    def lookup(self, course_ids: Iterable[int]) -> Dict[int, PriceEntry]:
+        """Bulk lookup; ids that are unknown or inactive are left out"""
+        entries = self._current()[1]
+        return {course_id: entries[course_id] for course_id in course_ids if course_id in entries}
+
+    def quote(self, course_ids: Iterable[int]) -> Quote:
+        """Price a cart by course id; raises ValueError for unknown or inactive courses"""
+        generation, entries = self._current()
+        ordered = list(dict.fromkeys(course_ids))
+        missing = [course_id for course_id in ordered if course_id not in entries]
+        if missing:
+            raise ValueError(f"Unknown or unavailable courses: {missing}")
+        if not ordered:
+            raise ValueError("Cart is empty")
+
+        priced = [entries[course_id] for course_id in ordered]
+        if len({entry.currency for entry in priced}) > 1:
+            raise ValueError("Cart mixes currencies")
+        return Quote(priced, generation)
@@ -0,0 +1,231 @@
+import json
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from models.course import LessonLayout
+from models.user import UserProgress
+
+PROGRESS_COLUMNS = """
+    user_id, course_id, completion_status, progress_percentage, last_accessed, lessons_completed,
+    lessons_bitmap, completed_count, total_lessons, quiz_scores, time_spent, achievements, created_at
+"""
+
+SELECT_PROGRESS = f"SELECT {PROGRESS_COLUMNS} FROM user_progress WHERE user_id = ? AND course_id = ?"
+
+UPSERT_PROGRESS = """
+    INSERT INTO user_progress (
+        user_id, course_id, completion_status, progress_percentage, last_accessed,
+        lessons_bitmap, completed_count, total_lessons
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (user_id, course_id) DO UPDATE SET
+        completion_status = excluded.completion_status,
+        progress_percentage = excluded.progress_percentage,
+        last_accessed = excluded.last_accessed,
+        lessons_bitmap = excluded.lessons_bitmap,
+        completed_count = excluded.completed_count,
+        total_lessons = excluded.total_lessons,
+        lessons_completed = NULL,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Heartbeat activity merged into a row: minutes are added, quiz scores
+# patched in, and last_accessed only moves forward. Rows created here start
+# with an empty bitmap so they never need the legacy JSON conversion.
+UPSERT_ACTIVITY = """
+    INSERT INTO user_progress (
+        user_id, course_id, completion_status, last_accessed, time_spent, quiz_scores,
+        lessons_bitmap, completed_count, total_lessons
+    ) VALUES (?, ?, 'in_progress', ?, ?, ?, X'', 0, ?)
+    ON CONFLICT (user_id, course_id) DO UPDATE SET
+        time_spent = COALESCE(user_progress.time_spent, 0) + excluded.time_spent,
+        last_accessed = MAX(COALESCE(user_progress.last_accessed, ''), excluded.last_accessed),
+        quiz_scores = json_patch(COALESCE(user_progress.quiz_scores, '{}'), excluded.quiz_scores),
+        completion_status = CASE
+            WHEN user_progress.completion_status = 'enrolled' THEN 'in_progress'
+            ELSE user_progress.completion_status
+        END,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# When a course's lesson count changes, every student's percentage is
+# recomputed from the stored counts in one statement
+RESCALE_COURSE = """
+    UPDATE user_progress SET
+        total_lessons = :total,
+        progress_percentage = ROUND(100.0 * MIN(completed_count, :total) / :total, 2),
+        completion_status = CASE
+            WHEN completed_count >= :total THEN 'completed'
+            WHEN completed_count > 0 THEN 'in_progress'
+            ELSE completion_status
+        END,
+        updated_at = CURRENT_TIMESTAMP
+    WHERE course_id = :course_id AND total_lessons != :total AND lessons_bitmap IS NOT NULL
+"""
+
+# Read-only check for rows RESCALE_COURSE would change, so reads only take
+# the write lock when the stored lesson count is actually stale
+HAS_STALE_TOTALS = """
+    SELECT 1 FROM user_progress
+    WHERE course_id = :course_id AND total_lessons != :total AND lessons_bitmap IS NOT NULL
+    LIMIT 1
+"""
+
+SELECT_COHORT = """
+    SELECT completion_status, COUNT(*) AS students, AVG(progress_percentage) AS average_progress
+    FROM user_progress WHERE course_id = ?
+    GROUP BY completion_status
+"""
+
+
+class ProgressStore:
+    """Lesson completions in user_progress, stored as per-course bitmaps.
+
+    Each row carries its bitmap, completed_count, total_lessons and
+    progress_percentage, so cohort queries aggregate plain columns and
+    never parse per-student JSON. Lesson layouts are cached per course and
+    reloaded when the catalog generation moves; when stored rows carry a
+    different lesson count than the course has, their percentages are
+    rescaled in one UPDATE.
+
+    Rows written before bitmaps existed are converted from their
+    lessons_completed JSON the first time they are updated.
+    """
+
+    def __init__(self, pool, repository, catalog):
+        self.pool = pool
+        self.repository = repository
+        self.catalog = catalog
+        self._layouts: Dict[int, Tuple[int, LessonLayout]] = {}
+        self._lock = threading.Lock()
+
+    def layout(self, course_id: int) -> Optional[LessonLayout]:
+        """Cached lesson layout of a course"""
+        generation = self.catalog.generation
+        cached = self._layouts.get(course_id)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+
+        layout = self.repository.get_lesson_layout(course_id)
+        if layout is None:
+            return None
+        with self._lock:
+            previous = self._layouts.get(course_id)
+            self._layouts[course_id] = (generation, layout)
+        if (previous is None or previous[1].total_lessons != layout.total_lessons) and layout.total_lessons:
+            params = {"total": layout.total_lessons, "course_id": course_id}
+            with self.pool.connection() as conn:
+                stale = conn.execute(HAS_STALE_TOTALS, params).fetchone() is not None
+            if stale:
+                with self.pool.transaction() as conn:
+                    conn.execute(RESCALE_COURSE, params)
+        return layout
+
+    def _hydrate(self, row, layout: LessonLayout) -> UserProgress:
+        if row["lessons_bitmap"] is None:
+            progress = UserProgress(row["user_id"], row["course_id"], layout)
+            for lesson_id in json.loads(row["lessons_completed"] or "[]"):
+                try:
+                    progress.complete_lesson(lesson_id)
+                except ValueError:
+                    pass  # lesson no longer part of the course
+        else:
+            progress = UserProgress(row["user_id"], row["course_id"], layout, row["lessons_bitmap"],
+                                    row["completed_count"])
+        if progress.completed_count == 0:
+            progress.completion_status = row["completion_status"]
+        progress.enrollment_date = row["created_at"]
+        progress.last_accessed = row["last_accessed"]
+        progress.quiz_scores = json.loads(row["quiz_scores"]) if row["quiz_scores"] else {}
+        progress.time_spent = row["time_spent"] or 0
+        progress.achievements = json.loads(row["achievements"]) if row["achievements"] else []
+        return progress
+
+    def get(self, user_id: int, course_id: int) -> Optional[UserProgress]:
+        layout = self.layout(course_id)
+        if layout is None:
+            return None
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_PROGRESS, (user_id, course_id)).fetchone()
+        return self._hydrate(row, layout) if row is not None else UserProgress(user_id, course_id, layout)
+
+    def complete_lesson(self, user_id: int, course_id: int, lesson_id: int) -> UserProgress:
+        """Mark a lesson completed; raises ValueError for an unknown user, course or lesson"""
+        layout = self.layout(course_id)
+        if layout is None:
+            raise ValueError(f"Course {course_id} not found")
+        layout.ordinal(lesson_id)
+
+        try:
+            with self.pool.transaction() as conn:
+                progress = self._complete_lessons(conn, user_id, course_id, layout, [lesson_id])
+        except sqlite3.IntegrityError:
+            raise ValueError(f"User {user_id} not found")
+        return progress
+
+    def _complete_lessons(self, conn, user_id: int, course_id: int, layout: LessonLayout,
+                          lesson_ids: Iterable[int]) -> UserProgress:
+        row = conn.execute(SELECT_PROGRESS, (user_id, course_id)).fetchone()
+        progress = self._hydrate(row, layout) if row is not None else UserProgress(user_id, course_id, layout)
+        changed = row is None or row["lessons_bitmap"] is None
+        for lesson_id in lesson_ids:
+            changed = progress.complete_lesson(lesson_id) or changed
+        if changed:
+            conn.execute(UPSERT_PROGRESS, (
+                user_id, course_id, progress.completion_status, progress.progress_percentage,
+                progress.last_accessed, bytes(progress.lessons_bitmap), progress.completed_count,
+                progress.total_lessons
+            ))
+        return progress
+
+    def apply_activity(self, activities: List[Dict]) -> Tuple[int, List[Tuple[int, int]]]:
+        """Write coalesced heartbeat activity in one transaction; returns (applied, rejected pairs).
+
+        Each activity is {user_id, course_id, last_accessed, minutes,
+        quiz_scores, lessons}. An activity that fails (unknown user, a course
+        or lesson that no longer exists) is rolled back to its savepoint and
+        dropped without failing the rest of the batch.
+        """
+        # Resolve layouts first: a changed layout rescales the course in its own transaction
+        layouts = {course_id: self.layout(course_id) for course_id in {a["course_id"] for a in activities}}
+        applied, rejected = 0, []
+        with self.pool.transaction() as conn:
+            for activity in activities:
+                layout = layouts[activity["course_id"]]
+                conn.execute("SAVEPOINT activity")
+                try:
+                    if layout is None:
+                        raise ValueError(f"Course {activity['course_id']} not found")
+                    if activity["lessons"]:
+                        self._complete_lessons(conn, activity["user_id"], activity["course_id"], layout,
+                                               activity["lessons"])
+                    conn.execute(UPSERT_ACTIVITY, (
+                        activity["user_id"], activity["course_id"], activity["last_accessed"],
+                        activity["minutes"], json.dumps(activity["quiz_scores"]), layout.total_lessons
+                    ))
+                except (ValueError, sqlite3.IntegrityError) as e:
+                    conn.execute("ROLLBACK TO activity")
+                    print(f"❌ Dropped progress for user {activity['user_id']}, course {activity['course_id']}: {e}")
+                    rejected.append((activity["user_id"], activity["course_id"]))
+                else:
+                    applied += 1
+                conn.execute("RELEASE activity")
+        return applied, rejected
+
+    def cohort_summary(self, course_id: int) -> Optional[Dict]:
+        """Students per completion status and average progress for a course"""
+        layout = self.layout(course_id)
+        if layout is None:
+            return None
+        with self.pool.connection() as conn:
+            rows = conn.execute(SELECT_COHORT, (course_id,)).fetchall()
+
+        students = sum(row["students"] for row in rows)
+        total_progress = sum(row["students"] * (row["average_progress"] or 0) for row in rows)
+        return {
+            "course_id": course_id,
+            "total_lessons": layout.total_lessons,
+            "students": students,
+            "average_progress": round(total_progress / students, 2) if students else 0.0,
+            "by_status": {row["completion_status"]: row["students"] for row in rows}
+        }
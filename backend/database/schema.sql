@@ -105,7 +105,10 @@ CREATE TABLE IF NOT EXISTS user_progress (
     completion_status VARCHAR(20) DEFAULT 'enrolled' CHECK (completion_status IN ('enrolled', 'in_progress', 'completed')),
     progress_percentage DECIMAL(5,2) DEFAULT 0.0,
     last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    lessons_completed JSON, -- Array of completed lesson IDs
+    lessons_completed JSON, -- legacy array of lesson IDs; converted to lessons_bitmap on first write
+    lessons_bitmap BLOB, -- bit n set = lesson with LessonLayout ordinal n completed
+    completed_count INTEGER DEFAULT 0,
+    total_lessons INTEGER DEFAULT 0,
     quiz_scores JSON, -- Object with quiz_id: score
     time_spent INTEGER DEFAULT 0, -- in minutes
     achievements JSON,
@@ -126,6 +129,7 @@ CREATE TABLE IF NOT EXISTS orders (
     payment_method VARCHAR(20),
     payment_id VARCHAR(100),
     billing_address JSON,
+    idempotency_key VARCHAR(100), -- client retry key; a retried checkout returns the same order
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
@@ -174,6 +178,21 @@ CREATE TABLE IF NOT EXISTS ai_agents_log (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Background Jobs (agent pipeline runs queued by the API)
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id VARCHAR(36) PRIMARY KEY,
+    job_type VARCHAR(50) NOT NULL,
+    status VARCHAR(20) DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+    payload JSON,
+    result JSON,
+    error TEXT,
+    attempts INTEGER DEFAULT 0,
+    lease_expires_at REAL, -- unix time; a running job past its lease is re-queued
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP,
+    finished_at TIMESTAMP
+);
+
 -- Course Update History
 CREATE TABLE IF NOT EXISTS course_update_history (
     update_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -191,6 +210,7 @@ CREATE TABLE IF NOT EXISTS course_update_history (
 -- Market Analysis Data
 CREATE TABLE IF NOT EXISTS market_analysis (
     analysis_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    snapshot_id VARCHAR(32), -- referenced from courses.market_context; unique via idx_market_analysis_snapshot
     timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     volatility_index DECIMAL(5,2),
     trend_direction VARCHAR(20),
@@ -202,22 +222,215 @@ CREATE TABLE IF NOT EXISTS market_analysis (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Strategy Optimization History (older results spilled from StrategyOptimizer's in-memory ring)
+CREATE TABLE IF NOT EXISTS optimization_history (
+    history_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    course_level VARCHAR(20) NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    average_success_rate DECIMAL(5,2),
+    sharpe_ratio DECIMAL(6,2),
+    max_drawdown DECIMAL(5,2),
+    result JSON NOT NULL
+);
+
+-- Catalog Generation (bumped on every catalog write so per-worker caches can detect changes)
+CREATE TABLE IF NOT EXISTS catalog_state (
+    state_id INTEGER PRIMARY KEY CHECK (state_id = 1),
+    generation INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Catalog Change Log (which courses changed in each generation)
+CREATE TABLE IF NOT EXISTS catalog_changes (
+    generation INTEGER NOT NULL,
+    course_id INTEGER NOT NULL,
+    PRIMARY KEY (generation, course_id)
+);
+
+-- Payment Provider Webhooks (verified events queued for the batch worker)
+CREATE TABLE IF NOT EXISTS webhook_events (
+    event_id VARCHAR(150) PRIMARY KEY, -- provider-prefixed event id; redeliveries are dropped
+    provider VARCHAR(20) NOT NULL,
+    event_type VARCHAR(100) NOT NULL,
+    payment_id VARCHAR(100) NOT NULL,
+    target_status VARCHAR(20) NOT NULL,
+    payload JSON,
+    status VARCHAR(20) DEFAULT 'queued' CHECK (status IN ('queued', 'processed', 'ignored', 'failed')),
+    attempts INTEGER DEFAULT 0,
+    error TEXT,
+    received_at REAL NOT NULL, -- unix time
+    processed_at TIMESTAMP
+);
+
+-- Course Analytics Rollups (kept current by the triggers below; rebuilt from source tables when empty)
+CREATE TABLE IF NOT EXISTS course_analytics (
+    course_id INTEGER PRIMARY KEY,
+    enrollments INTEGER NOT NULL DEFAULT 0, -- active user_courses rows
+    sales INTEGER NOT NULL DEFAULT 0, -- order items in completed or refunded orders
+    revenue_cents INTEGER NOT NULL DEFAULT 0, -- gross, before refunds
+    refunds INTEGER NOT NULL DEFAULT 0,
+    refunds_cents INTEGER NOT NULL DEFAULT 0,
+    rating_count INTEGER NOT NULL DEFAULT 0,
+    rating_sum INTEGER NOT NULL DEFAULT 0,
+    learners INTEGER NOT NULL DEFAULT 0, -- user_progress rows
+    completed_learners INTEGER NOT NULL DEFAULT 0,
+    time_spent_total INTEGER NOT NULL DEFAULT 0, -- minutes, summed over learners
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Course Search (FTS5 over active courses; refreshed with every catalog write)
+CREATE VIRTUAL TABLE IF NOT EXISTS course_search USING fts5(
+    title, description, features, lessons,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+-- Level and price of each indexed course, kept in a narrow table so search
+-- filters and facets don't read the FTS documents
+CREATE TABLE IF NOT EXISTS course_search_facets (
+    course_id INTEGER PRIMARY KEY,
+    level VARCHAR(20) NOT NULL,
+    price DECIMAL(10,2) NOT NULL
+);
+
 -- Indexes for better performance
 CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
 CREATE INDEX IF NOT EXISTS idx_users_registration ON users(registration_date);
 CREATE INDEX IF NOT EXISTS idx_courses_level ON courses(level);
 CREATE INDEX IF NOT EXISTS idx_courses_active ON courses(is_active);
+CREATE INDEX IF NOT EXISTS idx_courses_active_price ON courses(is_active, price);
+CREATE INDEX IF NOT EXISTS idx_courses_level_price ON courses(level, price);
 CREATE INDEX IF NOT EXISTS idx_user_courses_user ON user_courses(user_id);
 CREATE INDEX IF NOT EXISTS idx_user_courses_course ON user_courses(course_id);
 CREATE INDEX IF NOT EXISTS idx_user_progress_user_course ON user_progress(user_id, course_id);
+CREATE INDEX IF NOT EXISTS idx_user_progress_course ON user_progress(course_id, completion_status, progress_percentage);
 CREATE INDEX IF NOT EXISTS idx_orders_user ON orders(user_id);
 CREATE INDEX IF NOT EXISTS idx_orders_status ON orders(status);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_orders_idempotency ON orders(idempotency_key);
 CREATE INDEX IF NOT EXISTS idx_order_items_order ON order_items(order_id);
 CREATE INDEX IF NOT EXISTS idx_payments_order ON payments(order_id);
+CREATE INDEX IF NOT EXISTS idx_webhook_events_status ON webhook_events(status, received_at);
 CREATE INDEX IF NOT EXISTS idx_ai_agents_log_agent ON ai_agents_log(agent_name);
 CREATE INDEX IF NOT EXISTS idx_ai_agents_log_date ON ai_agents_log(created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, created_at);
 CREATE INDEX IF NOT EXISTS idx_course_updates_course ON course_update_history(course_id);
 CREATE INDEX IF NOT EXISTS idx_market_analysis_date ON market_analysis(timestamp);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_market_analysis_snapshot ON market_analysis(snapshot_id);
+CREATE INDEX IF NOT EXISTS idx_optimization_history_level ON optimization_history(course_level, created_at);
+
+-- Course analytics triggers: each source-row change adds its delta to the course's rollup
+CREATE TRIGGER IF NOT EXISTS trg_analytics_enrollment_insert AFTER INSERT ON user_courses
+BEGIN
+    INSERT INTO course_analytics (course_id, enrollments, rating_count, rating_sum)
+    VALUES (NEW.course_id, NEW.is_active = 1, NEW.rating IS NOT NULL, COALESCE(NEW.rating, 0))
+    ON CONFLICT (course_id) DO UPDATE SET
+        enrollments = enrollments + excluded.enrollments,
+        rating_count = rating_count + excluded.rating_count,
+        rating_sum = rating_sum + excluded.rating_sum,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analytics_enrollment_update AFTER UPDATE OF is_active, rating ON user_courses
+WHEN OLD.is_active IS NOT NEW.is_active OR OLD.rating IS NOT NEW.rating
+BEGIN
+    INSERT INTO course_analytics (course_id, enrollments, rating_count, rating_sum)
+    VALUES (
+        NEW.course_id,
+        (NEW.is_active = 1) - (OLD.is_active = 1),
+        (NEW.rating IS NOT NULL) - (OLD.rating IS NOT NULL),
+        COALESCE(NEW.rating, 0) - COALESCE(OLD.rating, 0)
+    )
+    ON CONFLICT (course_id) DO UPDATE SET
+        enrollments = enrollments + excluded.enrollments,
+        rating_count = rating_count + excluded.rating_count,
+        rating_sum = rating_sum + excluded.rating_sum,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analytics_enrollment_delete AFTER DELETE ON user_courses
+BEGIN
+    UPDATE course_analytics SET
+        enrollments = enrollments - (OLD.is_active = 1),
+        rating_count = rating_count - (OLD.rating IS NOT NULL),
+        rating_sum = rating_sum - COALESCE(OLD.rating, 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE course_id = OLD.course_id;
+END;
+
+-- Orders count as sales once completed (payment webhooks move orders.status with
+-- payments.status); a refund keeps the sale and adds to the refund totals
+CREATE TRIGGER IF NOT EXISTS trg_analytics_order_status AFTER UPDATE OF status ON orders
+WHEN OLD.status IS NOT NEW.status
+BEGIN
+    INSERT INTO course_analytics (course_id, sales, revenue_cents, refunds, refunds_cents)
+    SELECT
+        course_id,
+        ((NEW.status IN ('completed', 'refunded')) - (OLD.status IN ('completed', 'refunded'))) * COUNT(*),
+        ((NEW.status IN ('completed', 'refunded')) - (OLD.status IN ('completed', 'refunded')))
+            * SUM(CAST(ROUND(price * quantity * 100) AS INTEGER)),
+        ((NEW.status = 'refunded') - (OLD.status = 'refunded')) * COUNT(*),
+        ((NEW.status = 'refunded') - (OLD.status = 'refunded')) * SUM(CAST(ROUND(price * quantity * 100) AS INTEGER))
+    FROM order_items WHERE order_id = NEW.order_id
+    GROUP BY course_id
+    ON CONFLICT (course_id) DO UPDATE SET
+        sales = sales + excluded.sales,
+        revenue_cents = revenue_cents + excluded.revenue_cents,
+        refunds = refunds + excluded.refunds,
+        refunds_cents = refunds_cents + excluded.refunds_cents,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analytics_order_item_insert AFTER INSERT ON order_items
+WHEN (SELECT status FROM orders WHERE order_id = NEW.order_id) IN ('completed', 'refunded')
+BEGIN
+    INSERT INTO course_analytics (course_id, sales, revenue_cents, refunds, refunds_cents)
+    SELECT
+        NEW.course_id, 1, CAST(ROUND(NEW.price * NEW.quantity * 100) AS INTEGER),
+        status = 'refunded', (status = 'refunded') * CAST(ROUND(NEW.price * NEW.quantity * 100) AS INTEGER)
+    FROM orders WHERE order_id = NEW.order_id
+    ON CONFLICT (course_id) DO UPDATE SET
+        sales = sales + excluded.sales,
+        revenue_cents = revenue_cents + excluded.revenue_cents,
+        refunds = refunds + excluded.refunds,
+        refunds_cents = refunds_cents + excluded.refunds_cents,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analytics_progress_insert AFTER INSERT ON user_progress
+BEGIN
+    INSERT INTO course_analytics (course_id, learners, completed_learners, time_spent_total)
+    VALUES (NEW.course_id, 1, NEW.completion_status = 'completed', COALESCE(NEW.time_spent, 0))
+    ON CONFLICT (course_id) DO UPDATE SET
+        learners = learners + 1,
+        completed_learners = completed_learners + excluded.completed_learners,
+        time_spent_total = time_spent_total + excluded.time_spent_total,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analytics_progress_update AFTER UPDATE OF completion_status, time_spent ON user_progress
+WHEN OLD.completion_status IS NOT NEW.completion_status OR OLD.time_spent IS NOT NEW.time_spent
+BEGIN
+    INSERT INTO course_analytics (course_id, completed_learners, time_spent_total)
+    VALUES (
+        NEW.course_id,
+        (NEW.completion_status = 'completed') - (OLD.completion_status = 'completed'),
+        COALESCE(NEW.time_spent, 0) - COALESCE(OLD.time_spent, 0)
+    )
+    ON CONFLICT (course_id) DO UPDATE SET
+        completed_learners = completed_learners + excluded.completed_learners,
+        time_spent_total = time_spent_total + excluded.time_spent_total,
+        updated_at = CURRENT_TIMESTAMP;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_analytics_progress_delete AFTER DELETE ON user_progress
+BEGIN
+    UPDATE course_analytics SET
+        learners = learners - 1,
+        completed_learners = completed_learners - (OLD.completion_status = 'completed'),
+        time_spent_total = time_spent_total - COALESCE(OLD.time_spent, 0),
+        updated_at = CURRENT_TIMESTAMP
+    WHERE course_id = OLD.course_id;
+END;
 
 -- Insert initial AI Trading Courses
 INSERT OR IGNORE INTO courses (
@@ -1,7 +1,18 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Any
 import json
 
+VERSION_PARTS = ("major", "minor", "patch")
+
+def bump_version(version: str, part: str = "minor") -> str:
+    """Semantic version bump: 1.4.2 -> 1.5.0 for a minor bump"""
+    numbers = [int(n) for n in (version or "1.0.0").split(".")[:3]]
+    numbers += [0] * (3 - len(numbers))
+    index = VERSION_PARTS.index(part)
+    numbers[index] += 1
+    numbers[index + 1:] = [0] * (2 - index)
+    return ".".join(str(n) for n in numbers)
+
 class Course:
     def __init__(self, 
                  course_id: int,
@@ -20,7 +31,8 @@ class Course:
                  ai_generated: bool = True,
                  last_updated: str = None,
                  next_update: str = None,
-                 content_version: str = "1.0.0"):
+                 content_version: str = "1.0.0",
+                 is_active: bool = True):
         
         self.course_id = course_id
         self.title = title
@@ -39,6 +51,7 @@ class Course:
         self.last_updated = last_updated or datetime.now().strftime("%Y-%m-%d")
         self.next_update = next_update or (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
         self.content_version = content_version
+        self.is_active = is_active
         
         # AI-specific fields
         self.ai_agents_used = []
@@ -66,6 +79,7 @@ class Course:
             "last_updated": self.last_updated,
             "next_update": self.next_update,
             "content_version": self.content_version,
+            "is_active": self.is_active,
             "ai_agents_used": self.ai_agents_used,
             "market_context": self.market_context,
             "optimized_strategies": self.optimized_strategies,
@@ -75,7 +89,7 @@ class Course:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Course':
         """Create Course instance from dictionary"""
-        return cls(
+        course = cls(
             course_id=data.get("id", data.get("course_id")),
             title=data["title"],
             description=data["description"],
@@ -92,8 +106,16 @@ class Course:
             ai_generated=data.get("ai_generated", True),
             last_updated=data.get("last_updated"),
             next_update=data.get("next_update"),
-            content_version=data.get("content_version", "1.0.0")
+            content_version=data.get("content_version", "1.0.0"),
+            is_active=data.get("is_active", True)
         )
+        
+        # Restore AI-specific fields written by the agents
+        course.ai_agents_used = data.get("ai_agents_used", [])
+        course.market_context = data.get("market_context", {})
+        course.optimized_strategies = data.get("optimized_strategies", [])
+        course.ai_improvements = data.get("ai_improvements", [])
+        return course
     
     def update_content(self, new_version: str, updates: Dict[str, Any]):
         """Update course content with new version"""
@@ -157,3 +179,33 @@ class Lesson:
             "order": self.order,
             "completed": self.completed
       }
+
+class LessonLayout:
+    """Maps a course's lesson ids to dense ordinals 0..total_lessons-1.
+
+    Ordinals follow lesson_id order rather than module/lesson order so that
+    lessons added to an existing course (which always get higher ids) never
+    shift the ordinals of lessons students have already completed. Courses
+    without lesson rows fall back to their `lessons` count, with lesson
+    numbers 1..n standing in for ids.
+    """
+    
+    def __init__(self, course_id: int, lesson_ids: List[int]):
+        self.course_id = course_id
+        self.lesson_ids = sorted(lesson_ids)
+        self._ordinals = {lesson_id: ordinal for ordinal, lesson_id in enumerate(self.lesson_ids)}
+    
+    @classmethod
+    def from_count(cls, course_id: int, lessons: int) -> 'LessonLayout':
+        return cls(course_id, list(range(1, (lessons or 0) + 1)))
+    
+    @property
+    def total_lessons(self) -> int:
+        return len(self.lesson_ids)
+    
+    def ordinal(self, lesson_id: int) -> int:
+        """Ordinal of a lesson; raises ValueError for a lesson outside the course"""
+        try:
+            return self._ordinals[lesson_id]
+        except KeyError:
+            raise ValueError(f"Lesson {lesson_id} is not part of course {self.course_id}")
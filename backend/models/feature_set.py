@@ -0,0 +1,101 @@
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+DEFAULT_MAX_FEATURES = 12
+DEFAULT_MAX_MARKET_FEATURES = 3
+
+def feature_limits(config: Dict, level: str) -> Tuple[int, int]:
+    """(max_features, max_market_features) for a course level from COURSE_CONFIG['features']"""
+    config = config or {}
+    max_features = config.get("max_features", {}).get((level or "").lower(), DEFAULT_MAX_FEATURES)
+    return max_features, config.get("max_market_features", DEFAULT_MAX_MARKET_FEATURES)
+
+class FeatureSet:
+    """Ordered, deduplicated course features with a size cap.
+
+    Features are either regular (written by the course generator or the
+    content updater) or market-generated (written by the market analyzer
+    from the current snapshot). Both kinds live in insertion-ordered dicts,
+    so membership checks are O(1) and order is preserved. Market features
+    are replaced wholesale on every market update (the previous ones are
+    stale by definition) and are also the first to be evicted when a
+    regular feature needs room under max_features. A course never grows
+    past max(max_features, number of regular features it started with).
+    """
+
+    def __init__(self, features: Iterable[str] = (), market_features: Iterable[str] = (),
+                 max_features: int = DEFAULT_MAX_FEATURES, max_market_features: int = DEFAULT_MAX_MARKET_FEATURES):
+        self.max_features = max_features
+        self.max_market_features = max_market_features
+        self._regular: Dict[str, None] = dict.fromkeys(features)
+        self._market: Dict[str, None] = {}
+        for feature in market_features:
+            self._add_market(feature)
+
+    @classmethod
+    def from_course(cls, course: Dict, max_features: int = DEFAULT_MAX_FEATURES,
+                    max_market_features: int = DEFAULT_MAX_MARKET_FEATURES,
+                    market_prefixes: Tuple[str, ...] = ()) -> 'FeatureSet':
+        """Split a course's feature list using market_context["features"].
+
+        Features starting with one of market_prefixes are also treated as
+        market-generated, which cleans up courses written before market
+        features were tracked.
+        """
+        tracked = set(course.get("market_context", {}).get("features", []))
+        regular, market = [], []
+        for feature in course.get("features", []):
+            if feature in tracked or (market_prefixes and feature.startswith(market_prefixes)):
+                market.append(feature)
+            else:
+                regular.append(feature)
+        return cls(regular, market, max_features, max_market_features)
+
+    def __contains__(self, feature: str) -> bool:
+        return feature in self._regular or feature in self._market
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self._regular
+        yield from self._market
+
+    def __len__(self) -> int:
+        return len(self._regular) + len(self._market)
+
+    @property
+    def market_features(self) -> List[str]:
+        return list(self._market)
+
+    def add(self, feature: str) -> bool:
+        """Add a regular feature, evicting the oldest market feature if at the cap"""
+        if feature in self._regular:
+            return False
+        self._market.pop(feature, None)
+
+        while len(self) >= self.max_features and self._market:
+            del self._market[next(iter(self._market))]
+        if len(self) >= self.max_features:
+            return False
+
+        self._regular[feature] = None
+        return True
+
+    def replace_market_features(self, features: Iterable[str]):
+        """Drop every stale market feature and add the current ones"""
+        self._market.clear()
+        for feature in features:
+            self._add_market(feature)
+
+    def _add_market(self, feature: str):
+        if feature in self._regular or feature in self._market:
+            return
+        if len(self._market) >= self.max_market_features or len(self) >= self.max_features:
+            return
+        self._market[feature] = None
+
+    def to_list(self) -> List[str]:
+        return list(self)
+
+    def apply_to(self, course: Dict) -> Dict:
+        """Write the features back to a course dict, tracking the market ones"""
+        course["features"] = self.to_list()
+        course["market_context"] = {**course.get("market_context", {}), "features": self.market_features}
+        return course
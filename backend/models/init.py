@@ -1,10 +1,12 @@
 # Database Models Package
-from .course import Course, CourseModule, Lesson
+from .course import Course, CourseModule, Lesson, LessonLayout
 from .user import User, UserProgress, UserCourse
 from .order import Order, OrderItem, Payment
+from .feature_set import FeatureSet
 
 __all__ = [
-    'Course', 'CourseModule', 'Lesson',
+    'Course', 'CourseModule', 'Lesson', 'LessonLayout',
     'User', 'UserProgress', 'UserCourse', 
-    'Order', 'OrderItem', 'Payment'
+    'Order', 'OrderItem', 'Payment',
+    'FeatureSet'
 ]
@@ -53,17 +53,42 @@ class User:
         return self.preferences.get(key, default)
 
 class UserProgress:
-    def __init__(self, user_id: int, course_id: int):
+    """A student's progress through one course.
+    
+    Completed lessons are a bitmap indexed by the course's LessonLayout
+    ordinals (one bit per lesson, so a 30-lesson course takes 4 bytes), and
+    the completed count and percentage are updated as each lesson is marked
+    instead of being recounted. lessons_completed is derived from the bitmap.
+    """
+    
+    def __init__(self, user_id: int, course_id: int, layout: 'LessonLayout', lessons_bitmap: bytes = b"",
+                 completed_count: int = None):
         self.user_id = user_id
         self.course_id = course_id
+        self.layout = layout
         self.enrollment_date = datetime.now().isoformat()
         self.completion_status = "enrolled"  # enrolled, in_progress, completed
         self.progress_percentage = 0.0
         self.last_accessed = datetime.now().isoformat()
-        self.lessons_completed = []
+        self.lessons_bitmap = bytearray(lessons_bitmap)
+        self.completed_count = (completed_count if completed_count is not None
+                                else sum(bin(byte).count("1") for byte in self.lessons_bitmap))
         self.quiz_scores = {}
         self.time_spent = 0  # in minutes
         self.achievements = []
+        self._update_progress()
+    
+    @property
+    def total_lessons(self) -> int:
+        return self.layout.total_lessons
+    
+    @property
+    def lessons_completed(self) -> List[int]:
+        """Ids of the completed lessons, in ordinal order"""
+        return [
+            lesson_id for ordinal, lesson_id in enumerate(self.layout.lesson_ids)
+            if self._has_bit(ordinal)
+        ]
     
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -74,27 +99,44 @@ class UserProgress:
             "progress_percentage": self.progress_percentage,
             "last_accessed": self.last_accessed,
             "lessons_completed": self.lessons_completed,
+            "completed_count": self.completed_count,
+            "total_lessons": self.total_lessons,
             "quiz_scores": self.quiz_scores,
             "time_spent": self.time_spent,
             "achievements": self.achievements
         }
     
-    def complete_lesson(self, lesson_id: int):
-        """Mark lesson as completed"""
-        if lesson_id not in self.lessons_completed:
-            self.lessons_completed.append(lesson_id)
-            self._update_progress()
+    def _has_bit(self, ordinal: int) -> bool:
+        index = ordinal >> 3
+        return index < len(self.lessons_bitmap) and bool(self.lessons_bitmap[index] & (1 << (ordinal & 7)))
+    
+    def is_lesson_completed(self, lesson_id: int) -> bool:
+        return self._has_bit(self.layout.ordinal(lesson_id))
+    
+    def complete_lesson(self, lesson_id: int) -> bool:
+        """Mark lesson as completed; returns False if it already was"""
+        ordinal = self.layout.ordinal(lesson_id)
+        if self._has_bit(ordinal):
+            return False
+        
+        index = ordinal >> 3
+        if index >= len(self.lessons_bitmap):
+            self.lessons_bitmap.extend(bytes(index + 1 - len(self.lessons_bitmap)))
+        self.lessons_bitmap[index] |= 1 << (ordinal & 7)
+        self.completed_count += 1
+        self.last_accessed = datetime.now().isoformat()
+        self._update_progress()
+        return True
     
     def add_quiz_score(self, quiz_id: int, score: float):
         """Add quiz score"""
         self.quiz_scores[quiz_id] = score
     
     def _update_progress(self):
-        """Update overall progress percentage"""
-        # This would typically query the total lessons in the course
-        total_lessons = 12  # This should come from course data
+        """Update overall progress percentage from the completed count"""
+        total_lessons = self.total_lessons
         if total_lessons > 0:
-            self.progress_percentage = (len(self.lessons_completed) / total_lessons) * 100
+            self.progress_percentage = round(min(self.completed_count, total_lessons) / total_lessons * 100, 2)
             
             if self.progress_percentage >= 100:
                 self.completion_status = "completed"
@@ -0,0 +1,62 @@
+import json
+import time
+import uuid
+from typing import Dict, List, Tuple
+from urllib.parse import urlencode
+
+from .webhooks import payfast_signature, stripe_signature
+
+
+class FakePaymentProvider:
+    """Signed Stripe and PayFast webhook requests for local testing.
+
+    Each method returns (body, headers) ready to POST to the academy's
+    webhook endpoints, signed with the same secrets the app is configured
+    with, so the whole verify -> enqueue -> batch pipeline can be exercised
+    without either provider.
+    """
+
+    def __init__(self, stripe_webhook_secret: str, payfast_passphrase: str = "", payfast_merchant_id: str = "10000100"):
+        self.stripe_webhook_secret = stripe_webhook_secret
+        self.payfast_passphrase = payfast_passphrase
+        self.payfast_merchant_id = payfast_merchant_id
+
+    def stripe_event(self, payment_id: str, event_type: str = "checkout.session.completed", amount: float = 0,
+                     event_id: str = None, timestamp: int = None,
+                     payment_status: str = "paid") -> Tuple[bytes, Dict[str, str]]:
+        event = {
+            "id": event_id or f"evt_{uuid.uuid4().hex[:24]}",
+            "object": "event",
+            "type": event_type,
+            "created": int(time.time()),
+            "data": {
+                "object": {
+                    "id": f"cs_test_{uuid.uuid4().hex[:24]}",
+                    "object": "checkout.session",
+                    "client_reference_id": payment_id,
+                    "amount_total": int(round(amount * 100)),
+                    "currency": "zar",
+                    "payment_status": payment_status,
+                    "metadata": {"payment_id": payment_id}
+                }
+            }
+        }
+        body = json.dumps(event).encode("utf-8")
+        timestamp = timestamp if timestamp is not None else int(time.time())
+        signature = stripe_signature(body, self.stripe_webhook_secret, timestamp)
+        return body, {"Stripe-Signature": f"t={timestamp},v1={signature}", "Content-Type": "application/json"}
+
+    def payfast_notification(self, payment_id: str, amount: float, status: str = "COMPLETE",
+                             pf_payment_id: str = None) -> Tuple[bytes, Dict[str, str]]:
+        fields: List[Tuple[str, str]] = [
+            ("m_payment_id", payment_id),
+            ("pf_payment_id", pf_payment_id or str(uuid.uuid4().int)[:10]),
+            ("payment_status", status),
+            ("item_name", "AI Trading Academy order"),
+            ("amount_gross", f"{amount:.2f}"),
+            ("amount_fee", f"{-amount * 0.035:.2f}"),
+            ("amount_net", f"{amount * 0.965:.2f}"),
+            ("merchant_id", self.payfast_merchant_id)
+        ]
+        fields.append(("signature", payfast_signature(fields, self.payfast_passphrase)))
+        return urlencode(fields).encode("utf-8"), {"Content-Type": "application/x-www-form-urlencoded"}
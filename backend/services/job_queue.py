@@ -0,0 +1,240 @@
+import json
+import queue
+import threading
+import time
+import traceback
+import uuid
+from typing import Callable, Dict, Optional, Set
+
+from .tracing import tracer
+
+INSERT_JOB = """
+    INSERT INTO jobs (job_id, job_type, status, payload) VALUES (?, ?, 'queued', ?)
+"""
+
+CLAIM_JOB = """
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1, lease_expires_at = ?,
+        started_at = CURRENT_TIMESTAMP
+    WHERE job_id = (
+        SELECT job_id FROM jobs WHERE status = 'queued' ORDER BY created_at, job_id LIMIT 1
+    )
+    RETURNING job_id, job_type, payload, attempts
+"""
+
+RENEW_LEASE = "UPDATE jobs SET lease_expires_at = ? WHERE job_id = ? AND status = 'running'"
+
+COMPLETE_JOB = """
+    UPDATE jobs SET status = 'completed', result = ?, error = NULL, lease_expires_at = NULL,
+        finished_at = CURRENT_TIMESTAMP
+    WHERE job_id = ?
+"""
+
+FAIL_JOB = """
+    UPDATE jobs SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END,
+        error = ?, lease_expires_at = NULL,
+        finished_at = CASE WHEN attempts >= ? THEN CURRENT_TIMESTAMP ELSE NULL END
+    WHERE job_id = ?
+"""
+
+# Jobs whose worker died (process restart, crash) lose their lease and run
+# again if their type is retryable (a JSON array of job types)
+REQUEUE_EXPIRED = """
+    UPDATE jobs SET status = CASE
+            WHEN attempts >= ? OR job_type NOT IN (SELECT value FROM json_each(?)) THEN 'failed'
+            ELSE 'queued'
+        END,
+        error = 'Lease expired before the job finished', lease_expires_at = NULL
+    WHERE status = 'running' AND lease_expires_at < ?
+"""
+
+SELECT_JOB = """
+    SELECT job_id, job_type, status, payload, result, error, attempts,
+           created_at, started_at, finished_at
+    FROM jobs WHERE job_id = ?
+"""
+
+COUNT_PENDING = "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+
+
+class JobQueue:
+    """Background job subsystem for the agent pipelines.
+
+    Jobs are persisted in the jobs table, which is the source of truth: the
+    in-process queue only wakes the worker threads. Workers claim jobs with
+    an atomic UPDATE ... RETURNING, so several gunicorn workers can share one
+    table. A running job holds a lease that its process keeps renewing; if
+    the process dies the lease expires and the job is queued again, so a
+    restart does not lose in-flight work.
+
+    Only job types registered with retry=True are run again, after a
+    handler error or a lost lease, up to max_attempts; register a type as
+    retryable only if its handler is safe to re-run. Other jobs fail on
+    their first error.
+    """
+
+    def __init__(self, pool, workers: int = 2, poll_interval_seconds: float = 2,
+                 lease_seconds: float = 300, max_attempts: int = 3):
+        self.pool = pool
+        self.workers = workers
+        self.poll_interval_seconds = poll_interval_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.handlers: Dict[str, Callable[[Dict], Dict]] = {}
+        self.retryable: Set[str] = set()
+        self._wakeup = queue.Queue()
+        self._running_jobs = set()
+        self._running_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def register(self, job_type: str, handler: Callable[[Dict], Dict], retry: bool = False):
+        """Register the function that runs jobs of a type; it returns a JSON-able result"""
+        self.handlers[job_type] = handler
+        if retry:
+            self.retryable.add(job_type)
+        else:
+            self.retryable.discard(job_type)
+
+    def submit(self, job_type: str, payload: Dict = None) -> Dict:
+        """Persist a new job and wake a worker; returns immediately"""
+        if job_type not in self.handlers:
+            raise ValueError(f"Unknown job type: {job_type}")
+
+        job_id = str(uuid.uuid4())
+        with self.pool.transaction() as conn:
+            conn.execute(INSERT_JOB, (job_id, job_type, json.dumps(payload or {})))
+        self._wakeup.put(job_id)
+        return {"job_id": job_id, "job_type": job_type, "status": "queued"}
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Current state of a job, or None if the id is unknown"""
+        with self.pool.connection() as conn:
+            row = conn.execute(SELECT_JOB, (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "job_id": row["job_id"],
+            "job_type": row["job_type"],
+            "status": row["status"],
+            "payload": json.loads(row["payload"]) if row["payload"] else {},
+            "result": json.loads(row["result"]) if row["result"] else None,
+            "error": row["error"],
+            "attempts": row["attempts"],
+            "created_at": row["created_at"],
+            "started_at": row["started_at"],
+            "finished_at": row["finished_at"]
+        }
+
+    def pending_count(self) -> int:
+        """Jobs queued or running across all processes"""
+        with self.pool.connection() as conn:
+            return conn.execute(COUNT_PENDING).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start the worker threads and the lease keeper"""
+        if self._threads:
+            return
+        self._stop.clear()
+        self._requeue_expired()
+
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        keeper = threading.Thread(target=self._keep_leases, name="job-lease-keeper", daemon=True)
+        keeper.start()
+        self._threads.append(keeper)
+
+    def stop(self, timeout: float = None):
+        """Ask the threads to exit after their current job"""
+        self._stop.set()
+        for _ in range(self.workers):
+            self._wakeup.put(None)
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _claim(self) -> Optional[Dict]:
+        with self.pool.transaction() as conn:
+            row = conn.execute(CLAIM_JOB, (time.time() + self.lease_seconds,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row["job_id"],
+            "job_type": row["job_type"],
+            "payload": json.loads(row["payload"]) if row["payload"] else {},
+            "attempts": row["attempts"]
+        }
+
+    def run_pending(self) -> int:
+        """Claim and run queued jobs until none are left; returns how many ran"""
+        ran = 0
+        while not self._stop.is_set():
+            job = self._claim()
+            if job is None:
+                break
+            self._run(job)
+            ran += 1
+        return ran
+
+    def _run(self, job: Dict):
+        with self._running_lock:
+            self._running_jobs.add(job["job_id"])
+        try:
+            handler = self.handlers.get(job["job_type"])
+            if handler is None:
+                raise ValueError(f"No handler registered for {job['job_type']}")
+            # Every agent span recorded while the job runs shares the job id as its trace id
+            with tracer.trace(job["job_id"]):
+                result = handler(job["payload"])
+        except Exception as e:
+            print(f"❌ Job {job['job_id']} ({job['job_type']}) failed: {e}")
+            traceback.print_exc()
+            max_attempts = self.max_attempts if job["job_type"] in self.retryable else 1
+            with self.pool.transaction() as conn:
+                conn.execute(FAIL_JOB, (max_attempts, str(e), max_attempts, job["job_id"]))
+        else:
+            with self.pool.transaction() as conn:
+                conn.execute(COMPLETE_JOB, (json.dumps(result), job["job_id"]))
+        finally:
+            with self._running_lock:
+                self._running_jobs.discard(job["job_id"])
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                self._wakeup.get(timeout=self.poll_interval_seconds)
+            except queue.Empty:
+                pass  # poll anyway: other processes may have queued or re-queued jobs
+            try:
+                self.run_pending()
+            except Exception as e:
+                print(f"❌ Job worker error: {e}")
+                time.sleep(self.poll_interval_seconds)
+
+    def _requeue_expired(self):
+        with self.pool.transaction() as conn:
+            expired = conn.execute(REQUEUE_EXPIRED, (self.max_attempts, json.dumps(sorted(self.retryable)),
+                                                     time.time())).rowcount
+        if expired:
+            print(f"🔁 JobQueue re-queued or failed {expired} job(s) with expired leases")
+            self._wakeup.put(None)
+
+    def _keep_leases(self):
+        interval = max(1.0, self.lease_seconds / 3)
+        while not self._stop.wait(interval):
+            try:
+                with self._running_lock:
+                    running = list(self._running_jobs)
+                lease_expires_at = time.time() + self.lease_seconds
+                with self.pool.transaction() as conn:
+                    conn.executemany(RENEW_LEASE, [(lease_expires_at, job_id) for job_id in running])
+                self._requeue_expired()
+            except Exception as e:
+                print(f"❌ Job lease keeper error: {e}")
@@ -0,0 +1,174 @@
+import bisect
+import threading
+import weakref
+from typing import Callable, Dict, List, Sequence, Tuple
+
+# Seconds; roughly Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, str]) -> Labels:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Labels, extra: Tuple[str, str] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Shard:
+    """One thread's private counters; only that thread ever writes to it"""
+
+    def __init__(self):
+        self.thread = weakref.ref(threading.current_thread())
+        self.counters: Dict[tuple, float] = {}
+        self.gauges: Dict[tuple, float] = {}
+        self.histograms: Dict[tuple, list] = {}  # key -> [bucket counts..., sum, count]
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Recording never takes a lock: each thread updates its own shard (found
+    through threading.local), and render() adds the shards together at
+    scrape time. Shards of threads that have exited are folded into a
+    retired shard on the next scrape so short-lived request threads don't
+    accumulate. Gauges recorded this way are deltas (inc/dec), which suits
+    in-flight counts; values owned elsewhere, like catalog size or job
+    queue depth, are registered as callbacks and read on scrape.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._retired = _Shard()
+        self._metadata: Dict[str, Dict] = {}
+        self._callbacks: Dict[str, Callable[[], float]] = {}
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+    def counter(self, name: str, help_text: str):
+        self._metadata[name] = {"type": "counter", "help": help_text}
+
+    def gauge(self, name: str, help_text: str, callback: Callable[[], float] = None):
+        self._metadata[name] = {"type": "gauge", "help": help_text}
+        if callback is not None:
+            self._callbacks[name] = callback
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self._metadata[name] = {"type": "histogram", "help": help_text, "buckets": tuple(sorted(buckets))}
+
+    # ------------------------------------------------------------------
+    # Recording (hot path)
+    # ------------------------------------------------------------------
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+        return shard
+
+    def inc(self, name: str, labels: Dict[str, str] = None, value: float = 1.0):
+        counters = self._shard().counters
+        key = (name, _labels(labels))
+        counters[key] = counters.get(key, 0.0) + value
+
+    def add_gauge(self, name: str, value: float, labels: Dict[str, str] = None):
+        gauges = self._shard().gauges
+        key = (name, _labels(labels))
+        gauges[key] = gauges.get(key, 0.0) + value
+
+    def observe(self, name: str, value: float, labels: Dict[str, str] = None):
+        buckets = self._metadata[name]["buckets"]
+        histograms = self._shard().histograms
+        key = (name, _labels(labels))
+        state = histograms.get(key)
+        if state is None:
+            state = histograms[key] = [0] * (len(buckets) + 2)
+        state[bisect.bisect_left(buckets, value)] += 1  # non-cumulative; summed on render
+        state[-2] += value
+        state[-1] += 1
+
+    # ------------------------------------------------------------------
+    # Scrape
+    # ------------------------------------------------------------------
+    def _collect(self) -> _Shard:
+        with self._shards_lock:
+            live = []
+            for shard in self._shards:
+                if shard.thread() is None or not shard.thread().is_alive():
+                    self._merge(self._retired, shard)
+                else:
+                    live.append(shard)
+            self._shards = live
+
+            total = _Shard()
+            for shard in [self._retired] + live:
+                self._merge(total, shard)
+        return total
+
+    @staticmethod
+    def _merge(into: _Shard, shard: _Shard):
+        # dict.copy() is atomic under the GIL, so a concurrent writer can't break iteration
+        for key, value in shard.counters.copy().items():
+            into.counters[key] = into.counters.get(key, 0.0) + value
+        for key, value in shard.gauges.copy().items():
+            into.gauges[key] = into.gauges.get(key, 0.0) + value
+        for key, state in shard.histograms.copy().items():
+            state = list(state)
+            current = into.histograms.get(key)
+            into.histograms[key] = state if current is None else [a + b for a, b in zip(current, state)]
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+        total = self._collect()
+        lines = []
+        for name, meta in sorted(self._metadata.items()):
+            lines.append(f"# HELP {name} {meta['help']}")
+            lines.append(f"# TYPE {name} {meta['type']}")
+
+            if name in self._callbacks:
+                try:
+                    lines.append(f"{name} {_format_value(self._callbacks[name]())}")
+                except Exception as e:
+                    print(f"❌ Metric callback {name} failed: {e}")
+                continue
+
+            if meta["type"] == "histogram":
+                for (metric, labels), state in sorted(total.histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(meta["buckets"] + (float("inf"),), state[:-2]):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(state[-2])}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {state[-1]}")
+                continue
+
+            values = total.counters if meta["type"] == "counter" else total.gauges
+            for (metric, labels), value in sorted(values.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide registry; app.py registers the HTTP metrics and collectors
+metrics = MetricsRegistry()
@@ -0,0 +1,315 @@
+import os
+import queue
+import smtplib
+import threading
+import time
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Callable, Dict, Iterator, List, Optional
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'templates', 'email')
+
+# Keyset pagination over user_courses so a course with many students is
+# streamed in bounded pages instead of loaded at once
+SELECT_ENROLLED_PAGE = """
+    SELECT u.user_id, u.email, u.first_name, u.last_name
+    FROM user_courses uc JOIN users u ON u.user_id = uc.user_id
+    WHERE uc.course_id = ? AND uc.is_active = 1 AND u.is_active = 1 AND uc.user_id > ?
+    ORDER BY uc.user_id
+    LIMIT ?
+"""
+
+SELECT_USER = "SELECT user_id, email, first_name, last_name FROM users WHERE user_id = ?"
+
+
+def display_name(user) -> str:
+    name = f"{user['first_name'] or ''} {user['last_name'] or ''}".strip()
+    return name if name and name != "Guest" else "Trader"
+
+
+class TemplateRenderer:
+    """Email templates compiled once and kept in the Jinja environment's cache.
+
+    auto_reload is off, so after the first render (or preload()) a template
+    is never re-read or re-parsed; every later render is just the compiled
+    template's render call.
+    """
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            auto_reload=False,
+            cache_size=50
+        )
+
+    def preload(self, names: List[str]):
+        for name in names:
+            self.env.get_template(name)
+
+    def render(self, name: str, **context) -> str:
+        return self.env.get_template(name).render(**context)
+
+
+class SMTPConnectionPool:
+    """A few persistent SMTP connections shared by the notification senders.
+
+    Connections are opened lazily, reused across messages and replaced
+    when the server drops them or after max_messages_per_connection
+    (servers commonly cap messages per session).
+    """
+
+    def __init__(self, host: str, port: int, username: str = '', password: str = '', use_tls: bool = True,
+                 size: int = 2, timeout: float = 10, max_messages_per_connection: int = 100):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.timeout = timeout
+        self.max_messages_per_connection = max_messages_per_connection
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._slots = threading.BoundedSemaphore(size)
+        self.connections_opened = 0
+
+    def _connect(self) -> smtplib.SMTP:
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        if self.use_tls:
+            conn.starttls()
+        if self.username:
+            conn.login(self.username, self.password)
+        conn.sent = 0
+        self.connections_opened += 1
+        return conn
+
+    @staticmethod
+    def _close(conn: smtplib.SMTP):
+        try:
+            conn.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.close()
+
+    def send(self, message: EmailMessage):
+        """Send over a pooled connection; a broken connection is discarded and the error re-raised"""
+        with self._slots:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            try:
+                conn.send_message(message)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                conn.close()
+                raise
+            except smtplib.SMTPException:
+                self._release(conn)
+                raise
+            conn.sent += 1
+            self._release(conn)
+
+    def _release(self, conn: smtplib.SMTP):
+        if conn.sent >= self.max_messages_per_connection:
+            self._close(conn)
+        else:
+            self._idle.put_nowait(conn)
+
+    def close(self):
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._close(conn)
+
+
+class _Delivery:
+    """Outcome counters for one fan-out; finished once every message is sent or given up"""
+
+    def __init__(self):
+        self.queued = 0
+        self.sent = 0
+        self.failed = 0
+        self._lock = threading.Condition()
+
+    def done(self, ok: bool):
+        with self._lock:
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
+            self._lock.notify_all()
+
+    def wait(self, timeout: float = None) -> bool:
+        """Wait until every queued message has been sent or given up on"""
+        with self._lock:
+            return self._lock.wait_for(lambda: self.sent + self.failed >= self.queued, timeout)
+
+    def to_dict(self) -> Dict[str, int]:
+        return {"recipients": self.queued, "sent": self.sent, "failed": self.failed}
+
+
+class NotificationService:
+    """Course-update and purchase emails, rendered from cached templates and sent by a sender pool.
+
+    Producers (the notification job, the webhook worker) put rendered
+    messages on a bounded queue; sender threads, one per pooled SMTP
+    connection, take them off and deliver them. When the senders fall
+    behind the queue fills up and put() blocks, so a fan-out to thousands
+    of students never holds more than queue_size messages in memory.
+    A failed send is retried with exponential backoff up to max_attempts.
+    """
+
+    def __init__(self, pool, smtp_pool: SMTPConnectionPool, renderer: TemplateRenderer = None,
+                 from_email: str = 'noreply@aitradingacademy.com', from_name: str = 'AI Trading Academy',
+                 base_url: str = '', catalog=None, ai_agents: List[Dict] = None, batch_size: int = 200,
+                 queue_size: int = 1000, max_attempts: int = 3, retry_backoff_seconds: float = 1.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.pool = pool
+        self.smtp_pool = smtp_pool
+        self.renderer = renderer or TemplateRenderer()
+        self.renderer.preload(['course_update.html', 'purchase_confirmation.html'])
+        self.sender = formataddr((from_name, from_email))
+        self.base_url = base_url.rstrip('/')
+        self.catalog = catalog
+        self.ai_agents = ai_agents or []
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.sleep = sleep
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._threads: List[threading.Thread] = []
+
+    # ------------------------------------------------------------------
+    # Producers
+    # ------------------------------------------------------------------
+    def iter_enrolled(self, course_id: int) -> Iterator:
+        """Active students of a course, read batch_size rows at a time"""
+        last_user_id = 0
+        while True:
+            with self.pool.connection() as conn:
+                rows = conn.execute(SELECT_ENROLLED_PAGE, (course_id, last_user_id, self.batch_size)).fetchall()
+            yield from rows
+            if len(rows) < self.batch_size:
+                return
+            last_user_id = rows[-1]["user_id"]
+
+    def notify_course_updates(self, updates: List[Dict], timeout: float = None) -> Dict[str, int]:
+        """Email every enrolled student about each updated course and wait for delivery.
+
+        Each update is {course_id, title, new_version, next_update, updates}.
+        """
+        delivery = _Delivery()
+        agents = [
+            {"name": agent["name"], "version": agent["version"], "role": agent["role"],
+             "contribution": agent["description"]}
+            for agent in self.ai_agents
+        ]
+        for update in updates:
+            course_url = f"{self.base_url}/courses/{update['course_id']}"
+            for user in self.iter_enrolled(update["course_id"]):
+                html = self.renderer.render(
+                    'course_update.html',
+                    user_name=display_name(user),
+                    course_title=update["title"],
+                    new_version=update["new_version"],
+                    updates=update["updates"],
+                    ai_agents=agents,
+                    course_url=course_url,
+                    next_update_date=update.get("next_update") or ''
+                )
+                self._put(self._message(user["email"], f"Course updated: {update['title']}", html), delivery)
+        delivery.wait(timeout)
+        return delivery.to_dict()
+
+    def notify_payments(self, results: List[Dict]):
+        """Purchase confirmations for payments the webhook worker just completed"""
+        for result in results:
+            if result.get("status") != "completed" or not result.get("applied"):
+                continue
+            with self.pool.connection() as conn:
+                user = conn.execute(SELECT_USER, (result["user_id"],)).fetchone()
+            if user is None:
+                continue
+
+            courses = []
+            for item in result["courses"]:
+                course = self.catalog.get(item["course_id"]) if self.catalog is not None else None
+                courses.append({
+                    "title": item["title"],
+                    "level": course.level if course else '',
+                    "duration": course.duration if course else ''
+                })
+            html = self.renderer.render(
+                'purchase_confirmation.html',
+                user_name=display_name(user),
+                courses=courses,
+                total_amount=f"{result['amount']:.2f}",
+                order_id=result["order_id"],
+                purchase_date=(result["processed_at"] or '')[:10],
+                dashboard_url=f"{self.base_url}/dashboard"
+            )
+            self._put(self._message(user["email"], "Your AI Trading Academy purchase", html), None)
+
+    def _message(self, recipient: str, subject: str, html: str) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = recipient
+        message["Subject"] = subject
+        message.set_content("This email is best viewed in an HTML-capable client.")
+        message.add_alternative(html, subtype="html")
+        return message
+
+    def _put(self, message: EmailMessage, delivery: Optional[_Delivery]):
+        if delivery is not None:
+            delivery.queued += 1
+        self._queue.put((message, delivery))  # blocks while the senders are behind
+
+    # ------------------------------------------------------------------
+    # Senders
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._threads:
+            return
+        for i in range(self.smtp_pool.size):
+            thread = threading.Thread(target=self._send_loop, name=f"email-sender-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        """Send what is queued, then stop the senders and close the connections"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self.smtp_pool.close()
+
+    def _send_loop(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            message, delivery = item
+            ok = self._send_with_retry(message)
+            if delivery is not None:
+                delivery.done(ok)
+
+    def _send_with_retry(self, message: EmailMessage) -> bool:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.smtp_pool.send(message)
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                # 5xx replies (bad recipient, rejected content) won't succeed on a retry
+                if isinstance(e, smtplib.SMTPRecipientsRefused):
+                    permanent = all(code >= 500 for code, _ in e.recipients.values())
+                else:
+                    permanent = isinstance(e, smtplib.SMTPResponseException) and e.smtp_code >= 500
+                if permanent or attempt == self.max_attempts:
+                    print(f"❌ Email to {message['To']} failed after {attempt} attempts: {e}")
+                    return False
+                self.sleep(self.retry_backoff_seconds * 2 ** (attempt - 1))
+        return False
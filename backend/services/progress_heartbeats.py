@@ -0,0 +1,159 @@
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Tuple
+
+
+def _utc_timestamp() -> str:
+    """Current time in the same format as SQLite's CURRENT_TIMESTAMP"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class _Activity:
+    """Everything reported for one (user, course) since the last flush"""
+
+    __slots__ = ("seconds", "last_accessed", "quiz_scores", "lessons")
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.last_accessed = None
+        self.quiz_scores: Dict[str, float] = {}
+        self.lessons: List[int] = []
+
+
+class HeartbeatBuffer:
+    """Coalesces learner heartbeats in memory and flushes them as batched upserts.
+
+    Players report every few seconds; record() only folds the event into
+    the pending activity for its (user, course) pair, so a thousand
+    heartbeats from one learner become one row write. The background
+    flusher hands all pending activity to ProgressStore.apply_activity
+    every flush_interval_seconds, one transaction per flush. time_spent is
+    stored in whole minutes, so leftover seconds are carried in a separate
+    map until the pair's next heartbeats add up to another minute; stop()
+    writes the carried seconds rounded to the nearest minute.
+
+    If more than max_pending pairs are waiting, record() flushes inline,
+    which bounds memory and slows producers down instead of dropping data.
+    Carried seconds do not count towards max_pending.
+    """
+
+    def __init__(self, progress_store, flush_interval_seconds: float = 5.0, max_pending: int = 10000):
+        self.progress_store = progress_store
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self._pending: Dict[Tuple[int, int], _Activity] = {}
+        # Sub-minute remainders per pair (seconds, last heartbeat); only touched under _flush_lock
+        self._carry: Dict[Tuple[int, int], Tuple[float, str]] = {}
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def record(self, user_id: int, course_id: int, seconds: float = 0, lesson_id: int = None,
+               completed: bool = False, quiz_id=None, quiz_score: float = None):
+        """Fold one heartbeat into the pending activity for its user and course"""
+        with self._buffer_lock:
+            activity = self._pending.get((user_id, course_id))
+            if activity is None:
+                activity = self._pending[(user_id, course_id)] = _Activity()
+            activity.seconds += seconds
+            activity.last_accessed = _utc_timestamp()
+            if completed and lesson_id is not None and lesson_id not in activity.lessons:
+                activity.lessons.append(lesson_id)
+            if quiz_id is not None and quiz_score is not None:
+                activity.quiz_scores[str(quiz_id)] = quiz_score
+            full = len(self._pending) > self.max_pending
+
+        if full:
+            self.flush()
+
+    def pending_count(self) -> int:
+        return len(self._pending)
+
+    def carried_count(self) -> int:
+        return len(self._carry)
+
+    def flush(self, final: bool = False) -> int:
+        """Write all pending activity in one transaction; returns the rows applied.
+
+        With final=True the carried seconds of every pair are written too,
+        rounded to the nearest minute, and the carry map is emptied.
+        """
+        with self._flush_lock:
+            with self._buffer_lock:
+                pending, self._pending = self._pending, {}
+
+            batch = []
+            carry = {}
+            keys = list(pending) + ([key for key in self._carry if key not in pending] if final else [])
+            for key in keys:
+                activity = pending.get(key) or _Activity()
+                carried, carried_at = self._carry.get(key, (0.0, None))
+                seconds = activity.seconds + carried
+                last_accessed = activity.last_accessed or carried_at
+                if final:
+                    minutes, leftover = int(seconds / 60 + 0.5), 0.0
+                else:
+                    minutes, leftover = divmod(seconds, 60)
+                if leftover:
+                    carry[key] = (leftover, last_accessed)
+                if activity.last_accessed is None and not minutes:
+                    continue  # only leftover seconds; nothing new to write
+                batch.append({
+                    "user_id": key[0],
+                    "course_id": key[1],
+                    "last_accessed": last_accessed or _utc_timestamp(),
+                    "minutes": int(minutes),
+                    "quiz_scores": activity.quiz_scores,
+                    "lessons": activity.lessons
+                })
+
+            try:
+                applied, rejected = self.progress_store.apply_activity(batch) if batch else (0, [])
+            except Exception:
+                # Merge everything back so the next flush retries it; carries stay as they were
+                with self._buffer_lock:
+                    for key, activity in pending.items():
+                        self._merge_back(key, activity)
+                raise
+
+            for key in keys:
+                self._carry.pop(key, None)
+            for key in rejected:
+                carry.pop(key, None)
+            self._carry.update(carry)
+            return applied
+
+    def _merge_back(self, key: Tuple[int, int], older: _Activity):
+        newer = self._pending.get(key)
+        if newer is None:
+            self._pending[key] = older
+            return
+        newer.seconds += older.seconds
+        newer.last_accessed = newer.last_accessed or older.last_accessed
+        newer.quiz_scores = {**older.quiz_scores, **newer.quiz_scores}
+        newer.lessons = older.lessons + [lesson for lesson in newer.lessons if lesson not in older.lessons]
+
+    def start(self):
+        """Start the periodic background flusher"""
+        if self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="progress-heartbeat-flusher",
+                                         daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        """Stop the flusher and write whatever is still pending, carried seconds included"""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush(final=True)
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ HeartbeatBuffer flush failed: {e}")
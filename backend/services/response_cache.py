@@ -0,0 +1,106 @@
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+from flask import Response
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class CachedResponse:
+    """Encoded JSON body plus pre-compressed variants and their strong ETags"""
+
+    def __init__(self, body: bytes, min_compress_bytes: int = 1024):
+        self.body = body
+        digest = hashlib.sha256(body).hexdigest()[:32]
+
+        # Each encoding is a different byte sequence, so each gets its own strong ETag
+        self.variants = {"identity": (body, f'"{digest}"')}
+        if len(body) >= min_compress_bytes:
+            self.variants["gzip"] = (gzip.compress(body, compresslevel=6, mtime=0), f'"{digest}-gz"')
+            if brotli is not None:
+                self.variants["br"] = (brotli.compress(body), f'"{digest}-br"')
+
+        self.etags = {etag for _, etag in self.variants.values()}
+
+    def negotiate(self, accept_encodings) -> str:
+        """Pick the smallest variant the client accepts"""
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding
+        return "identity"
+
+
+class ResponseCache:
+    """Pre-serialized JSON responses keyed by endpoint and catalog generation.
+
+    The catalog endpoints only change when a course is generated or updated,
+    so the JSON (and its compressed forms) is built once per generation and
+    served as bytes until the generation moves on or invalidate() is called.
+    """
+
+    def __init__(self, max_entries: int = 1024, min_compress_bytes: int = 1024):
+        self.max_entries = max_entries
+        self.min_compress_bytes = min_compress_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, generation: int, build: Callable) -> CachedResponse:
+        """Return the cached response for key at generation, building it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        # Serialize outside the lock; a racing builder just produces identical bytes
+        body = json.dumps(build(), separators=(",", ":")).encode("utf-8")
+        cached = CachedResponse(body, self.min_compress_bytes)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (generation, cached)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return cached
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Drop one cached response, or all of them"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+
+def cached_json_response(cached: CachedResponse, request, max_age: int = 0) -> Response:
+    """Build a Flask response from a cache entry, answering If-None-Match with 304"""
+    encoding = cached.negotiate(request.accept_encodings)
+    body, etag = cached.variants[encoding]
+
+    headers = {
+        "ETag": etag,
+        "Vary": "Accept-Encoding",
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate"
+    }
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    if if_none_match.strip() == "*" or any(
+        candidate.strip() in cached.etags for candidate in if_none_match.split(",")
+    ):
+        return Response(status=304, headers=headers)
+
+    response = Response(body, status=200, mimetype="application/json", headers=headers)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    return response
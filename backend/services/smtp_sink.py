@@ -0,0 +1,84 @@
+import socketserver
+import threading
+from typing import List
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP for smtplib: EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT"""
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode("ascii") + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        with sink.lock:
+            sink.connections += 1
+        self.reply("220 localhost SMTP sink ready")
+
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+
+            if verb == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 8BITMIME")
+            elif verb in ("HELO", "MAIL", "RCPT", "RSET", "NOOP"):
+                if verb == "RCPT" and sink.reject_next > 0:
+                    with sink.lock:
+                        sink.reject_next -= 1
+                    self.reply("451 Try again later")
+                    continue
+                self.reply("250 OK")
+            elif verb == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                with sink.lock:
+                    sink.messages.append(b"".join(lines))
+                self.reply("250 OK queued")
+            elif verb == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class LocalSMTPSink:
+    """In-process SMTP server that accepts and keeps every message, for local testing.
+
+    Point EMAIL_CONFIG at it (use_tls off) to exercise the notification
+    pipeline end to end; `connections` shows how many SMTP sessions were
+    opened and reject_next makes the next N recipients fail with a 451 so
+    retries can be observed.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self.messages: List[bytes] = []
+        self.connections = 0
+        self.reject_next = 0
+        self.lock = threading.Lock()
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self.host, self.port = self._server.server_address
+        self._thread = None
+
+    def start(self) -> 'LocalSMTPSink':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="smtp-sink", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
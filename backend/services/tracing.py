@@ -0,0 +1,230 @@
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+INSERT_SPAN = """
+    INSERT INTO ai_agents_log (
+        agent_name, agent_version, action, target_type, target_id, details, status, execution_time_ms
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# (trace_id, span_id) of whatever is running in the current context
+_current = contextvars.ContextVar("trace_context", default=None)
+
+
+def current_trace_id() -> Optional[str]:
+    context = _current.get()
+    return context[0] if context else None
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+def _percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class Tracer:
+    """Timing spans for agent methods, written to ai_agents_log in batches.
+
+    Spans nest through a ContextVar: a span opened while another is active
+    records it as its parent and shares its trace_id, so one request or job
+    becomes one trace. Durations come from time.monotonic(). Finished spans
+    are buffered and written with a single executemany() by a background
+    flusher, and the latest window_size durations per (agent, action) are
+    kept in memory for percentile queries.
+
+    Spans finished in a forked worker process only update that process's
+    in-memory stats; database connections are never used across a fork.
+    """
+
+    def __init__(self, pool=None, batch_size: int = 100, flush_interval_seconds: float = 2.0,
+                 window_size: int = 1000):
+        self._buffer: List[tuple] = []
+        self._buffer_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._durations: Dict[tuple, deque] = {}
+        self._counts: Dict[tuple, Dict[str, int]] = {}
+        self._stop = threading.Event()
+        self._flusher = None
+        self.configure(pool, batch_size, flush_interval_seconds, window_size)
+
+    def configure(self, pool=None, batch_size: int = 100, flush_interval_seconds: float = 2.0,
+                  window_size: int = 1000):
+        """Point the tracer at a connection pool (spans are only kept in memory without one)"""
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.window_size = window_size
+        self._owner_pid = os.getpid()
+
+    # ------------------------------------------------------------------
+    # Spans
+    # ------------------------------------------------------------------
+    def begin_trace(self, trace_id: str = None):
+        """Start a new trace (one per request or job); returns a token for end_trace()"""
+        return _current.set((trace_id or uuid.uuid4().hex, None))
+
+    def end_trace(self, token):
+        _current.reset(token)
+
+    @contextmanager
+    def trace(self, trace_id: str = None):
+        """Context-manager form of begin_trace()/end_trace()"""
+        token = self.begin_trace(trace_id)
+        try:
+            yield _current.get()[0]
+        finally:
+            self.end_trace(token)
+
+    @contextmanager
+    def span(self, agent_name: str, action: str, agent_version: str = "", target_type: str = None,
+             target_id=None):
+        parent = _current.get()
+        trace_id = parent[0] if parent else uuid.uuid4().hex
+        span_id = _new_id()
+        token = _current.set((trace_id, span_id))
+        started_at = datetime.now().isoformat()
+        started = time.monotonic()
+        status, error = "completed", None
+        try:
+            yield span_id
+        except Exception as e:
+            status, error = "failed", f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _current.reset(token)
+            elapsed_ms = (time.monotonic() - started) * 1000
+            self._finish(agent_name, agent_version, action, target_type, target_id, status, elapsed_ms, {
+                "trace_id": trace_id,
+                "span_id": span_id,
+                "parent_span_id": parent[1] if parent else None,
+                "started_at": started_at,
+                "duration_ms": round(elapsed_ms, 3),
+                "error": error
+            })
+
+    def _finish(self, agent_name, agent_version, action, target_type, target_id, status, elapsed_ms, details):
+        key = (agent_name, action)
+        with self._stats_lock:
+            durations = self._durations.get(key)
+            if durations is None:
+                durations = self._durations[key] = deque(maxlen=self.window_size)
+                self._counts[key] = {"completed": 0, "failed": 0}
+            durations.append(elapsed_ms)
+            self._counts[key][status] += 1
+
+        if self.pool is None or os.getpid() != self._owner_pid:
+            return
+        row = (agent_name, agent_version, action, target_type, target_id, json.dumps(details), status,
+               int(round(elapsed_ms)))
+        with self._buffer_lock:
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full and self._flusher is None:
+            # No background flusher running: write inline rather than growing the buffer
+            self.flush()
+
+    def traced(self, agent_name: str, action: str = None, target_type: str = None):
+        """Decorator recording a span around an agent method.
+
+        The agent version comes from the instance's `version` attribute; with
+        target_type="course" the first argument's "id" becomes the target_id.
+        """
+        def decorator(fn: Callable) -> Callable:
+            name = action or fn.__name__
+
+            @functools.wraps(fn)
+            def wrapper(agent, *args, **kwargs):
+                target_id = None
+                if target_type == "course" and args and isinstance(args[0], dict):
+                    target_id = args[0].get("id")
+                with self.span(agent_name, name, getattr(agent, "version", ""), target_type, target_id):
+                    return fn(agent, *args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def flush(self) -> int:
+        """Write buffered spans to ai_agents_log in one transaction"""
+        if self.pool is None:
+            return 0
+        with self._flush_lock:
+            with self._buffer_lock:
+                rows, self._buffer = self._buffer, []
+            if not rows:
+                return 0
+            try:
+                with self.pool.transaction() as conn:
+                    conn.executemany(INSERT_SPAN, rows)
+            except Exception:
+                with self._buffer_lock:
+                    # Cap what is kept for retry so an unavailable database can't grow memory
+                    self._buffer = (rows + self._buffer)[-self.batch_size * 10:]
+                raise
+            return len(rows)
+
+    def start(self):
+        """Start the periodic background flusher"""
+        if self.pool is None or self._flusher is not None:
+            return
+        self._stop.clear()
+        self._flusher = threading.Thread(target=self._flush_periodically, name="tracer-flusher", daemon=True)
+        self._flusher.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def _flush_periodically(self):
+        while not self._stop.wait(self.flush_interval_seconds):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Tracer flush failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Stats
+    # ------------------------------------------------------------------
+    def latency_stats(self) -> Dict[str, Dict[str, Dict]]:
+        """p50/p95/p99 over the latest window_size spans of each agent action, in milliseconds"""
+        with self._stats_lock:
+            snapshot = {key: (sorted(durations), dict(self._counts[key]))
+                        for key, durations in self._durations.items()}
+
+        stats: Dict[str, Dict[str, Dict]] = {}
+        for (agent_name, action), (ordered, counts) in sorted(snapshot.items()):
+            stats.setdefault(agent_name, {})[action] = {
+                "count": counts["completed"] + counts["failed"],
+                "failed": counts["failed"],
+                "window": len(ordered),
+                "p50_ms": round(_percentile(ordered, 0.50), 3),
+                "p95_ms": round(_percentile(ordered, 0.95), 3),
+                "p99_ms": round(_percentile(ordered, 0.99), 3),
+                "max_ms": round(ordered[-1], 3),
+                "total_ms": round(sum(ordered), 3)
+            }
+        return stats
+
+
+# Process-wide tracer used by the agent decorators; app.py configures its pool
+tracer = Tracer()
+traced = tracer.traced
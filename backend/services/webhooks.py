@@ -0,0 +1,286 @@
+import hashlib
+import hmac
+import json
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote_plus
+
+# Provider events we act on, mapped to the payment status they move to
+STRIPE_EVENT_STATUSES = {
+    "checkout.session.completed": "completed",
+    "checkout.session.async_payment_succeeded": "completed",
+    "checkout.session.async_payment_failed": "failed",
+    "checkout.session.expired": "failed",
+    "payment_intent.succeeded": "completed",
+    "payment_intent.payment_failed": "failed",
+    "charge.refunded": "refunded"
+}
+
+PAYFAST_STATUSES = {
+    "COMPLETE": "completed",
+    "FAILED": "failed",
+    "CANCELLED": "failed"
+}
+
+INSERT_EVENT = """
+    INSERT OR IGNORE INTO webhook_events (
+        event_id, provider, event_type, payment_id, target_status, payload, received_at
+    ) VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+SELECT_QUEUED_EVENTS = """
+    SELECT event_id, provider, event_type, payment_id, target_status, payload FROM webhook_events
+    WHERE status = 'queued' ORDER BY received_at, rowid LIMIT ?
+"""
+
+MARK_EVENT = """
+    UPDATE webhook_events SET status = ?, error = NULL, attempts = attempts + 1, processed_at = CURRENT_TIMESTAMP
+    WHERE event_id = ?
+"""
+
+FAIL_EVENT = """
+    UPDATE webhook_events SET status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'queued' END,
+        attempts = attempts + 1, error = ?
+    WHERE event_id = ?
+"""
+
+COUNT_QUEUED_EVENTS = "SELECT COUNT(*) FROM webhook_events WHERE status = 'queued'"
+
+
+class WebhookSignatureError(ValueError):
+    """A webhook whose signature is missing, malformed or wrong"""
+
+
+# ----------------------------------------------------------------------
+# Stripe: Stripe-Signature "t=<unix time>,v1=<hex HMAC-SHA256 of '<t>.<body>'>"
+# ----------------------------------------------------------------------
+def stripe_signature(payload: bytes, secret: str, timestamp: int) -> str:
+    signed = str(timestamp).encode("utf-8") + b"." + payload
+    return hmac.new(secret.encode("utf-8"), signed, hashlib.sha256).hexdigest()
+
+
+def verify_stripe_signature(payload: bytes, header: str, secret: str, tolerance_seconds: float = 300,
+                            now: float = None):
+    """Raise WebhookSignatureError unless header signs payload with secret recently enough"""
+    if not secret:
+        raise WebhookSignatureError("Stripe webhook secret is not configured")
+    if not header:
+        raise WebhookSignatureError("Missing Stripe-Signature header")
+
+    timestamp, signatures = None, []
+    for part in header.split(","):
+        key, _, value = part.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+    if not timestamp or not timestamp.isdigit() or not signatures:
+        raise WebhookSignatureError("Malformed Stripe-Signature header")
+
+    expected = stripe_signature(payload, secret, int(timestamp))
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise WebhookSignatureError("Stripe signature mismatch")
+    if abs((now if now is not None else time.time()) - int(timestamp)) > tolerance_seconds:
+        raise WebhookSignatureError("Stripe signature timestamp outside the tolerance window")
+
+
+def parse_stripe_event(payload: bytes) -> Optional[Dict]:
+    """Queue entry for a Stripe event, or None for event types we don't act on.
+
+    The academy's payment id travels as the Checkout Session's
+    client_reference_id (or metadata.payment_id on payment intents/charges).
+    """
+    event = json.loads(payload)
+    status = STRIPE_EVENT_STATUSES.get(event.get("type"))
+    if status is None:
+        return None
+
+    obj = event.get("data", {}).get("object", {})
+    # Delayed payment methods complete the session unpaid; async_payment_succeeded follows once funds arrive
+    if event["type"] == "checkout.session.completed" and obj.get("payment_status") != "paid":
+        return None
+    payment_id = obj.get("client_reference_id") or obj.get("metadata", {}).get("payment_id")
+    if not event.get("id") or not payment_id:
+        raise ValueError("Stripe event is missing its id or payment reference")
+
+    # Checkout sessions report amount_total, payment intents amount_received (both in cents)
+    cents = obj.get("amount_total", obj.get("amount_received"))
+    return {
+        "event_id": f"stripe:{event['id']}",
+        "provider": "stripe",
+        "event_type": event["type"],
+        "payment_id": payment_id,
+        "target_status": status,
+        "payload": {"id": event["id"], "type": event["type"], "object_id": obj.get("id"),
+                    "amount_total": cents, "amount": f"{cents / 100:.2f}" if cents is not None else None,
+                    "currency": (obj.get("currency") or "").upper() or None}
+    }
+
+
+# ----------------------------------------------------------------------
+# PayFast ITN: MD5 of the posted fields (in order, minus "signature") plus the passphrase
+# ----------------------------------------------------------------------
+def payfast_signature(fields: Sequence[Tuple[str, str]], passphrase: str = None) -> str:
+    pairs = [f"{key}={quote_plus(value.strip())}" for key, value in fields if key != "signature"]
+    if passphrase:
+        pairs.append(f"passphrase={quote_plus(passphrase.strip())}")
+    return hashlib.md5("&".join(pairs).encode("utf-8")).hexdigest()
+
+
+def verify_payfast_signature(fields: Sequence[Tuple[str, str]], passphrase: str = None):
+    """Raise WebhookSignatureError unless the ITN's signature field matches its contents.
+
+    Without a passphrase the MD5 covers only fields the sender chose, so
+    anyone could sign an ITN; notifications are refused until one is set.
+    """
+    if not passphrase:
+        raise WebhookSignatureError("PayFast passphrase is not configured")
+    signature = dict(fields).get("signature")
+    if not signature:
+        raise WebhookSignatureError("Missing PayFast signature")
+    if not hmac.compare_digest(payfast_signature(fields, passphrase), signature):
+        raise WebhookSignatureError("PayFast signature mismatch")
+
+
+def parse_payfast_notification(fields: Sequence[Tuple[str, str]]) -> Optional[Dict]:
+    """Queue entry for a PayFast ITN, or None for statuses we don't act on"""
+    data = dict(fields)
+    status = PAYFAST_STATUSES.get(data.get("payment_status"))
+    if status is None:
+        return None
+    if not data.get("pf_payment_id") or not data.get("m_payment_id"):
+        raise ValueError("PayFast notification is missing pf_payment_id or m_payment_id")
+
+    # PayFast sends one ITN per status change, so (pf_payment_id, status) identifies it
+    return {
+        "event_id": f"payfast:{data['pf_payment_id']}:{data['payment_status']}",
+        "provider": "payfast",
+        "event_type": data["payment_status"],
+        "payment_id": data["m_payment_id"],
+        "target_status": status,
+        "payload": {**{key: value for key, value in data.items() if key != "signature"},
+                    "amount": data.get("amount_gross"), "currency": "ZAR"}
+    }
+
+
+class WebhookQueue:
+    """Durable queue of verified provider webhooks, applied in batches.
+
+    Endpoints only verify, parse and enqueue(): one INSERT OR IGNORE into
+    webhook_events, whose primary key is the provider's event id, so
+    redelivered events are dropped on arrival. A background worker drains
+    the table in batches of batch_size; each batch is applied in a single
+    write transaction, with a savepoint per event so one bad event is
+    retried (up to max_attempts) without undoing the rest of the batch.
+    Events that survive a crash are still queued and are picked up on
+    restart, by this or any other process.
+
+    on_applied, if given, receives the results of the transitions a batch
+    applied once that batch has committed (e.g. to send confirmations).
+    """
+
+    def __init__(self, pool, order_store, batch_size: int = 100, poll_interval_seconds: float = 1.0,
+                 max_attempts: int = 5, on_applied: Callable[[List[Dict]], None] = None):
+        self.pool = pool
+        self.order_store = order_store
+        self.on_applied = on_applied
+        self.batch_size = batch_size
+        self.poll_interval_seconds = poll_interval_seconds
+        self.max_attempts = max_attempts
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._worker = None
+
+    def enqueue(self, event: Dict) -> bool:
+        """Durably queue a parsed event; returns False if it was already received"""
+        with self.pool.transaction() as conn:
+            inserted = conn.execute(INSERT_EVENT, (
+                event["event_id"],
+                event["provider"],
+                event["event_type"],
+                event["payment_id"],
+                event["target_status"],
+                json.dumps(event.get("payload", {})),
+                time.time()
+            )).rowcount
+        self._wakeup.set()
+        return inserted > 0
+
+    def pending_count(self) -> int:
+        with self.pool.connection() as conn:
+            return conn.execute(COUNT_QUEUED_EVENTS).fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Processing
+    # ------------------------------------------------------------------
+    def process_batch(self) -> Dict[str, int]:
+        """Apply up to batch_size queued events in one transaction"""
+        counts = {"processed": 0, "ignored": 0, "retried": 0}
+        applied = []
+        with self.pool.transaction() as conn:
+            rows = conn.execute(SELECT_QUEUED_EVENTS, (self.batch_size,)).fetchall()
+            for row in rows:
+                conn.execute("SAVEPOINT webhook_event")
+                try:
+                    result = self.order_store.transition_payment(
+                        conn, row["payment_id"], row["target_status"],
+                        {"provider": row["provider"], "event_type": row["event_type"], **json.loads(row["payload"])}
+                    )
+                    # Unknown payments and stale or repeated transitions are recorded as ignored
+                    outcome = "processed" if result is not None and result["applied"] else "ignored"
+                    conn.execute(MARK_EVENT, (outcome, row["event_id"]))
+                    conn.execute("RELEASE webhook_event")
+                    counts[outcome] += 1
+                    if outcome == "processed":
+                        applied.append(result)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO webhook_event")
+                    conn.execute("RELEASE webhook_event")
+                    conn.execute(FAIL_EVENT, (self.max_attempts, str(e), row["event_id"]))
+                    counts["retried"] += 1
+                    print(f"❌ Webhook event {row['event_id']} failed: {e}")
+        counts["batch"] = len(rows)
+
+        if applied and self.on_applied is not None:
+            try:
+                self.on_applied(applied)
+            except Exception as e:
+                print(f"❌ Webhook on_applied hook failed: {e}")
+        return counts
+
+    def drain(self) -> int:
+        """Process batches until the queue is empty; returns how many events were handled"""
+        handled = 0
+        while not self._stop.is_set():
+            counts = self.process_batch()
+            handled += counts["batch"]
+            if counts["batch"] < self.batch_size:
+                break
+        return handled
+
+    def start(self):
+        """Start the background worker"""
+        if self._worker is not None:
+            return
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._work, name="webhook-worker", daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+            self._worker = None
+
+    def _work(self):
+        while not self._stop.is_set():
+            # Poll as well: other processes enqueue without waking this worker
+            self._wakeup.wait(self.poll_interval_seconds)
+            self._wakeup.clear()
+            try:
+                self.drain()
+            except Exception as e:
+                print(f"❌ Webhook worker error: {e}")
+                self._stop.wait(self.poll_interval_seconds)